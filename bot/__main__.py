@@ -6,12 +6,18 @@ from datetime import datetime
 from aiogram import Bot
 
 from bot.config import DEFAULT_TZ, bot, dp
+from bot.database import engine
+from bot.database.engine import replica_monitor
+from bot.database.bulk_writer import survey_writer
+from bot.database.partitions import partition_maintenance
+from bot.database.pool import warm_up
 from bot.settings import settings
 from bot.utils.bot_commands import set_commands
 from bot.utils.connect_to_services import test_redis_pool, test_database_pool
 from bot.utils.log import init_logger, _get_telegram_handler
 from bot.handlers import setup_routers
 from bot.middlewares import setup_middlewares
+from bot.ml.service import inference_executor, load_in_process, model_registry, preload_model, shared_pool, sidecar
 
 init_logger()
 logger = logging.getLogger(__name__)
@@ -19,6 +25,8 @@ logger = logging.getLogger(__name__)
 
 @dp.startup()
 async def on_startup(bot: Bot) -> None:
+    if sidecar is None:
+        load_in_process()
     await set_commands(bot)
     user = await bot.me()
 
@@ -36,6 +44,19 @@ async def on_startup(bot: Bot) -> None:
 
 @dp.shutdown()
 async def on_shutdown(bot: Bot) -> None:
+    await model_registry.close()
+    if sidecar is not None:
+        await sidecar.close()
+    await inference_executor.close()
+    if shared_pool is not None:
+        shared_pool.close()
+    if survey_writer is not None:
+        await survey_writer.close()
+    if replica_monitor is not None:
+        await replica_monitor.close()
+    if partition_maintenance is not None:
+        await partition_maintenance.close()
+    await engine.dispose()
     logger.info("Bot stopped")
 
     if not settings.log_chat:
@@ -60,6 +81,18 @@ async def _main() -> None:
         )
         exit(1)
 
+    if settings.db.pool_warmup:
+        await warm_up(engine, settings.db.pool_size)
+    if survey_writer is not None:
+        await survey_writer.start()
+    if replica_monitor is not None:
+        await replica_monitor.check()
+        replica_monitor.start()
+    if partition_maintenance is not None:
+        # Missing months are created before the first survey is saved
+        await partition_maintenance.run()
+        partition_maintenance.start()
+
     setup_middlewares(dp)
     setup_routers(dp)
 
@@ -70,6 +103,9 @@ async def _main() -> None:
 
 
 def main() -> None:
+    if shared_pool is not None:
+        preload_model()
+        shared_pool.start(model_registry.versions)
     asyncio.run(_main())
 
 
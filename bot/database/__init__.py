@@ -1,5 +1,5 @@
 from .repos import Repositories
-from .engine import engine, async_sessionmaker, get_repo
+from .engine import engine, async_sessionmaker, get_repo, LazyRepositories
 
 
-__all__ = ["models", "engine", "async_sessionmaker", "Repositories", "get_repo"]
+__all__ = ["models", "engine", "async_sessionmaker", "Repositories", "get_repo", "LazyRepositories"]
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from bot.database.engine import sessionmaker as default_sessionmaker
+from bot.database.models import Base, SurveyResponse
+from bot.database.repos.base import commit, mark_stale
+from bot.database.repos.survey_response import user_surveys_tag
+from bot.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriteError(RuntimeError):
+    pass
+
+
+def log_failure(future: asyncio.Future[int | None]) -> None:
+    """Done callback for futures of ``BulkWriter.add`` that nobody awaits, logs the row that was not written"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Buffered row was not written: %s", future.exception())
+
+
+class BulkWriter:
+    """
+    Write-behind buffer of rows of ``model``, flushed every ``interval`` seconds or ``max_rows`` rows.
+
+    Every flush is one transaction with a multi-row INSERT ... RETURNING id where the dialect supports it.
+    If a flush fails, its rows are appended to the ``spool`` JSON lines file and inserted by the next ``start``.
+    ``add`` returns a future of the generated id, None if the row was spooled. The query cache ``tags`` of
+    the inserted rows are invalidated after every flush.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker,
+        model: type[Base],
+        max_rows: int = 500,
+        interval: float = 0.2,
+        spool: Path | None = None,
+        tags: Callable[[dict[str, Any]], str] | None = None,
+    ) -> None:
+        self.sessionmaker = sessionmaker
+        self.model = model
+        self.max_rows = max_rows
+        self.interval = interval
+        self.spool = spool
+        self.tags = tags
+
+        self._pending: list[tuple[dict[str, Any], asyncio.Future[int | None]]] = []
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+        self._closed = False
+
+        self.flushes = 0
+        self.rows = 0
+        self.spooled = 0
+
+    def add(self, values: dict[str, Any]) -> asyncio.Future[int | None]:
+        if self._closed:
+            msg = "Bulk writer is closed"
+            raise BulkWriteError(msg)
+
+        future: asyncio.Future[int | None] = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="bulk-writer")
+        if len(self._pending) >= self.max_rows:
+            self._wakeup.set()
+        return future
+
+    async def start(self) -> None:
+        """Inserts the rows spooled by failed flushes"""
+        if self.spool is None or not self.spool.exists():
+            return
+
+        rows = [self._decode(json.loads(i)) for i in self.spool.read_text().splitlines() if i]
+        try:
+            for n in range(0, len(rows), self.max_rows):
+                await self._insert(rows[n : n + self.max_rows])
+        except Exception as e:
+            logger.error("Spooled %s rows are kept in %s, insert failed: %s", self.model.__tablename__, self.spool, e)
+            return
+
+        self.spool.unlink()
+        logger.info("Inserted %s spooled %s rows", len(rows), self.model.__tablename__)
+
+    async def _run(self) -> None:
+        while not self._closed:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            while self._pending:
+                batch, self._pending = self._pending[: self.max_rows], self._pending[self.max_rows :]
+                rows = [values for values, _ in batch]
+
+                try:
+                    ids: Sequence[int | None] = await self._insert(rows)
+                except Exception as e:
+                    logger.error("Flush of %s %s rows failed: %s", len(rows), self.model.__tablename__, e)
+                    try:
+                        ids = self._spool(rows)
+                    except Exception as spool_error:
+                        logger.exception("Rows of the failed flush are lost")
+                        for _, future in batch:
+                            if not future.done():
+                                future.set_exception(BulkWriteError(str(spool_error)))
+                        continue
+
+                for (_, future), row_id in zip(batch, ids):
+                    if not future.done():
+                        future.set_result(row_id)
+
+    async def _insert(self, rows: list[dict[str, Any]]) -> list[int]:
+        async with self.sessionmaker() as session:
+            if session.bind.dialect.insert_executemany_returning_sort_by_parameter_order:
+                stmt = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+                ids = list(await session.scalars(stmt, rows))
+            else:
+                objects = [self.model(**i) for i in rows]
+                session.add_all(objects)
+                await session.flush()
+                ids = [i.id for i in objects]
+
+            if self.tags is not None:
+                mark_stale(session, *{self.tags(i) for i in rows})
+            await commit(session)
+
+        self.flushes += 1
+        self.rows += len(rows)
+        return ids
+
+    def _spool(self, rows: list[dict[str, Any]]) -> list[None]:
+        if self.spool is None:
+            msg = f"{len(rows)} {self.model.__tablename__} rows are lost, no spool file is configured"
+            raise BulkWriteError(msg)
+
+        # The insert time is kept, the server default would be the time of the replay
+        now = datetime.now().isoformat()
+        self.spool.parent.mkdir(parents=True, exist_ok=True)
+        with self.spool.open("a") as f:
+            for row in rows:
+                f.write(json.dumps({"created_at": now, **self._encode(row)}) + "\n")
+
+        self.spooled += len(rows)
+        return [None] * len(rows)
+
+    @staticmethod
+    def _encode(row: dict[str, Any]) -> dict[str, Any]:
+        return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.items()}
+
+    @staticmethod
+    def _decode(row: dict[str, Any]) -> dict[str, Any]:
+        if isinstance(row.get("created_at"), str):
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+        return row
+
+    async def close(self) -> None:
+        """Stops the periodic flush and writes the remaining rows"""
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+        await self.flush()
+
+
+survey_writer = (
+    BulkWriter(
+        default_sessionmaker,
+        SurveyResponse,
+        max_rows=settings.db.bulk_max_rows,
+        interval=settings.db.bulk_interval_ms / 1000,
+        spool=settings.db.bulk_spool,
+        tags=lambda row: user_surveys_tag(row["user_id"]),
+    )
+    if settings.db.bulk_write
+    else None
+)
@@ -2,23 +2,72 @@ from __future__ import annotations
 
 import logging
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 from sqlalchemy import NullPool
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
 
+from bot.database.pool import InstrumentedPool
+from bot.database.replica import ReplicaMonitor, routing_session
 from bot.database.repos import Repositories
+from bot.database.repos.base import UNIT_OF_WORK, invalidate_stale
 from bot.enums.db import Databases
 
 from bot.settings import settings
 
 logger = logging.getLogger("Database")
 
-URL = settings.db.build_postgres_url() if settings.db.used == Databases.PostgreSQl else settings.db.build_mysql_url()
+def build_url() -> str:
+    return settings.db.build_postgres_url() if settings.db.used == Databases.PostgreSQl else settings.db.build_mysql_url()
 
 
-engine = create_async_engine(URL, future=True, poolclass=NullPool, echo=settings.debug_mode)
-sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+URL = build_url()
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    db = settings.db
+    kwargs: dict[str, Any] = {"future": True, "echo": settings.debug_mode}
+
+    if db.used == Databases.PostgreSQl:
+        # SQLAlchemy prepares statements itself, asyncpg has its own cache for the rest
+        kwargs["connect_args"] = {
+            "prepared_statement_cache_size": db.statement_cache_size,
+            "statement_cache_size": db.statement_cache_size,
+        }
+
+    if db.pool_size <= 0:
+        return create_async_engine(url, poolclass=NullPool, **kwargs)
+
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=db.pool_size,
+        max_overflow=db.max_overflow,
+        pool_timeout=db.pool_timeout,
+        pool_recycle=db.pool_recycle,
+        pool_pre_ping=db.pool_pre_ping,
+        **kwargs,
+    )
+
+
+engine = _create_engine(URL)
+
+replica_monitor = (
+    ReplicaMonitor(
+        _create_engine(settings.db.replica_url),
+        max_lag=settings.db.replica_max_lag,
+        interval=settings.db.replica_check_interval,
+    )
+    if settings.db.replica_url
+    else None
+)
+sessionmaker = async_sessionmaker(
+    bind=engine,
+    expire_on_commit=False,
+    autoflush=False,
+    sync_session_class=routing_session(engine, replica_monitor) if replica_monitor is not None else Session,
+)
 
 
 @asynccontextmanager
@@ -26,3 +75,41 @@ async def get_repo() -> AsyncGenerator[Repositories, None]:
     async with sessionmaker() as s:
         logger.debug("session was create")
         yield Repositories.get_repo(s)
+
+
+class LazyRepositories:
+    """
+    Stands in for ``Repositories`` of one update, the session is only created when a repository is first used.
+
+    The session itself checks out a pool connection on its first statement, so an update that never touches
+    the database costs neither a session nor a connection. With ``unit_of_work`` repositories only flush and
+    the owner calls ``complete`` once, closing without it rolls everything back.
+    """
+
+    def __init__(self, factory: async_sessionmaker = sessionmaker, unit_of_work: bool = False) -> None:
+        self._factory = factory
+        self._unit_of_work = unit_of_work
+        self._repo: Repositories | None = None
+
+    @property
+    def opened(self) -> bool:
+        return self._repo is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._repo is None:
+            logger.debug("session was create")
+            session = self._factory()
+            session.info[UNIT_OF_WORK] = self._unit_of_work
+            self._repo = Repositories.get_repo(session)
+        return getattr(self._repo, name)
+
+    async def complete(self) -> None:
+        """Commits the unit of work, repositories have only flushed it"""
+        if self._repo is not None and self._repo.session.in_transaction():
+            await self._repo.session.commit()
+            await invalidate_stale(self._repo.session)
+
+    async def close(self) -> None:
+        if self._repo is not None:
+            await self._repo.session.close()
+            self._repo = None
@@ -1,4 +1,6 @@
 from .base_models import Base
 from .user_models import User
+from .survey_response_models import SurveyResponse
+from .survey_response_score_models import SurveyResponseScore
 
-__all__ = ["Base", "User"]
+__all__ = ["Base", "User", "SurveyResponse", "SurveyResponseScore"]
@@ -1,38 +1,74 @@
-from sqlalchemy import ForeignKey, DateTime, BigInteger
+from sqlalchemy import DDL, ForeignKey, DateTime, BigInteger, Index, String, desc, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
+from bot.enums.survey import (
+    ActivityLevel,
+    Course,
+    Gender,
+    Involvement,
+    Quality,
+    RelationshipStatus,
+    ResidenceType,
+    RiskBand,
+    SocialSupport,
+    YesNo,
+)
 from .base_models import Base
+from .types import EnumCode
 
 class SurveyResponse(Base):
     __tablename__ = "survey_responses"
-    
-    id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
-    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    __table_args__ = (
+        Index("ix_survey_responses_model_version_risk_band", "model_version", "risk_band", "probability"),
+        # Страницы /my_surveys, от новых анкет к старым
+        Index("ix_survey_responses_user_id_created_at", "user_id", desc("created_at"), desc("id")),
+        # На PostgreSQL таблица разбита на месячные секции, их создает и архивирует bot.database.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    # Основные данные
+    # Ключ секционированной таблицы обязан включать created_at, для ORM анкету по-прежнему определяет id
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, insert_sentinel=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"))
+    created_at: Mapped[datetime] = mapped_column(primary_key=True, server_default=func.now())
+
+    # Основные данные, категориальные ответы хранятся кодами SMALLINT и читаются как строки
     age: Mapped[int] = mapped_column(nullable=True)
-    gender: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    course: Mapped[str] = mapped_column(nullable=True)
+    gender: Mapped[str] = mapped_column(EnumCode(Gender), nullable=True)
+    course: Mapped[str] = mapped_column(EnumCode(Course), nullable=True)
     gpa: Mapped[float] = mapped_column(nullable=True)
     stress_level: Mapped[int] = mapped_column(nullable=True)
     anxiety_score: Mapped[int] = mapped_column(nullable=True)
-    sleep_quality: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    physical_activity: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-
-    diet_quality: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    social_support: Mapped[str] = mapped_column(nullable=True)
-    relationship_status: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    substance_use: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    counseling_service_use: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    family_history: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
-    chronic_illness: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
+    sleep_quality: Mapped[str] = mapped_column(EnumCode(Quality), nullable=True)
+    physical_activity: Mapped[str] = mapped_column(EnumCode(ActivityLevel), nullable=True)
+
+    diet_quality: Mapped[str] = mapped_column(EnumCode(Quality), nullable=True)
+    social_support: Mapped[str] = mapped_column(EnumCode(SocialSupport), nullable=True)
+    relationship_status: Mapped[str] = mapped_column(EnumCode(RelationshipStatus), nullable=True)
+    substance_use: Mapped[str] = mapped_column(EnumCode(YesNo), nullable=True)
+    counseling_service_use: Mapped[str] = mapped_column(EnumCode(YesNo), nullable=True)
+    family_history: Mapped[str] = mapped_column(EnumCode(YesNo), nullable=True)
+    chronic_illness: Mapped[str] = mapped_column(EnumCode(YesNo), nullable=True)
     financial_stress: Mapped[int] = mapped_column(nullable=True)
-    extracurricular_involvement: Mapped[str] = mapped_column(nullable=True)
+    extracurricular_involvement: Mapped[str] = mapped_column(EnumCode(Involvement), nullable=True)
     semester_credit_load: Mapped[int] = mapped_column(nullable=True)
-    residence_type: Mapped[str] = mapped_column(nullable=True)  # изменено с int на str
+    residence_type: Mapped[str] = mapped_column(EnumCode(ResidenceType), nullable=True)
     bot_rating: Mapped[int] = mapped_column(nullable=True)
 
+    # Результат модели на момент прохождения опроса
+    probability: Mapped[float] = mapped_column(nullable=True)
+    risk_band: Mapped[str] = mapped_column(EnumCode(RiskBand), nullable=True)
+    model_version: Mapped[str] = mapped_column(String(64), nullable=True)
+
     # Связь с пользователем
     user: Mapped["User"] = relationship(back_populates="survey_responses")
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Секция для строк, месяц которых еще не создан, чтобы вставка никогда не падала
+event.listen(
+    SurveyResponse.__table__,
+    "after_create",
+    DDL("CREATE TABLE survey_responses_default PARTITION OF survey_responses DEFAULT").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,19 @@
+from sqlalchemy import String, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from .base_models import Base
+
+
+class SurveyResponseScore(Base):
+    """Probability of a stored survey response under one model version, written by ``python -m bot.score``"""
+
+    __tablename__ = "survey_response_scores"
+    __table_args__ = (UniqueConstraint("response_id", "model_version"),)
+
+    # Not a foreign key, survey_responses is partitioned and its id alone is not unique to PostgreSQL.
+    # Scores are deleted with their response and with archived partitions.
+    response_id: Mapped[int]
+    model_version: Mapped[str] = mapped_column(String(64))
+    probability: Mapped[float]
+    created_at: Mapped[datetime] = mapped_column(server_default=func.now())
@@ -1,11 +1,39 @@
-from typing import Annotated
+from enum import Enum
+from typing import Annotated, Any
 
-from sqlalchemy import BigInteger, Integer, String
+from sqlalchemy import BigInteger, Integer, SmallInteger, String
 from sqlalchemy.orm import mapped_column
+from sqlalchemy.types import TypeDecorator
 
 intpk = Annotated[int, mapped_column(BigInteger, unique=True, nullable=False, primary_key=True)]
 integer = Annotated[int, mapped_column(Integer, server_default="0")]
 
 str_255 = Annotated[int, mapped_column(String(200), nullable=False)]
 str_128 = Annotated[int, mapped_column(String(128), nullable=False)]
-str_32 = Annotated[int, mapped_column(String(32), nullable=False)]
\ No newline at end of file
+str_32 = Annotated[int, mapped_column(String(32), nullable=False)]
+
+
+class EnumCode(TypeDecorator):
+    """Value of a str enum stored as SMALLINT, the position of the member in the enum, and loaded as the value"""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum: type[Enum]) -> None:
+        super().__init__()
+        self.enum = enum
+        self._values = tuple(i.value for i in enum)
+        self._codes = {value: n for n, value in enumerate(self._values)}
+
+    def process_bind_param(self, value: Any, dialect: Any) -> int | None:
+        if value is None:
+            return None
+
+        try:
+            return self._codes[value.value if isinstance(value, Enum) else value]
+        except KeyError:
+            msg = f"Unexpected {self.enum.__name__} value {value!r}"
+            raise ValueError(msg) from None
+
+    def process_result_value(self, value: int | None, dialect: Any) -> str | None:
+        return None if value is None else self._values[value]
@@ -11,8 +11,10 @@ class User(Base):
     username: Mapped[str_32] = mapped_column(nullable=False)
     is_admin: Mapped[bool] = mapped_column(default=False)
 
+    # Не загружается вместе с пользователем, история подгружается явно (UsersRepo.get_with_history)
     survey_responses: Mapped[list["SurveyResponse"]] = relationship(
-        back_populates="user", 
+        back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        passive_deletes=True,
+        lazy="raise_on_sql",
     )
\ No newline at end of file
@@ -0,0 +1,324 @@
+"""
+Creates monthly partitions of survey_responses ahead of time and archives the ones past the retention period.
+
+Usage:
+    python -m bot.database.partitions [--ahead 3] [--retention 12] [--format csv]
+
+Only PostgreSQL tables partitioned by the migration are maintained. An archived partition is detached, exported
+to ``<archive dir>/survey_responses_yYYYYmMM.csv.gz`` (or ``.parquet``, which needs pyarrow), and dropped together
+with the scores of its responses. A partition whose export failed stays detached and is exported by the next run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import gzip
+import logging
+import re
+from datetime import date
+from pathlib import Path
+from typing import Any, Literal, NamedTuple, Sequence
+
+from sqlalchemy import Column, DateTime, Float, MetaData, String, Table, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from bot.database.engine import engine as default_engine
+from bot.database.models import SurveyResponse
+from bot.database.models.types import EnumCode
+from bot.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT = SurveyResponse.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+# Key of the advisory lock held while partitions are changed, so bot workers and cron do not race
+LOCK_KEY = 720_250_001
+
+ArchiveFormat = Literal["csv", "parquet"]
+
+_NAME = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+
+
+class Partition(NamedTuple):
+    name: str
+    month: date
+    attached: bool
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, n: int) -> date:
+    year, index = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(year, index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> date | None:
+    match = _NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def months_to_archive(partitions: Sequence[Partition], today: date, retention: int) -> list[Partition]:
+    """Partitions older than the current month and the ``retention`` full months before it, none if it is 0"""
+    if retention <= 0:
+        return []
+
+    cutoff = add_months(month_start(today), -retention)
+    return sorted((i for i in partitions if i.month < cutoff), key=lambda i: i.month)
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+
+    return bool(
+        await conn.scalar(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :name AND c.relnamespace = current_schema()::regnamespace)"
+            ),
+            {"name": PARENT},
+        )
+    )
+
+
+async def list_partitions(conn: AsyncConnection) -> list[Partition]:
+    """Monthly partitions, attached or left detached by a failed archive run"""
+    rows = await conn.execute(
+        text(
+            "SELECT c.relname, i.inhrelid IS NOT NULL FROM pg_class c "
+            "LEFT JOIN pg_inherits i ON i.inhrelid = c.oid "
+            "WHERE c.relkind = 'r' AND c.relnamespace = current_schema()::regnamespace AND c.relname LIKE :pattern"
+        ),
+        {"pattern": f"{PARENT}_y%"},
+    )
+    partitions = [Partition(name, month, attached) for name, attached in rows if (month := partition_month(name))]
+    return sorted(partitions, key=lambda i: i.month)
+
+
+async def create_partition(conn: AsyncConnection, month: date) -> None:
+    """
+    Creates the partition of ``month`` and attaches it, moving its rows out of the default partition.
+
+    ATTACH PARTITION locks the parent less than CREATE TABLE ... PARTITION OF, inserts keep going.
+    """
+    name, start, end = partition_name(month), month, add_months(month, 1)
+    bounds = {"start": start, "end": end}
+
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    moved = await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :start AND created_at < :end "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await conn.execute(
+        text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')")
+    )
+    logger.info("Created partition %s, %s rows moved from the default partition", name, moved.rowcount)
+
+
+def _archive_table(name: str) -> Table:
+    """The columns of survey_responses on a detached partition, answers are exported as their values"""
+    return Table(name, MetaData(), *[Column(i.name, i.type) for i in SurveyResponse.__table__.columns])
+
+
+class _CsvWriter:
+    suffix = ".csv.gz"
+
+    def __init__(self, path: Path, table: Table) -> None:
+        self._file = gzip.open(path, "wt", newline="")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(table.columns.keys())
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._csv.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetWriter:
+    suffix = ".parquet"
+
+    def __init__(self, path: Path, table: Table) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        def arrow_type(column: Column) -> Any:
+            if isinstance(column.type, (String, EnumCode)):
+                return pa.string()
+            if isinstance(column.type, DateTime):
+                return pa.timestamp("us")
+            if isinstance(column.type, Float):
+                return pa.float64()
+            return pa.int64()
+
+        self._pa = pa
+        self._schema = pa.schema([(i.name, arrow_type(i)) for i in table.columns])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> None:
+        columns = list(zip(*rows))
+        self._writer.write_table(self._pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+async def export_partition(
+    conn: AsyncConnection, name: str, directory: Path, fmt: ArchiveFormat = "csv", batch: int = 10000
+) -> Path:
+    """Streams the rows of table ``name`` to a compressed file in ``directory``"""
+    table = _archive_table(name)
+    writer_class = _ParquetWriter if fmt == "parquet" else _CsvWriter
+    path = directory / f"{name}{writer_class.suffix}"
+    partial = path.with_name(path.name + ".part")
+
+    directory.mkdir(parents=True, exist_ok=True)
+    writer = await asyncio.to_thread(writer_class, partial, table)
+    try:
+        result = await conn.stream(select(table).order_by(table.c.id))
+        async for rows in result.partitions(batch):
+            await asyncio.to_thread(writer.write, rows)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    partial.replace(path)
+    return path
+
+
+async def archive_partition(conn: AsyncConnection, partition: Partition, directory: Path, fmt: ArchiveFormat) -> Path:
+    """Detaches ``partition``, exports it and drops it with the scores of its responses"""
+    if partition.attached:
+        await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {partition.name}"))
+        await conn.commit()
+
+    path = await export_partition(conn, partition.name, directory, fmt)
+    await conn.commit()
+
+    await conn.execute(
+        text(f"DELETE FROM survey_response_scores WHERE response_id IN (SELECT id FROM {partition.name})")
+    )
+    await conn.execute(text(f"DROP TABLE {partition.name}"))
+    await conn.commit()
+
+    logger.info("Archived partition %s to %s", partition.name, path)
+    return path
+
+
+async def maintain(
+    engine: AsyncEngine,
+    ahead: int = 3,
+    retention: int = 0,
+    directory: Path = settings.db.partition_archive_dir,
+    fmt: ArchiveFormat = "csv",
+    today: date | None = None,
+) -> None:
+    """Creates partitions up to ``ahead`` months ahead and archives the ones past ``retention`` full months"""
+    today = today or date.today()
+
+    async with engine.connect() as conn:
+        if not await is_partitioned(conn):
+            return
+        if not await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}):
+            logger.info("Partitions of %s are maintained by another process", PARENT)
+            return
+        await conn.commit()
+
+        try:
+            partitions = await list_partitions(conn)
+            existing = {i.month for i in partitions}
+            for n in range(ahead + 1):
+                month = add_months(month_start(today), n)
+                if month not in existing:
+                    await create_partition(conn, month)
+                    await conn.commit()
+
+            for partition in months_to_archive(partitions, today, retention):
+                await archive_partition(conn, partition, directory, fmt)
+        finally:
+            await conn.rollback()
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+            await conn.commit()
+
+
+class PartitionMaintenance:
+    """Runs ``maintain`` every ``interval`` seconds in the bot process"""
+
+    def __init__(self, engine: AsyncEngine, interval: float = 21600, **options: Any) -> None:
+        self.engine = engine
+        self.interval = interval
+        self.options = options
+        self._task: asyncio.Task[None] | None = None
+
+    async def run(self) -> None:
+        try:
+            await maintain(self.engine, **self.options)
+        except Exception:
+            logger.exception("Partition maintenance of %s failed", PARENT)
+
+    async def _run(self) -> None:
+        while True:
+            await self.run()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="partition-maintenance")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+partition_maintenance = (
+    PartitionMaintenance(
+        default_engine,
+        settings.db.partition_check_interval,
+        ahead=settings.db.partition_ahead_months,
+        retention=settings.db.partition_retention_months,
+        directory=settings.db.partition_archive_dir,
+        fmt=settings.db.partition_archive_format,
+    )
+    if settings.db.partition_check_interval > 0
+    else None
+)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    try:
+        await maintain(default_engine, args.ahead, args.retention, args.directory, args.format)
+    finally:
+        await default_engine.dispose()
+
+
+def main() -> None:
+    db = settings.db
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ahead", type=int, default=db.partition_ahead_months, help="months created in advance")
+    parser.add_argument(
+        "--retention", type=int, default=db.partition_retention_months, help="full months kept, 0 keeps all"
+    )
+    parser.add_argument("--directory", type=Path, default=db.partition_archive_dir)
+    parser.add_argument("--format", choices=["csv", "parquet"], default=db.partition_archive_format)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, PoolProxiedConnection
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+    peak_in_use: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_checkout(self, seconds: float, in_use: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    @property
+    def avg_wait_ms(self) -> float:
+        return round(self.wait_seconds / self.checkouts * 1000, 2) if self.checkouts else 0.0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that times every checkout, including the wait for a free connection and the pre-ping"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+
+        self.stats.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def recreate(self) -> InstrumentedPool:
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def pool_status(pool: Pool) -> dict[str, Any] | None:
+    """Gauges of ``pool``, None if connections are not pooled"""
+    if not isinstance(pool, InstrumentedPool):
+        return None
+
+    return {
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "peak_in_use": pool.stats.peak_in_use,
+        "checkouts": pool.stats.checkouts,
+        "avg_wait_ms": pool.stats.avg_wait_ms,
+        "max_wait_ms": round(pool.stats.max_wait_seconds * 1000, 2),
+        "timeouts": pool.stats.timeouts,
+    }
+
+
+async def warm_up(engine: AsyncEngine, connections: int) -> None:
+    """Opens ``connections`` connections at once and returns them to the pool"""
+    if connections <= 0:
+        return
+
+    opened = await asyncio.gather(*(engine.connect().start() for _ in range(connections)), return_exceptions=True)
+    await asyncio.gather(*(i.close() for i in opened if not isinstance(i, BaseException)))
+
+    errors = [i for i in opened if isinstance(i, BaseException)]
+    if errors:
+        raise errors[0]
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import math
+import pickle
+import random
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, Sequence, TypeVar
+
+from cachetools import TTLCache
+
+from bot.settings import settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _version() -> int:
+    # Random, not incremented, so a tag that expired and was invalidated again never repeats an old version
+    return random.getrandbits(62)
+
+
+class RecentWrites:
+    """
+    When query cache tags were last written, as far as this process knows, remembered for ``horizon`` seconds.
+
+    Reads of a recently written tag skip the read replica, which may not have replayed the write yet.
+    """
+
+    def __init__(self, horizon: float) -> None:
+        self._times: TTLCache[str, float] = TTLCache(maxsize=math.inf, ttl=horizon)
+
+    def record(self, *tags: str) -> None:
+        now = time.monotonic()
+        for tag in tags:
+            self._times[tag] = now
+
+    def within(self, tags: Iterable[str], seconds: float) -> bool:
+        """True if any of ``tags`` was written less than ``seconds`` ago"""
+        now = time.monotonic()
+        return any(now - self._times.get(tag, -math.inf) < seconds for tag in tags)
+
+
+class QueryCache:
+    """
+    Results of repository reads by key, each entry is stored with the current versions of its tags.
+
+    Invalidating a tag gives it a new version, so every entry stored with the old one becomes a miss.
+    Versions are read before the query, a result loaded while its tag is invalidated is never served.
+    The in-process TTL cache holds up to ``max_bytes`` of pickled entries. With ``redis`` the entries are
+    shared by all bot workers and tag versions are kept only in Redis, so invalidation reaches every worker.
+    A tag version first seen here is recorded in ``writes``: the tag was written by another worker just now,
+    so the load that follows reads the primary, and a lagging replica never fills the entry of the new version.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: int = 300,
+        redis: Redis | None = None,
+        prefix: str = "query",
+        writes: RecentWrites | None = None,
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self.writes = writes
+
+        self._local: TTLCache[str, bytes] = TTLCache(maxsize=max_bytes, ttl=ttl, getsizeof=len)
+        # A version outlives every entry stored with it, an expired tag is treated as never invalidated.
+        # With Redis these are the versions last seen there.
+        self._versions: TTLCache[str, int] = TTLCache(maxsize=math.inf, ttl=ttl)
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def _lookup(self, key: str, tags: Sequence[str]) -> tuple[tuple[int, ...] | None, bytes | None, bool]:
+        """Current versions of ``tags`` (None if they are unknown) and the stored entry, from Redis or not"""
+        entry = self._local.get(key)
+        if self.redis is None:
+            return tuple(self._versions.get(i, 0) for i in tags), entry, False
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.mget([self._tag_key(i) for i in tags])
+                if entry is None:
+                    pipe.get(f"{self.prefix}:{key}")
+                result = await pipe.execute()
+        except Exception as e:
+            logger.debug("Redis query cache is unavailable: %s", e)
+            return None, None, False
+
+        versions = tuple(int(i) if i is not None else 0 for i in result[0])
+        self._observe(tags, versions)
+        if entry is None and result[1] is not None:
+            return versions, result[1], True
+        return versions, entry, False
+
+    def _observe(self, tags: Sequence[str], versions: Sequence[int]) -> None:
+        changed = [tag for tag, version in zip(tags, versions) if version and self._versions.get(tag) != version]
+        if changed and self.writes is not None:
+            self.writes.record(*changed)
+        for tag, version in zip(tags, versions):
+            self._versions[tag] = version
+
+    async def get_or_load(self, key: str, tags: Sequence[str], load: Callable[[], Awaitable[T]]) -> T:
+        """Returns the cached result of ``key`` if none of ``tags`` was invalidated since, otherwise ``load``-s it"""
+        versions, entry, from_redis = await self._lookup(key, tags)
+
+        if entry is not None:
+            stored_versions, value = pickle.loads(entry)
+            if stored_versions == versions:
+                if from_redis:
+                    self._local[key] = entry
+                    self.redis_hits += 1
+                else:
+                    self.hits += 1
+                return value
+
+        self.misses += 1
+        value = await load()
+        if versions is None:
+            # Versions are unknown while Redis is down, the result could not be invalidated
+            return value
+
+        entry = pickle.dumps((versions, value))
+        try:
+            self._local[key] = entry
+        except ValueError:
+            # Larger than the whole cache
+            return value
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(f"{self.prefix}:{key}", entry, ex=self.ttl)
+            except Exception as e:
+                logger.debug("Redis query cache is unavailable: %s", e)
+        return value
+
+    async def invalidate(self, *tags: str) -> None:
+        if not tags:
+            return
+        self.invalidations += len(tags)
+
+        if self.redis is None:
+            for tag in tags:
+                self._versions[tag] = _version()
+            return
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.set(self._tag_key(tag), _version(), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            # Entries of these tags may be served until they expire
+            logger.warning("Failed to invalidate %s query cache tags: %s", len(tags), e)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups * 100, 1) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "size": len(self._local),
+            "bytes": self._local.currsize,
+        }
+
+
+recent_writes = RecentWrites(settings.db.replica_max_lag)
+
+query_cache = (
+    QueryCache(
+        max_bytes=settings.db.query_cache_mb * 1024 * 1024,
+        ttl=settings.db.query_cache_ttl,
+        redis=settings.redis.get_redis() if settings.redis.use and settings.db.query_cache_redis else None,
+        writes=recent_writes,
+    )
+    if settings.db.query_cache
+    else None
+)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from typing import Any, Mapping
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from bot.database.query_cache import recent_writes
+from bot.database.repos.base import READ_REPLICA, REPLICA_TAGS
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary, 0 when it has replayed everything it received
+POSTGRES_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+# Session info key of sessions that have written, their reads stay on the primary
+WROTE = "wrote"
+
+
+class ReplicaMonitor:
+    """Checks the replication lag every ``interval`` seconds, the replica is used while it is below ``max_lag``"""
+
+    def __init__(self, engine: AsyncEngine, max_lag: float = 5.0, interval: float = 5.0) -> None:
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+
+        self.available = False
+        self.lag: float | None = None
+        self._task: asyncio.Task[None] | None = None
+
+        # A dropped replica connection takes it out of rotation until the next successful check
+        event.listen(engine.sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, context: Any) -> None:
+        if context.is_disconnect and self.available:
+            self.available = False
+            logger.warning("Read replica disconnected, reading from the primary")
+
+    async def _lag(self) -> float:
+        async with self.engine.connect() as conn:
+            if self.engine.dialect.name == "mysql":
+                status = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+                lag = status and status.get("Seconds_Behind_Source")
+                if lag is None:
+                    msg = "Replication is not running"
+                    raise RuntimeError(msg)
+                return float(lag)
+
+            return float((await conn.execute(POSTGRES_LAG)).scalar() or 0)
+
+    async def check(self) -> bool:
+        try:
+            self.lag = await self._lag()
+            available = self.lag <= self.max_lag
+        except Exception as e:
+            logger.debug("Read replica check failed: %s", e)
+            self.lag = None
+            available = False
+
+        if available != self.available:
+            state = "available" if available else "unavailable, reading from the primary"
+            logger.warning("Read replica is %s (lag %s s)", state, self.lag)
+        self.available = available
+        return available
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="replica-monitor")
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.engine.dispose()
+
+
+def routing_session(primary: AsyncEngine, monitor: ReplicaMonitor) -> type[Session]:
+    """
+    Session class sending statements marked with ``READ_REPLICA`` to the replica while the monitor allows it.
+
+    Everything else goes to the primary, and once a session has written, its reads do as well. So do reads of
+    tags written by any session of this process less than ``monitor.max_lag`` seconds ago.
+    """
+    primary_bind, replica_bind = primary.sync_engine, monitor.engine.sync_engine
+
+    def replica_allowed(options: Mapping[str, Any]) -> bool:
+        return options.get(READ_REPLICA, False) and not recent_writes.within(options.get(REPLICA_TAGS, ()), monitor.max_lag)
+
+    class RoutingSession(Session):
+        def get_bind(self, mapper: Any = None, *, clause: Any = None, **kwargs: Any) -> Engine:
+            if clause is None or isinstance(clause, UpdateBase):
+                # Flushes come without a statement
+                self.info[WROTE] = True
+            elif monitor.available and not self.info.get(WROTE) and replica_allowed(clause.get_execution_options()):
+                return replica_bind
+            return primary_bind
+
+    return RoutingSession
@@ -3,8 +3,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .base import commit
 from .users import UsersRepo
 from .survey_response import SurveyResponseRepo
+from .survey_response_score import SurveyResponseScoreRepo
 
 
 @dataclass
@@ -12,10 +14,20 @@ class Repositories:
     session: AsyncSession
     users: UsersRepo
     survey_responses: SurveyResponseRepo
+    survey_response_scores: SurveyResponseScoreRepo
+
+    async def commit(self) -> None:
+        """Commits, or in unit-of-work mode only flushes, the middleware commits once per update"""
+        await commit(self.session)
 
     @staticmethod
     def get_repo(session: AsyncSession) -> Repositories:
-        return Repositories(session=session, users=UsersRepo(session), survey_responses=SurveyResponseRepo(session))
+        return Repositories(
+            session=session,
+            users=UsersRepo(session),
+            survey_responses=SurveyResponseRepo(session),
+            survey_response_scores=SurveyResponseScoreRepo(session),
+        )
 
 
 __all__ = [
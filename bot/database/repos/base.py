@@ -4,10 +4,11 @@ from __future__ import annotations
 from abc import ABC
 from typing import TYPE_CHECKING, Any, Sequence, TypeVar
 
-from sqlalchemy import func, select
+from sqlalchemy import Executable, func, select
 from sqlalchemy.orm import selectinload
 
 from bot.database.models.base_models import Base
+from bot.database.query_cache import query_cache, recent_writes
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,6 +16,52 @@ if TYPE_CHECKING:
 
 Model = TypeVar("Model", bound=Base)
 
+# Session info key of sessions whose owner commits, repositories only flush them
+UNIT_OF_WORK = "unit_of_work"
+# Execution option of reads that may be served by the read replica
+READ_REPLICA = "read_replica"
+# Execution option with the query cache tags of the rows such a read returns
+REPLICA_TAGS = "replica_tags"
+# Session info key of query cache tags made stale by the session's writes, invalidated once it commits
+STALE_TAGS = "stale_tags"
+
+Statement = TypeVar("Statement", bound=Executable)
+
+
+def on_replica(stmt: Statement, *tags: str) -> Statement:
+    """
+    Marks a pure read, a routing session sends it to the read replica if one is available.
+
+    If any of the query cache ``tags`` of the rows it returns was written within the replica lag limit,
+    it is read from the primary, so users see their own writes made by other sessions.
+    """
+    return stmt.execution_options(**{READ_REPLICA: True, REPLICA_TAGS: tags})
+
+
+def mark_stale(session: AsyncSession, *tags: str) -> None:
+    """Records query cache tags of rows written in ``session``, its reads of them bypass the cache until it commits"""
+    session.info.setdefault(STALE_TAGS, set()).update(tags)
+
+
+async def invalidate_stale(session: AsyncSession) -> None:
+    """Invalidates the tags of the committed writes of ``session``, their replica reads go to the primary a while"""
+    tags = session.info.pop(STALE_TAGS, None)
+    if not tags:
+        return
+
+    recent_writes.record(*tags)
+    if query_cache is not None:
+        await query_cache.invalidate(*tags)
+
+
+async def commit(session: AsyncSession) -> None:
+    """Commits the session, or only flushes it if it is a unit of work committed by its owner"""
+    if session.info.get(UNIT_OF_WORK):
+        await session.flush()
+    else:
+        await session.commit()
+        await invalidate_stale(session)
+
 
 class BaseRepo(ABC):
     model: Base
@@ -34,7 +81,7 @@ class BaseRepo(ABC):
         for i in db_obj:
             self.session.add(i)
 
-        await self.session.commit()
+        await commit(self.session)
 
         return db_obj[0] if len(db_obj) == 1 else db_obj
 
@@ -51,11 +98,11 @@ class BaseRepo(ABC):
     async def delete(self, *db_objects: Model) -> None:
         for i in db_objects:
             await self.session.delete(i)
-        await self.session.commit()
+        await commit(self.session)
 
     async def update(self, db_object: Model) -> None:
         self.session.add(db_object)
-        await self.session.commit()
+        await commit(self.session)
 
         # await self.session.refresh(db_object)
         # return db_object
@@ -63,7 +110,7 @@ class BaseRepo(ABC):
 
     async def get_all(self, *, count: bool = False) -> int | Sequence[Model]:
         if count:
-            stmt = select(func.count()).select_from(self.model)
+            stmt = on_replica(select(func.count()).select_from(self.model))
             result = await self.session.execute(stmt)
             return result.scalar_one()
 
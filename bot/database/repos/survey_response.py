@@ -1,13 +1,36 @@
 
-from sqlalchemy import select, delete
+from datetime import datetime
+from typing import Awaitable, Callable, Sequence, TypeVar
+
+from sqlalchemy import Row, asc, bindparam, desc, select, delete, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database.models.survey_response_models import SurveyResponse
+from bot.database.models.survey_response_score_models import SurveyResponseScore
+from bot.database.query_cache import QueryCache, query_cache
+from bot.database.repos.base import STALE_TAGS, commit, mark_stale, on_replica
+
+T = TypeVar("T")
+
+
+def user_surveys_tag(user_id: int) -> str:
+    return f"user:{user_id}:surveys"
+
+
+def survey_tag(response_id: int) -> str:
+    return f"survey:{response_id}"
 
 
 class SurveyResponseRepo:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, cache: QueryCache | None = query_cache):
         self.session = session
+        self.cache = cache
+
+    async def _cached(self, key: str, tags: Sequence[str], load: Callable[[], Awaitable[T]]) -> T:
+        # Until its writes are committed only this session knows the cache is stale
+        if self.cache is None or self.session.info.get(STALE_TAGS):
+            return await load()
+        return await self.cache.get_or_load(key, tags, load)
 
     async def create(
         self,
@@ -23,6 +46,7 @@ class SurveyResponseRepo:
             **additional_fields
         )
         self.session.add(response)
+        mark_stale(self.session, user_surveys_tag(user_id))
         return response
 
     async def get_by_user(self, user_id: int) -> list[SurveyResponse]:
@@ -40,14 +64,40 @@ class SurveyResponseRepo:
             .limit(1)
         )
         return result.scalar_one_or_none()
-    
-    async def get_user_responses(self, user_id: int) -> list[SurveyResponse]:
-        result = await self.session.execute(
-            select(SurveyResponse)
-            .where(SurveyResponse.user_id == user_id)
-            .order_by(SurveyResponse.created_at.desc())
+
+    async def page_by_user(
+        self,
+        user_id: int,
+        limit: int,
+        cursor: tuple[datetime, int] | None = None,
+        backward: bool = False,
+    ) -> tuple[Sequence[Row], bool]:
+        """
+        Keyset page of ``id`` and ``created_at`` of the user's responses, newest first.
+
+        Rows older than ``cursor`` are returned, or newer ones if ``backward``. The flag tells if there are
+        more rows in the same direction.
+        """
+        key = tuple_(SurveyResponse.created_at, SurveyResponse.id)
+        order = asc if backward else desc
+
+        stmt = select(SurveyResponse.id, SurveyResponse.created_at).where(SurveyResponse.user_id == user_id)
+        if cursor is not None:
+            stmt = stmt.where(key > tuple_(*cursor) if backward else key < tuple_(*cursor))
+        stmt = stmt.order_by(order(SurveyResponse.created_at), order(SurveyResponse.id)).limit(limit + 1)
+
+        async def load() -> tuple[Sequence[Row], bool]:
+            rows = (await self.session.execute(on_replica(stmt, user_surveys_tag(user_id)))).all()
+            more = len(rows) > limit
+            rows = rows[:limit]
+            if backward:
+                rows.reverse()
+            return rows, more
+
+        position = f"{cursor[0].isoformat()}:{cursor[1]}" if cursor is not None else ""
+        return await self._cached(
+            f"surveys:{user_id}:{limit}:{position}:{int(backward)}", [user_surveys_tag(user_id)], load
         )
-        return result.scalars().all()
 
     async def delete_response(self, response_id: int, user_id: int) -> bool:
         result = await self.session.execute(
@@ -58,12 +108,51 @@ class SurveyResponseRepo:
             )
             .returning(SurveyResponse.id)
         )
-        await self.session.commit()
-        return bool(result.scalar())
+        deleted = bool(result.scalar())
+        if deleted:
+            # survey_response_scores has no foreign key to the partitioned table to cascade
+            await self.session.execute(delete(SurveyResponseScore).where(SurveyResponseScore.response_id == response_id))
+            mark_stale(self.session, user_surveys_tag(user_id), survey_tag(response_id))
+        await commit(self.session)
+        return deleted
     
-    async def get_by_id(self, response_id: int) -> SurveyResponse | None:
+    async def get_by_id(self, response_id: int, user_id: int | None = None) -> SurveyResponse | None:
+        """
+        The response, a detached copy if it comes from the query cache. With the ``user_id`` it is expected to
+        belong to, a response the user has just submitted is read from the primary, not a lagging replica.
+        """
+        tags = [survey_tag(response_id)] + ([user_surveys_tag(user_id)] if user_id is not None else [])
+
+        async def load() -> SurveyResponse | None:
+            result = await self.session.execute(
+                on_replica(select(SurveyResponse).where(SurveyResponse.id == response_id), *tags)
+            )
+            return result.scalar_one_or_none()
+
+        return await self._cached(f"survey:{response_id}", [survey_tag(response_id)], load)
+
+    async def get_chunk_after(self, after_id: int, limit: int, *columns: str) -> Sequence[Row]:
+        """Keyset page of ``id`` and ``columns`` of responses with ``id > after_id``, ordered by id"""
         result = await self.session.execute(
-            select(SurveyResponse)
-            .where(SurveyResponse.id == response_id)
+            on_replica(
+                select(SurveyResponse.id, *[getattr(SurveyResponse, i) for i in columns])
+                .where(SurveyResponse.id > after_id)
+                .order_by(SurveyResponse.id)
+                .limit(limit)
+            )
+        )
+        return result.all()
+
+    async def update_predictions(self, predictions: Sequence[dict]) -> None:
+        """Bulk UPDATE by id, every item holds ``id`` and the columns to set"""
+        if not predictions:
+            return
+
+        # Not an ORM bulk UPDATE by primary key, the table key also includes the partition key created_at
+        table = SurveyResponse.__table__
+        await self.session.execute(
+            update(table).where(table.c.id == bindparam("response_id")),
+            [{"response_id": i["id"], **{k: v for k, v in i.items() if k != "id"}} for i in predictions],
         )
-        return result.scalar_one_or_none()
\ No newline at end of file
+        mark_stale(self.session, *(survey_tag(i["id"]) for i in predictions))
+        await commit(self.session)
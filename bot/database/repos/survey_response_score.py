@@ -0,0 +1,45 @@
+from typing import Sequence
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import mysql, postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.database.models.survey_response_score_models import SurveyResponseScore
+from bot.database.repos.base import commit
+
+
+class SurveyResponseScoreRepo:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_last_scored_id(self, model_version: str) -> int:
+        result = await self.session.execute(
+            select(func.max(SurveyResponseScore.response_id))
+            .where(SurveyResponseScore.model_version == model_version)
+        )
+        return result.scalar() or 0
+
+    async def save_scores(self, model_version: str, response_ids: Sequence[int], probabilities: Sequence[float]) -> None:
+        """Inserts or overwrites probabilities of ``model_version`` with one multi-row statement"""
+        values = [
+            {"response_id": int(response_id), "model_version": model_version, "probability": float(probability)}
+            for response_id, probability in zip(response_ids, probabilities)
+        ]
+        if not values:
+            return
+
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(SurveyResponseScore).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[SurveyResponseScore.response_id, SurveyResponseScore.model_version],
+                set_={"probability": stmt.excluded.probability},
+            )
+        elif dialect == "mysql":
+            stmt = mysql.insert(SurveyResponseScore).values(values)
+            stmt = stmt.on_duplicate_key_update(probability=stmt.inserted.probability)
+        else:
+            stmt = insert(SurveyResponseScore).values(values)
+
+        await self.session.execute(stmt)
+        await commit(self.session)
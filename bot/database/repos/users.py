@@ -5,15 +5,21 @@ import logging
 from bot.filters import IsAdmin
 from aiogram.types import User as AiogramUser
 from sqlalchemy import select
+from sqlalchemy.dialects import mysql, postgresql
 from sqlalchemy.orm import selectinload
 from bot.settings import settings
 
-from .base import BaseRepo
+from .base import BaseRepo, commit, on_replica
 from bot.database.models import User
 
 logger = logging.getLogger(__name__)
 
 
+def normalize_username(user: AiogramUser) -> str:
+    """Username stored for ``user``: lowercase, so lookups by @username ignore case, or the id if it has none"""
+    return user.username.lower() if user.username else str(user.id)
+
+
 class UsersRepo(BaseRepo):
     model = User
 
@@ -24,19 +30,18 @@ class UsersRepo(BaseRepo):
             
             if existing_user:
                 # Обновляем поля, включая is_admin (на случай, если статус админа изменился)
-                existing_user.username = user.username or str(user.id)
+                existing_user.username = normalize_username(user)
                 existing_user.is_admin = user.id in settings.admins
-                await self.session.commit()
+                await commit(self.session)
                 logger.info(f"User updated: {existing_user}")
                 return existing_user
             else:
                 # Создаем нового пользователя
                 new_user = await self.create(
                     id=user.id,
-                    username=user.username or str(user.id),
+                    username=normalize_username(user),
                     is_admin=user.id in settings.admins,
                 )
-                await self.session.commit()
                 logger.info(f"User created: {new_user}")
                 return new_user
         except Exception as e:
@@ -44,12 +49,46 @@ class UsersRepo(BaseRepo):
             logger.error(f"Error creating/updating user: {e}")
             raise
 
+    async def upsert_from_aiogram_model(self, user: AiogramUser) -> User:
+        """
+        Inserts the user or updates its username and admin status in one statement, without committing.
+
+        Concurrent updates of a new user can not insert it twice.
+        """
+        values = {
+            "id": user.id,
+            "username": normalize_username(user),
+            "is_admin": user.id in settings.admins,
+        }
+
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(User).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.id],
+                set_={"username": stmt.excluded.username, "is_admin": stmt.excluded.is_admin},
+            )
+            result = await self.session.scalars(stmt.returning(User), execution_options={"populate_existing": True})
+            return result.one()
+
+        if dialect == "mysql":
+            stmt = mysql.insert(User).values(values)
+            stmt = stmt.on_duplicate_key_update(username=stmt.inserted.username, is_admin=stmt.inserted.is_admin)
+            await self.session.execute(stmt)
+            return await self.session.get(User, user.id, populate_existing=True)
+
+        return await self.create_from_aiogram_model(user)
+
     async def get_by_user_id(self, user_id: int, *user_options) -> User | None:
         q = select(User).where(User.id == user_id).options(*[selectinload(i) for i in user_options])
 
         return (await self.session.execute(q)).scalar()
 
+    async def get_with_history(self, user_id: int) -> User | None:
+        """User with all of its survey responses loaded"""
+        return await self.get_by_user_id(user_id, User.survey_responses)
+
     async def get_users_by_username(self, username: str) -> Sequence[User]:
-        q = select(User).where(User.username == username)
+        q = on_replica(select(User).where(User.username == username))
 
         return (await self.session.execute(q)).scalars().all()
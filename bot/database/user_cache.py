@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from cachetools import TTLCache
+from sqlalchemy.orm import make_transient_to_detached
+
+from bot.database.models import User
+from bot.settings import settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class UserSnapshot(NamedTuple):
+    id: int
+    username: str
+    is_admin: bool
+
+    @classmethod
+    def of(cls, user: User) -> UserSnapshot:
+        return cls(user.id, user.username, user.is_admin)
+
+    def encode(self) -> str:
+        return f"{int(self.is_admin)}{self.username}"
+
+    @classmethod
+    def decode(cls, user_id: int, value: bytes | str) -> UserSnapshot:
+        value = value.decode() if isinstance(value, bytes) else value
+        return cls(user_id, value[1:], value[0] == "1")
+
+    def attach(self, session: AsyncSession) -> User:
+        """Adds the user to ``session`` as if it was loaded, without a query"""
+        user = User(id=self.id, username=self.username, is_admin=self.is_admin)
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+
+class UserCache:
+    """
+    Snapshots of users by Telegram id, so ``GetUser`` does not query the user on every update.
+
+    The in-process TTL cache is checked first, then the optional Redis tier shared by all bot workers.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: int = 600, redis: Redis | None = None, prefix: str = "user") -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+
+        self._local: TTLCache[int, UserSnapshot] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, user_id: int) -> UserSnapshot | None:
+        snapshot = self._local.get(user_id)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(f"{self.prefix}:{user_id}")
+            except Exception as e:
+                logger.debug("Redis user cache is unavailable: %s", e)
+                value = None
+
+            if value is not None:
+                snapshot = UserSnapshot.decode(user_id, value)
+                self._local[user_id] = snapshot
+                self.redis_hits += 1
+                return snapshot
+
+        self.misses += 1
+        return None
+
+    async def set(self, snapshot: UserSnapshot) -> None:
+        if self._local.get(snapshot.id) == snapshot:
+            return
+        self._local[snapshot.id] = snapshot
+
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.set(f"{self.prefix}:{snapshot.id}", snapshot.encode(), ex=self.ttl)
+        except Exception as e:
+            logger.debug("Redis user cache is unavailable: %s", e)
+
+    async def delete(self, user_id: int) -> None:
+        self._local.pop(user_id, None)
+
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.delete(f"{self.prefix}:{user_id}")
+        except Exception as e:
+            logger.debug("Redis user cache is unavailable: %s", e)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups * 100, 1) if lookups else 0.0,
+            "size": len(self._local),
+        }
+
+
+user_cache = UserCache(
+    maxsize=settings.db.user_cache_size,
+    ttl=settings.db.user_cache_ttl,
+    redis=settings.redis.get_redis() if settings.redis.use and settings.db.user_cache_redis else None,
+)
@@ -0,0 +1,63 @@
+from enum import Enum
+
+# Answers are stored as the position of the member in its enum, new members go to the end
+
+
+class Gender(str, Enum):
+    MALE = "Male"
+    FEMALE = "Female"
+
+
+class Course(str, Enum):
+    ENGINEERING = "Engineering"
+    BUSINESS = "Business"
+
+
+class Quality(str, Enum):
+    POOR = "Poor"
+    AVERAGE = "Average"
+    GOOD = "Good"
+
+
+class ActivityLevel(str, Enum):
+    LOW = "Low"
+    MEDIUM = "Medium"
+    HIGH = "High"
+
+
+class SocialSupport(str, Enum):
+    WEAK = "Weak"
+    MODERATE = "Moderate"
+    STRONG = "Strong"
+
+
+class RelationshipStatus(str, Enum):
+    SINGLE = "Single"
+    IN_RELATIONSHIP = "InaRelationship"
+    MARRIED = "Married"
+
+
+class Involvement(str, Enum):
+    LOW = "Low"
+    MODERATE = "Moderate"
+    HIGH = "High"
+
+
+class ResidenceType(str, Enum):
+    YES = "Yes"
+    NO = "No"
+    WITH_FAMILY = "WithFamily"
+
+
+class YesNo(str, Enum):
+    NO = "No"
+    YES = "Yes"
+
+
+class RiskBand(str, Enum):
+    LOW = "Low"
+    HIGH = "High"
+
+    @classmethod
+    def from_probability(cls, probability: float, threshold: float) -> "RiskBand":
+        return cls.HIGH if probability >= threshold else cls.LOW
@@ -1,3 +1,4 @@
+import html
 import logging
 
 from aiogram import Router, types
@@ -5,6 +6,7 @@ from aiogram.filters import Command
 
 from bot.filters import IsAdmin
 from bot.messages import BOT_INFO
+from bot.ml.service import model_registry
 from bot.utils.misc import bot_info_dict
 
 router = Router()
@@ -18,3 +20,25 @@ router.callback_query.filter(IsAdmin())
 async def bot_info(message: types.Message) -> None:
     text = BOT_INFO.format(**await bot_info_dict())
     await message.answer(text=text)
+
+
+@router.message(Command("reload_model"))
+async def reload_model(message: types.Message) -> None:
+    try:
+        model = await model_registry.reload()
+    except Exception as e:
+        logger.error("Failed to reload ML model: %s", e)
+        await message.answer(f"⚠️ Не удалось загрузить модель: <code>{html.escape(str(e))}</code>")
+        return
+
+    await message.answer(f"✅ Активна модель <code>{model.version}</code>")
+
+
+@router.message(Command("rollback_model"))
+async def rollback_model(message: types.Message) -> None:
+    model = model_registry.rollback()
+    if model is None:
+        await message.answer("⚠️ Нет предыдущей версии модели")
+        return
+
+    await message.answer(f"↩️ Активна модель <code>{model.version}</code>")
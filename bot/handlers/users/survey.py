@@ -7,10 +7,16 @@ from aiogram.fsm.state import StatesGroup, State
 from bot.database.engine import Repositories
 from bot.database.models import User
 from bot.keyboards.inline import build_initial_survey_keyboard
+from bot.utils.callback_factory.callback_factory import SurveyPage
 
 router = Router(name=__name__)
 logger = logging.getLogger()
 
+SURVEYS_PAGE_SIZE = 10
+
+# Шаги опроса пишут ответы только в FSM, сессия БД и пользователь им не нужны
+FSM_ONLY = {"repo": False, "user": False}
+
 
 class SurveyStates(StatesGroup):
     waiting_for_age = State()
@@ -43,7 +49,16 @@ def build_keyboard(options, one_time=True):
     return builder.as_markup(resize_keyboard=True, one_time_keyboard=one_time)
 
 
-@router.message(Command("survey"))
+async def ask_next(message: types.Message, state: FSMContext, ask):
+    # Остальные ответы уже не изменят результат, сразу переходим к оценке бота
+    if await survey_decided(await state.get_data()):
+        await message.answer("✅ Этих ответов достаточно для анализа, остальные вопросы пропущены")
+        await ask_bot_rating(message, state)
+        return
+    await ask(message, state)
+
+
+@router.message(Command("survey"), flags=FSM_ONLY)
 async def start_survey(message: types.Message, state: FSMContext):
     await message.answer(
         "Вы хотите пройти опрос самостоятельно или сгенерировать случайные ответы для теста?",
@@ -58,7 +73,7 @@ async def ask_age(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_age)
 
 
-@router.message(SurveyStates.waiting_for_age)
+@router.message(SurveyStates.waiting_for_age, flags=FSM_ONLY)
 async def process_age(message: types.Message, state: FSMContext):
     valid_ages = ["18–20", "21–23", "24–26", "27–29", "30+"]
     if message.text not in valid_ages:
@@ -66,7 +81,7 @@ async def process_age(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Age=message.text)
-    await ask_gender(message, state)
+    await ask_next(message, state, ask_gender)
 
 
 async def ask_gender(message: types.Message, state: FSMContext):
@@ -78,7 +93,7 @@ async def ask_gender(message: types.Message, state: FSMContext):
 def convert_sex(sex: str):
     return "Male" if sex == "Мужчина" else "Female"
 
-@router.message(SurveyStates.waiting_for_gender)
+@router.message(SurveyStates.waiting_for_gender, flags=FSM_ONLY)
 async def process_gender(message: types.Message, state: FSMContext):
     valid_genders = ["Мужской", "Женский"]
     if message.text not in valid_genders:
@@ -86,7 +101,7 @@ async def process_gender(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Gender=convert_sex(message.text))
-    await ask_gpa(message, state)
+    await ask_next(message, state, ask_gpa)
 
 
 async def ask_gpa(message: types.Message, state: FSMContext):
@@ -95,7 +110,7 @@ async def ask_gpa(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_gpa)
 
 
-@router.message(SurveyStates.waiting_for_gpa)
+@router.message(SurveyStates.waiting_for_gpa, flags=FSM_ONLY)
 async def process_gpa(message: types.Message, state: FSMContext):
     valid_gpas = ["0", "1", "2", "3", "4", "5"]
     if message.text not in valid_gpas:
@@ -103,7 +118,7 @@ async def process_gpa(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(CGPA=message.text)
-    await ask_relationship_status(message, state)
+    await ask_next(message, state, ask_relationship_status)
 
 
 def convert_relationship_status(status: str):
@@ -116,7 +131,7 @@ async def ask_relationship_status(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_relationship_status)
 
 
-@router.message(SurveyStates.waiting_for_relationship_status)
+@router.message(SurveyStates.waiting_for_relationship_status, flags=FSM_ONLY)
 async def process_relationship_status(message: types.Message, state: FSMContext):
     valid_statuses = ["Холост/не замужем", "В отношениях", "Женат/замужем"]
     if message.text not in valid_statuses:
@@ -124,7 +139,7 @@ async def process_relationship_status(message: types.Message, state: FSMContext)
         return
 
     await state.update_data(Relationship_Status=convert_relationship_status(message.text))
-    await ask_dormitory(message, state)
+    await ask_next(message, state, ask_dormitory)
 
 def convert_Residence_Type(status: str):
     mapping = {"Да": "Yes", "Нет": "No", "Живу с семьей": "WithFamily"}
@@ -136,7 +151,7 @@ async def ask_dormitory(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_dormitory)
 
 
-@router.message(SurveyStates.waiting_for_dormitory)
+@router.message(SurveyStates.waiting_for_dormitory, flags=FSM_ONLY)
 async def process_dormitory(message: types.Message, state: FSMContext):
     valid_answers = ["Да", "Нет", "Живу с семьей"]
     if message.text not in valid_answers:
@@ -144,7 +159,7 @@ async def process_dormitory(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Residence_Type=convert_Residence_Type(message.text))
-    await ask_stress_level(message, state)
+    await ask_next(message, state, ask_stress_level)
 
 
 async def ask_stress_level(message: types.Message, state: FSMContext):
@@ -155,14 +170,14 @@ async def ask_stress_level(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_stress_level)
 
 
-@router.message(SurveyStates.waiting_for_stress_level)
+@router.message(SurveyStates.waiting_for_stress_level, flags=FSM_ONLY)
 async def process_stress_level(message: types.Message, state: FSMContext):
     if message.text not in ["1", "2", "3", "4", "5"]:
         await message.answer("Пожалуйста, выберите число от 1 до 5")
         return
 
     await state.update_data(Stress_Level=int(message.text))
-    await ask_financial_stress(message, state)
+    await ask_next(message, state, ask_financial_stress)
 
 
 async def ask_financial_stress(message: types.Message, state: FSMContext):
@@ -173,14 +188,14 @@ async def ask_financial_stress(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_financial_stress)
 
 
-@router.message(SurveyStates.waiting_for_financial_stress)
+@router.message(SurveyStates.waiting_for_financial_stress, flags=FSM_ONLY)
 async def process_financial_stress(message: types.Message, state: FSMContext):
     if message.text not in ["1", "2", "3", "4", "5"]:
         await message.answer("Пожалуйста, выберите число от 1 до 5")
         return
 
     await state.update_data(Financial_Stress=int(message.text))
-    await ask_social_support(message, state)
+    await ask_next(message, state, ask_social_support)
 
 
 async def ask_social_support(message: types.Message, state: FSMContext):
@@ -195,7 +210,7 @@ def convert_social_support(socail_support: str):
     mapping = {"Низкое": "Weak", "Среднее": "Moderate", "Хорошее": "Strong"}
     return mapping[socail_support]
 
-@router.message(SurveyStates.waiting_for_social_support)
+@router.message(SurveyStates.waiting_for_social_support, flags=FSM_ONLY)
 async def process_social_support(message: types.Message, state: FSMContext):
     options = ["Низкое", "Среднее", "Хорошее"]
     if message.text not in options:
@@ -203,7 +218,7 @@ async def process_social_support(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Social_Support=convert_social_support(message.text))
-    await ask_psychologist_help(message, state)
+    await ask_next(message, state, ask_psychologist_help)
 
 
 async def ask_psychologist_help(message: types.Message, state: FSMContext):
@@ -211,7 +226,7 @@ async def ask_psychologist_help(message: types.Message, state: FSMContext):
     await message.answer("Пользуетесь ли вы помощью психолога?", reply_markup=build_keyboard(options))
     await state.set_state(SurveyStates.waiting_for_psychologist_help)
 
-@router.message(F.text.in_(["Пройти опрос"]))
+@router.message(F.text.in_(["Пройти опрос"]), flags=FSM_ONLY)
 async def handle_survey_choice(message: types.Message, state: FSMContext):
     choice = message.text
     if choice == "Пройти опрос":
@@ -219,7 +234,7 @@ async def handle_survey_choice(message: types.Message, state: FSMContext):
 
 
 
-@router.message(SurveyStates.waiting_for_psychologist_help)
+@router.message(SurveyStates.waiting_for_psychologist_help, flags=FSM_ONLY)
 async def process_psychologist_help(message: types.Message, state: FSMContext):
     valid_options = ["Да", "Нет"]
     if message.text not in valid_options:
@@ -227,7 +242,7 @@ async def process_psychologist_help(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Counseling_Service_Use="Yes" if message.text == "Да" else "No")
-    await ask_sleep_hours(message, state)
+    await ask_next(message, state, ask_sleep_hours)
 
 
 async def ask_sleep_hours(message: types.Message, state: FSMContext):
@@ -240,7 +255,7 @@ def convert_sleep_quality(quality: str):
     return mapping[quality]
 
 
-@router.message(SurveyStates.waiting_for_sleep_hours)
+@router.message(SurveyStates.waiting_for_sleep_hours, flags=FSM_ONLY)
 async def process_sleep_hours(message: types.Message, state: FSMContext):
     valid_options = ["Низкое", "Среднее", "Хорошее"]
     if message.text not in valid_options:
@@ -248,7 +263,7 @@ async def process_sleep_hours(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Sleep_Quality=convert_sleep_quality(message.text))
-    await ask_nutrition(message, state)
+    await ask_next(message, state, ask_nutrition)
 
 
 async def ask_nutrition(message: types.Message, state: FSMContext):
@@ -260,7 +275,7 @@ def convert_diet_quality(quality: str):
     mapping = {"Плохо": "Poor", "Средне": "Average", "Хорошо": "Good"}
     return mapping[quality]
 
-@router.message(SurveyStates.waiting_for_nutrition)
+@router.message(SurveyStates.waiting_for_nutrition, flags=FSM_ONLY)
 async def process_nutrition(message: types.Message, state: FSMContext):
     valid_options = ["Плохо", "Средне", "Хорошо"]
     if message.text not in valid_options:
@@ -268,7 +283,7 @@ async def process_nutrition(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Diet_Quality=convert_diet_quality(message.text))
-    await ask_physical_activity(message, state)
+    await ask_next(message, state, ask_physical_activity)
 
 
 # TODO LOW MEDIUM HIGH
@@ -285,7 +300,7 @@ def convert_physical_activity(activity: str):
     }
     return mapping[activity]
 
-@router.message(SurveyStates.waiting_for_physical_activity)
+@router.message(SurveyStates.waiting_for_physical_activity, flags=FSM_ONLY)
 async def process_physical_activity(message: types.Message, state: FSMContext):
     valid_options = ["Высокий", "Средний", "Низкий"]
     if message.text not in valid_options:
@@ -293,7 +308,7 @@ async def process_physical_activity(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Physical_Activity=convert_physical_activity(message.text))
-    await ask_anxiety_signs(message, state)
+    await ask_next(message, state, ask_anxiety_signs)
 
 
 async def ask_anxiety_signs(message: types.Message, state: FSMContext):
@@ -302,7 +317,7 @@ async def ask_anxiety_signs(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_anxiety_signs)
 
 
-@router.message(SurveyStates.waiting_for_anxiety_signs)
+@router.message(SurveyStates.waiting_for_anxiety_signs, flags=FSM_ONLY)
 async def process_anxiety_signs(message: types.Message, state: FSMContext):
     valid_options = ["0", "1", "2", "3", "4", "5"]
     if message.text not in valid_options:
@@ -310,7 +325,7 @@ async def process_anxiety_signs(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Anxiety_Score=int(message.text))
-    await ask_substance_use(message, state)
+    await ask_next(message, state, ask_substance_use)
 
 
 async def ask_substance_use(message: types.Message, state: FSMContext):
@@ -319,7 +334,7 @@ async def ask_substance_use(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_substance_use)
 
 # TODO 
-@router.message(SurveyStates.waiting_for_substance_use)
+@router.message(SurveyStates.waiting_for_substance_use, flags=FSM_ONLY)
 async def process_substance_use(message: types.Message, state: FSMContext):
     valid_options = ["Да", "Нет"]
     if message.text not in valid_options:
@@ -327,7 +342,7 @@ async def process_substance_use(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Substance_Use="Yes" if message.text == "Да" else "No")
-    await ask_chronic_diseases(message, state)
+    await ask_next(message, state, ask_chronic_diseases)
 
 
 async def ask_chronic_diseases(message: types.Message, state: FSMContext):
@@ -336,7 +351,7 @@ async def ask_chronic_diseases(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_chronic_diseases)
 
 
-@router.message(SurveyStates.waiting_for_chronic_diseases)
+@router.message(SurveyStates.waiting_for_chronic_diseases, flags=FSM_ONLY)
 async def process_chronic_diseases(message: types.Message, state: FSMContext):
     valid_options = ["Да", "Нет"]
     if message.text not in valid_options:
@@ -344,7 +359,7 @@ async def process_chronic_diseases(message: types.Message, state: FSMContext):
         return
 
     await state.update_data(Chronic_Illness="Yes" if message.text == "Да" else "No")
-    await ask_family_mental_illness(message, state)
+    await ask_next(message, state, ask_family_mental_illness)
 
 
 async def ask_family_mental_illness(message: types.Message, state: FSMContext):
@@ -378,74 +393,12 @@ async def ask_bot_rating(message: types.Message, state: FSMContext):
     await state.set_state(SurveyStates.waiting_for_bot_rating)
 
 
-import pandas as pd
-import joblib
-from sklearn.preprocessing import LabelEncoder
-
-try:
-    depression_model = joblib.load("model/depression_model3.pkl")
-except Exception as e:
-    logger.error(f"Failed to load ML model: {e}")
-    depression_model = None
-
-
-def age_mapping(age: int):
-    mapping = {"18–20": 19, "21–23": 22, "24–26": 25, "27–29": 28, "30+": 30}
-    return mapping.get(age, 25)
-
-def prepare_features(data: dict) -> pd.DataFrame:
-    """Преобразует ответы анкеты в признаки, которые ожидает модель"""
-
-    features = {
-        "Age": age_mapping(data["Age"]),
-        "Gender": data['Gender'],
-        "Course": "Engineering",
-        "CGPA": convert_gpa(data["CGPA"]),
-        "Stress_Level": data["Stress_Level"],
-        "Anxiety_Score": data["Anxiety_Score"],
-        "Sleep_Quality": data["Sleep_Quality"],
-        "Physical_Activity": data["Physical_Activity"],
-        "Diet_Quality": data["Diet_Quality"],
-        "Social_Support": data["Social_Support"],
-        "Relationship_Status": data["Relationship_Status"],
-        "Substance_Use": data["Substance_Use"],
-        "Counseling_Service_Use": data["Counseling_Service_Use"],
-        "Family_History": data["Family_History"],
-        "Chronic_Illness": data["Chronic_Illness"],
-        "Financial_Stress": data["Financial_Stress"],
-        "Extracurricular_Involvement": 2,
-        "Semester_Credit_Load": 22,
-        "Residence_Type": data["Residence_Type"],
-        'Counseling_Service_Use_Level': None, 
-        'Diet_Quality_Level': None, 
-        'Family_History_Bool': None, 
-        'Gender_Bool': None, 
-        'Substance_Use_Level': None,
-        'Social_Support_Level': None,
-        'Extracurricular_Involvement_Level': None, 
-        'Physical_Activity_Level': None, 
-        'Sleep_Quality_Level': None, 
-        'Chronic_Illness_Bool': None,
-    }
-
-    if hasattr(depression_model["model"], "feature_names_in_"):
-        print("Ожидаемые признаки:", depression_model["model"].feature_names_in_)
-        print("Их количество:", len(depression_model["model"].feature_names_in_))
-    df = pd.DataFrame([features])
-    return df
-
-
-def convert_gpa(gpa_str):
-    if gpa_str == "< 2.0":
-        return 1.0
-    elif gpa_str == "2.0–2.5":
-        return 2.25
-    elif gpa_str == "2.6–3.0":
-        return 2.8
-    elif gpa_str == "3.1–3.5":
-        return 3.3
-    else:
-        return 3.8
+from bot.database.bulk_writer import log_failure, survey_writer
+from bot.enums.survey import RiskBand
+from bot.ml.adaptive import is_complete
+from bot.ml.features import age_mapping, convert_gpa
+from bot.ml.service import model_registry, predict, predict_decided, survey_decided
+from bot.settings import settings
 
 import os
 import random
@@ -462,30 +415,51 @@ async def process_bot_rating(message: types.Message, state: FSMContext, repo: Re
 
     converted_data = {
         "user_id": user.id,
-        "age": age_mapping(data["Age"]),
-        "gender": data['Gender'],
+        "age": age_mapping(data["Age"]) if data.get("Age") else None,
+        "gender": data.get("Gender"),
         "course": "Business",
-        "gpa": convert_gpa(data["CGPA"]),
-        "stress_level": data["Stress_Level"],
-        "anxiety_score": data["Anxiety_Score"],
-        "sleep_quality": data["Sleep_Quality"],
-        "physical_activity": data["Physical_Activity"],
-        "diet_quality": data["Diet_Quality"],
-        "social_support": data["Social_Support"],
-        "relationship_status": data["Relationship_Status"],
-        "substance_use": data["Substance_Use"],
-        "counseling_service_use": data["Counseling_Service_Use"],
-        "family_history": data["Family_History"],
-        "chronic_illness": data["Chronic_Illness"],
-        "financial_stress": data["Financial_Stress"],
+        "gpa": convert_gpa(data["CGPA"]) if data.get("CGPA") else None,
+        "stress_level": data.get("Stress_Level"),
+        "anxiety_score": data.get("Anxiety_Score"),
+        "sleep_quality": data.get("Sleep_Quality"),
+        "physical_activity": data.get("Physical_Activity"),
+        "diet_quality": data.get("Diet_Quality"),
+        "social_support": data.get("Social_Support"),
+        "relationship_status": data.get("Relationship_Status"),
+        "substance_use": data.get("Substance_Use"),
+        "counseling_service_use": data.get("Counseling_Service_Use"),
+        "family_history": data.get("Family_History"),
+        "chronic_illness": data.get("Chronic_Illness"),
+        "financial_stress": data.get("Financial_Stress"),
         "extracurricular_involvement": "Moderate",
         "semester_credit_load": 17,
-        "residence_type": data["Residence_Type"],
+        "residence_type": data.get("Residence_Type"),
         "bot_rating": data["bot_rating"],
     }
 
-    survey = await repo.survey_responses.create(**converted_data)
-    await repo.session.commit()
+    prediction_text = ""
+    try:
+        if is_complete(data):
+            prediction = await predict(data, settings.ml.ready_timeout)
+        else:
+            # Опрос остановлен досрочно: известен уровень риска и границы вероятности, но не она сама
+            prediction = await predict_decided(data, settings.ml.ready_timeout)
+    except Exception as e:
+        logger.error(f"Prediction failed: {e}")
+        prediction = None
+        prediction_text = "\n⚠️ <b>Не удалось проанализировать результаты</b>"
+
+    if prediction:
+        converted_data["probability"] = prediction.probability
+        converted_data["risk_band"] = prediction.risk_band.value
+        converted_data["model_version"] = prediction.model_version
+
+    if survey_writer is not None:
+        # Ответ вставится вместе с другими, id анкеты здесь не нужен, но ошибку записи нужно залогировать
+        survey_writer.add(converted_data).add_done_callback(log_failure)
+    else:
+        await repo.survey_responses.create(**converted_data)
+        await repo.commit()
 
     # Получаем случайное изображение
     images_dir = "bot/images"  # Папка с картинками для результатов
@@ -496,15 +470,15 @@ async def process_bot_rating(message: types.Message, state: FSMContext, repo: Re
         logger.error(f"Error loading images: {e}")
         random_image = None
 
-    prediction_text = ""
-    if depression_model:
+    if prediction:
         try:
-            new_df = prepare_features(data)
-            proba_arr = depression_model["model"].predict_proba(new_df)
-            proba = proba_arr[:, 1][0]
-            pred = int(proba >= depression_model["threshold"])
-            
-            if proba >= 0.41:
+            if prediction.probability is not None:
+                probability_text = f"Вероятность: {prediction.probability:.1%}"
+            else:
+                low, high = prediction.bounds
+                probability_text = f"Вероятность: от {low:.1%} до {high:.1%}"
+
+            if prediction.risk_band is RiskBand.HIGH:
                 prediction_text = """
 🔴 <b>Высокий уровень тревожности</b>
 
@@ -539,12 +513,14 @@ async def process_bot_rating(message: types.Message, state: FSMContext, repo: Re
 Продолжай в том же духе! 💫
                 """
 
-            prediction_text = f"\n🔍 <b>Результат анализа:</b>\nВероятность: {proba:.1%}\n{prediction_text}"
+            prediction_text = f"\n🔍 <b>Результат анализа:</b>\n{probability_text}\n{prediction_text}"
 
         except Exception as e:
             logger.error(f"Prediction failed: {e}")
             prediction_text = "\n⚠️ <b>Не удалось проанализировать результаты</b>"
-    else:
+    elif not prediction_text and model_registry.is_loading:
+        prediction_text = "\n⏳ <b>Анализ ещё выполняется</b>, модель загружается. Пройдите опрос позже"
+    elif not prediction_text:
         prediction_text = "\n⚠️ <b>Сервис анализа временно недоступен</b>"
 
     # Отправляем сообщение с картинкой или без
@@ -575,8 +551,13 @@ async def process_bot_rating(message: types.Message, state: FSMContext, repo: Re
 
 
 @router.message(Command("my_surveys"))
-async def show_my_surveys(message: types.Message, user: User, repo: Repositories):
-    responses = await repo.survey_responses.get_user_responses(user.id)
+async def show_my_surveys(message: types.Message, user: User, repo: Repositories, page: SurveyPage | None = None):
+    edit, page = page is not None, page or SurveyPage()
+    responses, more = await repo.survey_responses.page_by_user(user.id, SURVEYS_PAGE_SIZE, page.cursor, page.backward)
+    if not responses and page.cursor is not None:
+        # Страница опустела (анкеты удалены), начинаем с самых новых
+        page = SurveyPage()
+        responses, more = await repo.survey_responses.page_by_user(user.id, SURVEYS_PAGE_SIZE)
 
     if not responses:
         await message.answer("У вас нет сохраненных анкет.")
@@ -587,13 +568,42 @@ async def show_my_surveys(message: types.Message, user: User, repo: Repositories
         date = response.created_at.strftime("%d.%m.%Y %H:%M")
         builder.row(types.InlineKeyboardButton(text=f"Анкета от {date}", callback_data=f"view_survey_{response.id}"))
 
-    await message.answer("Ваши сохраненные анкеты:", reply_markup=builder.as_markup())
+    has_newer = more if page.backward else page.cursor is not None
+    has_older = True if page.backward else more
+    navigation = []
+    if has_newer:
+        first = responses[0]
+        navigation.append(
+            types.InlineKeyboardButton(
+                text="⬅️ Новее", callback_data=SurveyPage.after((first.created_at, first.id), backward=True).pack()
+            )
+        )
+    if has_older:
+        last = responses[-1]
+        navigation.append(
+            types.InlineKeyboardButton(
+                text="Старее ➡️", callback_data=SurveyPage.after((last.created_at, last.id)).pack()
+            )
+        )
+    if navigation:
+        builder.row(*navigation)
+
+    if edit:
+        await message.edit_text("Ваши сохраненные анкеты:", reply_markup=builder.as_markup())
+    else:
+        await message.answer("Ваши сохраненные анкеты:", reply_markup=builder.as_markup())
+
+
+@router.callback_query(SurveyPage.filter())
+async def show_surveys_page(callback: types.CallbackQuery, callback_data: SurveyPage, user: User, repo: Repositories):
+    await show_my_surveys(callback.message, user, repo, callback_data)
+    await callback.answer()
 
 
 @router.callback_query(F.data.startswith("view_survey_"))
 async def view_survey(callback: types.CallbackQuery, user: User, repo: Repositories):
     survey_id = int(callback.data.split("_")[-1])
-    response = await repo.survey_responses.get_by_id(survey_id)
+    response = await repo.survey_responses.get_by_id(survey_id, user.id)
 
     if not response or response.user_id != user.id:
         await callback.answer("⚠️ Анкета не найдена", show_alert=True)
@@ -605,24 +615,36 @@ async def view_survey(callback: types.CallbackQuery, user: User, repo: Repositor
     diet_map = {"Good": "Хорошее", "Average": "Среднее", "Poor": "Плохое"}
     sleep_map = {"Good": "Хорошее", "Average": "Среднее", "Poor": "Плохое"}
     support_map = {"Strong": "Сильная", "Moderate": "Средняя", "Weak": "Слабая"}
+    risk_map = {"High": "🔴 Высокий уровень тревожности", "Low": "🟢 Низкий уровень тревожности"}
+
+    def shown(value, mapping=None, fmt="{}"):
+        # Вопросы, пропущенные адаптивным опросом, хранятся как NULL
+        if value is None:
+            return "пропущен"
+        return fmt.format(mapping.get(value, value) if mapping else value)
 
     text = (
         f"📅 <b>Дата заполнения:</b> {response.created_at.strftime('%d.%m.%Y %H:%M')}\n"
-        f"👤 <b>Возраст:</b> {response.age}\n"
-        f"🚻 <b>Пол:</b> {gender_map.get(response.gender, response.gender)}\n"
-        f"🎓 <b>Успеваемость (GPA):</b> {response.gpa:.1f}\n"
-        f"💍 <b>Семейное положение:</b> {response.relationship_status}\n"
-        f"🏠 <b>Проживание:</b> {residence_map.get(response.residence_type, response.residence_type)}\n\n"
-        f"😔 <b>Уровень стресса:</b> {response.stress_level}/5\n"
-        f"💰 <b>Финансовый стресс:</b> {response.financial_stress}/5\n"
-        f"👥 <b>Социальная поддержка:</b> {support_map.get(response.social_support, response.social_support)}\n"
-        f"🛌 <b>Качество сна:</b> {sleep_map.get(response.sleep_quality, response.sleep_quality)}\n"
-        f"🏃 <b>Физическая активность:</b> {activity_map.get(response.physical_activity, response.physical_activity)}\n"
-        f"🍎 <b>Качество питания:</b> {diet_map.get(response.diet_quality, response.diet_quality)}\n"
-        f"😟 <b>Уровень тревожности:</b> {response.anxiety_score}/5\n\n"
+        f"👤 <b>Возраст:</b> {shown(response.age)}\n"
+        f"🚻 <b>Пол:</b> {shown(response.gender, gender_map)}\n"
+        f"🎓 <b>Успеваемость (GPA):</b> {shown(response.gpa, fmt='{:.1f}')}\n"
+        f"💍 <b>Семейное положение:</b> {shown(response.relationship_status)}\n"
+        f"🏠 <b>Проживание:</b> {shown(response.residence_type, residence_map)}\n\n"
+        f"😔 <b>Уровень стресса:</b> {shown(response.stress_level, fmt='{}/5')}\n"
+        f"💰 <b>Финансовый стресс:</b> {shown(response.financial_stress, fmt='{}/5')}\n"
+        f"👥 <b>Социальная поддержка:</b> {shown(response.social_support, support_map)}\n"
+        f"🛌 <b>Качество сна:</b> {shown(response.sleep_quality, sleep_map)}\n"
+        f"🏃 <b>Физическая активность:</b> {shown(response.physical_activity, activity_map)}\n"
+        f"🍎 <b>Качество питания:</b> {shown(response.diet_quality, diet_map)}\n"
+        f"😟 <b>Уровень тревожности:</b> {shown(response.anxiety_score, fmt='{}/5')}\n\n"
         f"⭐ <b>Оценка бота:</b> {'★' * response.bot_rating}{'☆' * (5 - response.bot_rating)}"
     )
 
+    if response.risk_band is not None:
+        text += f"\n\n🔍 <b>Результат анализа:</b> {risk_map.get(response.risk_band, response.risk_band)}"
+    if response.probability is not None:
+        text += f"\nВероятность: {response.probability:.1%}"
+
     builder = InlineKeyboardBuilder()
     builder.row(
         types.InlineKeyboardButton(
@@ -11,4 +11,36 @@ BOT_INFO = (
     "💻 <b>Arch: {arch} </b> \n"
     "💿 <b>OS: {os} </b> \n\n"
     "👥 <b>All users in db: {users_in_db}</b> \n"
+    "👤 <b>User cache: {user_cache_hits} hits, {user_cache_redis_hits} from Redis, {user_cache_misses} misses "
+    "({user_cache_hit_ratio}%) </b> \n"
+    "{db_query_cache}"
+    "{db_pool}"
+    "{db_replica}\n"
+    "🧠 Model: \n\n"
+    "{model_versions}\n"
+    "{process_memory}\n"
+    "🗃 <b>Prediction cache: {cache_hits} hits, {cache_redis_hits} from Redis, {cache_misses} misses "
+    "({cache_hit_ratio}%) </b> \n"
 )
+
+MODEL_VERSION_INFO = (
+    "{marker} <b><code>{version}</code></b> (loaded {loaded_at}): "
+    "{calls} calls, {rows} rows, {avg_latency_ms} ms avg, {surrogate_hits} by surrogate \n"
+)
+
+PROCESS_MEMORY_INFO = (
+    "🧩 <b>{name}</b> <code>{pid}</code>: {unique} MB unique, {shared} MB shared, {pss} MB proportional \n"
+)
+
+DB_POOL_INFO = (
+    "🔌 <b>DB pool: {in_use} in use (peak {peak_in_use}), {idle} idle, {overflow} overflow, "
+    "size {size}+{max_overflow}</b> \n"
+    "⏱ <b>Checkout: {checkouts} total, {avg_wait_ms} ms avg, {max_wait_ms} ms max, {timeouts} timeouts</b> \n"
+)
+
+DB_QUERY_CACHE_INFO = (
+    "📚 <b>Survey cache: {hits} hits, {redis_hits} from Redis, {misses} misses ({hit_ratio}%), "
+    "{size} entries, {kb} KB, {invalidations} invalidations</b> \n"
+)
+
+DB_REPLICA_INFO = "🪞 <b>Read replica: {state}, lag {lag} s</b> \n"
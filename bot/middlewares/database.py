@@ -6,7 +6,9 @@ from bot.settings import settings
 from aiogram import BaseMiddleware, Dispatcher
 from aiogram.dispatcher.flags import get_flag
 
-from bot.database import get_repo
+from bot.database import LazyRepositories
+from bot.database.repos.users import normalize_username
+from bot.database.user_cache import UserSnapshot, user_cache
 
 if TYPE_CHECKING:
     from aiogram.types import TelegramObject
@@ -28,13 +30,22 @@ class GetRepo(BaseMiddleware):
     ) -> Any:
         us = data["event_from_user"]
 
-        if us.first_name in IGNORED_NAMES:
-            return
-
-        async with get_repo() as repo:
-            data["repo"] = repo
+        # Ignored senders get no session, GetUser drops their updates
+        if us.first_name in IGNORED_NAMES or not get_flag(data, "repo", default=True):
+            data["repo"] = None
+            return await handler(event, data)
 
-            await handler(event, data)
+        unit_of_work = settings.db.unit_of_work
+        repo = LazyRepositories(unit_of_work=unit_of_work)
+        data["repo"] = repo
+        try:
+            result = await handler(event, data)
+            # In unit-of-work mode the whole update is one transaction, an exception rolls it back on close
+            if unit_of_work:
+                await repo.complete()
+            return result
+        finally:
+            await repo.close()
 
 
 class GetUser(BaseMiddleware):
@@ -44,7 +55,7 @@ class GetUser(BaseMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        repo: Repositories = data["repo"]
+        repo: Repositories | None = data["repo"]
         user_: AiogramUser = data["event_from_user"]
 
         if user_.first_name in IGNORED_NAMES:
@@ -52,25 +63,46 @@ class GetUser(BaseMiddleware):
 
         user_flag = get_flag(data, "user", default=True)
 
-        if not user_flag:
+        if not user_flag or repo is None:
             data["user"] = None
             return await handler(event, data)
 
         user_options = get_flag(data, "user_options", default=[])
-        user = await repo.users.get_by_user_id(user_.id, *user_options)
+        username = normalize_username(user_)
+        is_admin = user_.id in settings.admins
+
+        if user_options:
+            # Relationships requested by user_options are not cached, such users are always loaded
+            user = await repo.users.get_by_user_id(user_.id, *user_options)
+        else:
+            snapshot = await user_cache.get(user_.id)
+            user = snapshot.attach(repo.session) if snapshot is not None else None
 
+        written = not user or (user.username, user.is_admin) != (username, is_admin)
         if not user:
-            user = await repo.users.create_from_aiogram_model(user_)
-            logger.info("New user")
+            # Not cached: one INSERT ... ON CONFLICT DO UPDATE RETURNING stores and loads the user, new or not
+            user = await repo.users.upsert_from_aiogram_model(user_)
+            await repo.commit()
         else:
-            user.is_admin = user_.id in settings.admins
-            user.username = user_.username.lower() if user_.username else None
+            # Unchanged attributes are not assigned, so the session stays clean and nothing is written
+            if user.username != username:
+                user.username = username
+            if user.is_admin != is_admin:
+                user.is_admin = is_admin
 
         data["user"] = user
-        await handler(event, data)
+        result = await handler(event, data)
+
+        session = repo.session
+        if session.new or session.dirty or session.deleted:
+            await repo.commit()
 
-        await repo.users.session.commit()
-        return None
+        # A unit of work is committed after this middleware, the written user is cached once it is stored
+        if not (written and settings.db.unit_of_work):
+            await user_cache.set(UserSnapshot.of(user))
+        else:
+            await user_cache.delete(user.id)
+        return result
 
 
 def setup_get_repo_middleware(dp: Dispatcher):
@@ -0,0 +1,3 @@
+from .executor import InferenceExecutor
+
+__all__ = ["InferenceExecutor"]
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Mapping
+
+import numpy as np
+
+from bot.ml.features import ANSWER_OPTIONS, FeatureEncoder
+from bot.ml.registry import LoadedModel
+
+
+def probability_range(model: LoadedModel, answers: Mapping[str, Any], max_rows: int = 4096) -> tuple[float, float] | None:
+    """
+    Lowest and highest probability ``model`` can still return once the unanswered questions are answered.
+
+    Every combination of the remaining options is scored, None is returned if there are more than ``max_rows``.
+    """
+    encoder = model.encoder
+    remaining = [(n, i) for n, i in enumerate(encoder.features) if i.key is not None and answers.get(i.key) is None]
+
+    rows = math.prod(len(i.answers) for _, i in remaining)
+    if rows > max_rows:
+        return None
+
+    matrix = np.repeat(encoder.encode(answers), rows, axis=0)
+    if remaining:
+        grids = np.meshgrid(*[[i.encode(option) for option in i.answers] for _, i in remaining], indexing="ij")
+        for (n, _), grid in zip(remaining, grids):
+            matrix[:, n] = grid.ravel()
+
+    proba = model.score(matrix)
+    return float(proba.min()), float(proba.max())
+
+
+def is_decided(model: LoadedModel, answers: Mapping[str, Any], max_rows: int = 4096) -> bool:
+    """True if no answer to the remaining questions can move the probability across the threshold"""
+    bounds = probability_range(model, answers, max_rows)
+    if bounds is None:
+        return False
+
+    low, high = bounds
+    return low >= model.threshold or high < model.threshold
+
+
+def is_complete(answers: Mapping[str, Any]) -> bool:
+    """True if every question of survey FSM data is answered, False for a survey stopped early"""
+    return all(answers.get(key) is not None for key in ANSWER_OPTIONS)
+
+
+def answered_rows(encoder: FeatureEncoder, matrix: np.ndarray) -> np.ndarray:
+    """Mask of encoded rows with every question answered, the other ones are surveys stopped early"""
+    columns = [n for n, i in enumerate(encoder.features) if i.key is not None]
+    return ~np.isnan(matrix[:, columns]).any(axis=1)
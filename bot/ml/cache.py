@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import TYPE_CHECKING, Any
+
+from cachetools import LRUCache
+
+if TYPE_CHECKING:
+    import numpy as np
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Memoizes model probabilities by encoded survey row and model version.
+
+    The in-process LRU is checked first, then the optional Redis tier shared by all bot workers.
+    Changing the version drops the local entries, Redis entries of other versions are never read.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        redis: Redis | None = None,
+        ttl: int = 86400,
+        prefix: str = "prediction",
+    ) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self.version = ""
+
+        self._local: LRUCache[bytes, float] = LRUCache(maxsize=maxsize)
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def set_version(self, version: str) -> None:
+        if version == self.version:
+            return
+
+        self.version = version
+        self._local.clear()
+        logger.info("Prediction cache switched to model %s", version)
+
+    def _redis_key(self, key: bytes) -> str:
+        return f"{self.prefix}:{self.version}:{hashlib.blake2b(key, digest_size=16).hexdigest()}"
+
+    async def get(self, row: np.ndarray) -> float | None:
+        key = row.tobytes()
+
+        proba = self._local.get(key)
+        if proba is not None:
+            self.hits += 1
+            return proba
+
+        if self.redis is not None:
+            try:
+                value = await self.redis.get(self._redis_key(key))
+            except Exception as e:
+                logger.debug("Redis prediction cache is unavailable: %s", e)
+                value = None
+
+            if value is not None:
+                proba = float(value)
+                self._local[key] = proba
+                self.redis_hits += 1
+                return proba
+
+        self.misses += 1
+        return None
+
+    async def set(self, row: np.ndarray, proba: float) -> None:
+        key = row.tobytes()
+        self._local[key] = proba
+
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.set(self._redis_key(key), repr(proba), ex=self.ttl)
+        except Exception as e:
+            logger.debug("Redis prediction cache is unavailable: %s", e)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.redis_hits) / lookups * 100, 1) if lookups else 0.0,
+            "size": len(self._local),
+        }
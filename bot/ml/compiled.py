@@ -0,0 +1,562 @@
+"""
+Compiles the fitted sklearn pipeline to flat NumPy arrays and scores encoded surveys with them.
+
+Usage:
+    python -m bot.ml.compiled model/depression_model3.pkl [-o model/depression_model3.npz]
+
+The compiled file is written next to the artifact and is picked up by the model registry instead of it,
+so the bot process does not import sklearn/scipy. Compilation is refused if the compiled model does not
+reproduce ``predict_proba`` of the pipeline on random surveys.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from bot.ml.features import Feature, FeatureEncoder, sample_answers
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_CODE = -1.0
+
+
+class CompileError(ValueError):
+    pass
+
+
+@dataclass
+class CompiledModel:
+    """
+    Pure NumPy evaluator of ``ColumnTransformer`` + (linear model | tree ensemble).
+
+    Input is the matrix built by ``FeatureEncoder(columns)``: categorical answers as codes, missing values as NaN.
+    """
+
+    columns: tuple[str, ...]
+    threshold: float
+    source_version: str
+    estimator: str
+    arrays: dict[str, np.ndarray] = field(repr=False)
+
+    def transform(self, matrix: np.ndarray) -> np.ndarray:
+        a = self.arrays
+        out = np.zeros((len(matrix), int(a["n_outputs"])))
+
+        if a["oh_src"].size:
+            x = matrix[:, a["oh_src"]]
+            x = np.where(np.isnan(x), a["oh_fill"], x)
+            code = a["oh_code"]
+            out[:, a["oh_out"]] = (x == code) | (np.isnan(x) & np.isnan(code))
+
+        if a["ord_src"].size:
+            x = matrix[:, a["ord_src"]]
+            x = np.where(np.isnan(x), a["ord_fill"], x)
+            missing = np.isnan(x)
+            index = np.where(missing, 0, x).astype(np.intp)
+            values = a["ord_table"][np.arange(a["ord_src"].size), index]
+            out[:, a["ord_out"]] = np.where(missing, a["ord_missing"], values)
+
+        if a["num_src"].size:
+            x = matrix[:, a["num_src"]]
+            x = np.where(np.isnan(x), a["num_fill"], x)
+            out[:, a["num_out"]] = (x - a["num_offset"]) / a["num_scale"] * a["num_mult"] + a["num_add"]
+
+        if a["const_out"].size:
+            out[:, a["const_out"]] = a["const_value"]
+
+        if a["post_offset"].size:
+            out = (out - a["post_offset"]) / a["post_scale"] * a["post_mult"] + a["post_add"]
+
+        return out
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        """Returns probability of the positive class for every encoded row"""
+        z = self.transform(matrix)
+        a = self.arrays
+
+        if self.estimator == "linear":
+            decision = (z @ a["coef"] + a["intercept"]) * a["decision_scale"]
+            return _expit(decision)
+
+        leaves = self._leaf_values(z)
+        if self.estimator == "forest":
+            return leaves.mean(axis=1)
+
+        return _expit(a["init"] + a["learning_rate"] * leaves.sum(axis=1))
+
+    def _leaf_values(self, z: np.ndarray) -> np.ndarray:
+        a = self.arrays
+        # sklearn trees compare float32 inputs against float64 thresholds
+        z = z.astype(np.float32).astype(np.float64)
+
+        node = np.tile(a["tree_roots"], (len(z), 1))
+        rows = np.arange(len(z))[:, None]
+
+        for _ in range(int(a["tree_depth"])):
+            left = a["tree_left"][node]
+            leaf = left < 0
+            if leaf.all():
+                break
+
+            x = z[rows, np.where(leaf, 0, a["tree_feature"][node])]
+            go_left = np.where(np.isnan(x), a["tree_missing_left"][node], x <= a["tree_threshold"][node])
+            node = np.where(leaf, node, np.where(go_left, left, a["tree_right"][node]))
+
+        return a["tree_value"][node]
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            columns=np.array(self.columns),
+            threshold=np.array(self.threshold),
+            source_version=np.array(self.source_version),
+            estimator=np.array(self.estimator),
+            **self.arrays,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> CompiledModel:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+
+        return cls(
+            columns=tuple(str(i) for i in arrays.pop("columns")),
+            threshold=float(arrays.pop("threshold")),
+            source_version=str(arrays.pop("source_version")),
+            estimator=str(arrays.pop("estimator")),
+            arrays=arrays,
+        )
+
+
+def _expit(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _same_missing(a: Any, b: Any) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    return _is_missing(a) and _is_missing(b)
+
+
+def _code(feature: Feature, value: Any) -> float:
+    """Code of ``value`` in the encoded matrix, ``UNKNOWN_CODE`` if the encoder never produces it"""
+    if _is_missing(value):
+        return np.nan
+
+    if feature.categories is not None:
+        return float(feature.categories.index(value)) if value in feature.categories else UNKNOWN_CODE
+
+    if feature.dtype == "object":
+        return UNKNOWN_CODE
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return UNKNOWN_CODE
+
+
+class _Builder:
+    """Collects transformer outputs of the ColumnTransformer in their output order"""
+
+    def __init__(self, encoder: FeatureEncoder) -> None:
+        self.encoder = encoder
+        self.n_outputs = 0
+        self.lists: dict[str, list[Any]] = {
+            key: []
+            for key in (
+                "oh_src", "oh_code", "oh_fill", "oh_out",
+                "ord_src", "ord_table", "ord_fill", "ord_missing", "ord_out",
+                "num_src", "num_fill", "num_offset", "num_scale", "num_mult", "num_add", "num_out",
+                "const_out", "const_value",
+            )
+        }
+
+    def _next(self) -> int:
+        self.n_outputs += 1
+        return self.n_outputs - 1
+
+    def add(self, transformer: Any, columns: list[int]) -> None:
+        from sklearn.pipeline import Pipeline
+
+        if transformer == "passthrough":
+            steps = []
+        elif isinstance(transformer, Pipeline):
+            steps = [step for _, step in transformer.steps if step not in (None, "passthrough")]
+        else:
+            steps = [transformer]
+
+        fills: dict[int, Any] = {}
+        if steps and type(steps[0]).__name__ == "SimpleImputer":
+            imputer, steps = steps[0], steps[1:]
+            columns, fills = self._imputer(imputer, columns)
+
+        if not steps:
+            self._numeric(columns, fills, None)
+            return
+
+        if len(steps) > 1:
+            msg = f"Unsupported transformer chain: {[type(i).__name__ for i in steps]}"
+            raise CompileError(msg)
+
+        step = steps[0]
+        kind = type(step).__name__
+        if kind == "OneHotEncoder":
+            self._one_hot(step, columns, fills)
+        elif kind == "OrdinalEncoder":
+            self._ordinal(step, columns, fills)
+        elif kind in ("StandardScaler", "MinMaxScaler"):
+            self._numeric(columns, fills, step)
+        elif kind == "FunctionTransformer" and step.func is None:
+            self._numeric(columns, fills, None)
+        else:
+            msg = f"Unsupported transformer {kind}"
+            raise CompileError(msg)
+
+    def _imputer(self, imputer: Any, columns: list[int]) -> tuple[list[int], dict[int, Any]]:
+        if getattr(imputer, "add_indicator", False):
+            msg = "SimpleImputer(add_indicator=True) is not supported"
+            raise CompileError(msg)
+
+        kept, fills = [], {}
+        for column, statistic in zip(columns, imputer.statistics_):
+            empty = isinstance(statistic, float) and math.isnan(statistic)
+            if empty and imputer.strategy != "constant" and not imputer.keep_empty_features:
+                continue
+            kept.append(column)
+
+            # to_frame gives None for missing categorical values and NaN for numeric ones,
+            # the imputer only fills the one equal to its missing_values
+            feature = self.encoder.features[column]
+            missing = None if feature.categories is not None or feature.dtype == "object" else np.nan
+            if _same_missing(imputer.missing_values, missing):
+                fills[column] = statistic
+        return kept, fills
+
+    def _one_hot(self, encoder: Any, columns: list[int], fills: dict[int, Any]) -> None:
+        if getattr(encoder, "infrequent_categories_", None) is not None and any(
+            i is not None for i in encoder.infrequent_categories_
+        ):
+            msg = "OneHotEncoder with infrequent categories is not supported"
+            raise CompileError(msg)
+
+        drop = getattr(encoder, "drop_idx_", None)
+        for n, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+            feature = self.encoder.features[column]
+            fill = _code(feature, fills[column]) if column in fills else np.nan
+
+            for k, category in enumerate(categories):
+                if drop is not None and drop[n] is not None and k == drop[n]:
+                    continue
+
+                out = self._next()
+                code = _code(feature, category)
+                if feature.key is None:
+                    raw = self._constant_input(feature, fills.get(column))
+                    self._const(out, float(raw == category or (_is_missing(raw) and _is_missing(category))))
+                    continue
+
+                self.lists["oh_src"].append(column)
+                self.lists["oh_code"].append(code)
+                self.lists["oh_fill"].append(fill)
+                self.lists["oh_out"].append(out)
+
+    def _ordinal(self, encoder: Any, columns: list[int], fills: dict[int, Any]) -> None:
+        unknown = encoder.unknown_value if encoder.handle_unknown == "use_encoded_value" else np.nan
+
+        for column, categories in zip(columns, encoder.categories_):
+            feature = self.encoder.features[column]
+            missing = getattr(encoder, "encoded_missing_value", np.nan)
+            if feature.categories is None:
+                msg = f"OrdinalEncoder on numeric feature {feature.name} is not supported"
+                raise CompileError(msg)
+
+            table = np.full(len(feature.categories), unknown, dtype=np.float64)
+            for k, category in enumerate(categories):
+                code = _code(feature, category)
+                if code >= 0:
+                    table[int(code)] = k
+                elif _is_missing(category):
+                    missing = float(k)
+
+            out = self._next()
+            self.lists["ord_src"].append(column)
+            self.lists["ord_table"].append(table)
+            self.lists["ord_fill"].append(_code(feature, fills[column]) if column in fills else np.nan)
+            self.lists["ord_missing"].append(missing)
+            self.lists["ord_out"].append(out)
+
+    def _numeric(self, columns: list[int], fills: dict[int, Any], scaler: Any) -> None:
+        offset, scale, mult, add = _affine(scaler, len(columns))
+
+        for n, column in enumerate(columns):
+            feature = self.encoder.features[column]
+            if feature.categories is not None:
+                msg = f"Categorical feature {feature.name} is passed to the estimator as is"
+                raise CompileError(msg)
+
+            fill = float(fills[column]) if column in fills else np.nan
+            out = self._next()
+
+            if feature.key is None:
+                raw = self._constant_input(feature, fills.get(column))
+                value = np.nan if _is_missing(raw) else float(raw)
+                self._const(out, (value - offset[n]) / scale[n] * mult[n] + add[n])
+                continue
+
+            self.lists["num_src"].append(column)
+            self.lists["num_fill"].append(fill)
+            self.lists["num_offset"].append(offset[n])
+            self.lists["num_scale"].append(scale[n])
+            self.lists["num_mult"].append(mult[n])
+            self.lists["num_add"].append(add[n])
+            self.lists["num_out"].append(out)
+
+    @staticmethod
+    def _constant_input(feature: Feature, fill: Any) -> Any:
+        """Raw value the pipeline sees for a feature the encoder never takes from the survey"""
+        return fill if _is_missing(feature.default) else feature.default
+
+    def _const(self, out: int, value: float) -> None:
+        self.lists["const_out"].append(out)
+        self.lists["const_value"].append(value)
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        result = {"n_outputs": np.array(self.n_outputs)}
+        for key, values in self.lists.items():
+            if key.endswith(("_src", "_out")):
+                result[key] = np.array(values, dtype=np.intp)
+            elif key == "ord_table":
+                width = max((len(i) for i in values), default=0)
+                table = np.full((len(values), width), np.nan)
+                for n, row in enumerate(values):
+                    table[n, : len(row)] = row
+                result[key] = table
+            else:
+                result[key] = np.array(values, dtype=np.float64)
+        return result
+
+
+def _affine(scaler: Any, size: int) -> tuple[np.ndarray, ...]:
+    """``(x - offset) / scale * mult + add`` coefficients of a fitted scaler"""
+    offset, scale, mult, add = np.zeros(size), np.ones(size), np.ones(size), np.zeros(size)
+
+    if scaler is None:
+        return offset, scale, mult, add
+
+    kind = type(scaler).__name__
+    if kind == "StandardScaler":
+        if scaler.mean_ is not None:
+            offset = np.asarray(scaler.mean_, dtype=np.float64)
+        if scaler.scale_ is not None:
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+    elif kind == "MinMaxScaler":
+        if scaler.clip:
+            msg = "MinMaxScaler(clip=True) is not supported"
+            raise CompileError(msg)
+        mult = np.asarray(scaler.scale_, dtype=np.float64)
+        add = np.asarray(scaler.min_, dtype=np.float64)
+    else:
+        msg = f"Unsupported scaler {kind}"
+        raise CompileError(msg)
+
+    return offset, scale, mult, add
+
+
+def _columns(spec: Any, names: list[str]) -> list[int]:
+    if isinstance(spec, str):
+        spec = [spec]
+    if isinstance(spec, slice):
+        return list(range(len(names)))[spec]
+
+    spec = list(np.asarray(spec).tolist())
+    if not spec:
+        return []
+    if isinstance(spec[0], bool):
+        return [n for n, i in enumerate(spec) if i]
+    if isinstance(spec[0], str):
+        return [names.index(i) for i in spec]
+    return [int(i) for i in spec]
+
+
+def _compile_estimator(estimator: Any) -> tuple[str, dict[str, np.ndarray]]:
+    kind = type(estimator).__name__
+    classes = list(getattr(estimator, "classes_", []))
+    if len(classes) != 2:
+        msg = f"Only binary classifiers are supported, got classes {classes}"
+        raise CompileError(msg)
+
+    if kind == "LogisticRegression":
+        scale = 2.0 if getattr(estimator, "multi_class", "auto") == "multinomial" else 1.0
+        return "linear", {
+            "coef": np.asarray(estimator.coef_[0], dtype=np.float64),
+            "intercept": np.array(float(estimator.intercept_[0])),
+            "decision_scale": np.array(scale),
+        }
+
+    if kind == "DecisionTreeClassifier":
+        return "forest", _flatten_trees([estimator], classifier=True)
+
+    if kind in ("RandomForestClassifier", "ExtraTreesClassifier"):
+        return "forest", _flatten_trees(estimator.estimators_, classifier=True)
+
+    if kind == "GradientBoostingClassifier":
+        try:
+            init = float(estimator._raw_predict_init(np.zeros((1, estimator.n_features_in_)))[0, 0])
+        except Exception as e:
+            msg = f"Unsupported GradientBoostingClassifier init: {e}"
+            raise CompileError(msg) from e
+
+        arrays = _flatten_trees(estimator.estimators_[:, 0], classifier=False)
+        arrays["init"] = np.array(init)
+        arrays["learning_rate"] = np.array(float(estimator.learning_rate))
+        return "boosting", arrays
+
+    msg = f"Unsupported estimator {kind}"
+    raise CompileError(msg)
+
+
+def _flatten_trees(trees: Any, classifier: bool) -> dict[str, np.ndarray]:
+    parts: dict[str, list[np.ndarray]] = {
+        i: [] for i in ("tree_feature", "tree_threshold", "tree_left", "tree_right", "tree_missing_left", "tree_value")
+    }
+    roots, depth, offset = [], 0, 0
+
+    for estimator in trees:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.intp)
+        right = tree.children_right.astype(np.intp)
+
+        if classifier:
+            value = tree.value[:, 0, :].astype(np.float64)
+            total = value.sum(axis=1)
+            total[total == 0] = 1.0
+            value = value[:, 1] / total
+        else:
+            value = tree.value[:, 0, 0].astype(np.float64)
+
+        missing_left = getattr(tree, "missing_go_to_left", None)
+        if missing_left is None:
+            missing_left = np.zeros(tree.node_count, dtype=bool)
+
+        parts["tree_feature"].append(tree.feature.astype(np.intp))
+        parts["tree_threshold"].append(tree.threshold.astype(np.float64))
+        parts["tree_left"].append(np.where(left >= 0, left + offset, -1))
+        parts["tree_right"].append(np.where(right >= 0, right + offset, -1))
+        parts["tree_missing_left"].append(np.asarray(missing_left, dtype=bool))
+        parts["tree_value"].append(value)
+
+        roots.append(offset)
+        depth = max(depth, int(tree.max_depth))
+        offset += tree.node_count
+
+    arrays = {key: np.concatenate(values) for key, values in parts.items()}
+    arrays["tree_roots"] = np.array(roots, dtype=np.intp)
+    arrays["tree_depth"] = np.array(depth)
+    return arrays
+
+
+def compile_pipeline(pipeline: Any, threshold: float, source_version: str = "") -> CompiledModel:
+    """Compiles ``Pipeline([..., ColumnTransformer, (scaler), estimator])`` fitted on the survey features"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+    if not isinstance(pipeline, Pipeline):
+        msg = f"Expected sklearn Pipeline, got {type(pipeline).__name__}"
+        raise CompileError(msg)
+
+    encoder = FeatureEncoder.for_model(pipeline)
+    *transformers, (_, estimator) = pipeline.steps
+
+    if not transformers or not isinstance(transformers[0][1], ColumnTransformer):
+        msg = "The first pipeline step must be a ColumnTransformer"
+        raise CompileError(msg)
+
+    column_transformer = transformers[0][1]
+    builder = _Builder(encoder)
+    names = list(encoder.columns)
+    for _, transformer, spec in column_transformer.transformers_:
+        if transformer == "drop":
+            continue
+        columns = _columns(spec, names)
+        if columns:
+            builder.add(transformer, columns)
+
+    arrays = builder.arrays()
+
+    post = [step for _, step in transformers[1:] if step not in (None, "passthrough")]
+    if len(post) > 1:
+        msg = f"Unsupported pipeline steps: {[type(i).__name__ for i in post]}"
+        raise CompileError(msg)
+
+    if post:
+        offset, scale, mult, add = _affine(post[0], builder.n_outputs)
+    else:
+        offset = scale = mult = add = np.array([], dtype=np.float64)
+    arrays.update(post_offset=offset, post_scale=scale, post_mult=mult, post_add=add)
+
+    kind, estimator_arrays = _compile_estimator(estimator)
+    arrays.update(estimator_arrays)
+
+    return CompiledModel(
+        columns=encoder.columns,
+        threshold=threshold,
+        source_version=source_version,
+        estimator=kind,
+        arrays=arrays,
+    )
+
+
+def max_difference(compiled: CompiledModel, pipeline: Any, n_samples: int = 2000, seed: int = 0) -> float:
+    """Largest absolute difference with the pipeline ``predict_proba`` on random surveys"""
+    encoder = FeatureEncoder(compiled.columns)
+    matrix = encoder.encode_many(sample_answers(n_samples, seed))
+
+    expected = pipeline.predict_proba(encoder.to_frame(matrix))[:, 1]
+    return float(np.max(np.abs(compiled.predict_proba(matrix) - expected)))
+
+
+def main() -> None:
+    import joblib
+
+    from bot.ml.registry import DEFAULT_THRESHOLD, artifact_version
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("artifact", type=Path)
+    parser.add_argument("-o", "--output", type=Path, default=None)
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    artifact = joblib.load(args.artifact)
+    compiled = compile_pipeline(
+        artifact["model"],
+        threshold=float(artifact.get("threshold", DEFAULT_THRESHOLD)),
+        source_version=artifact_version(args.artifact),
+    )
+
+    difference = max_difference(compiled, artifact["model"], args.samples)
+    logger.info("Max |compiled - sklearn| on %s surveys: %.3g", args.samples, difference)
+    if difference > args.tolerance:
+        logger.error("Compiled model differs from the pipeline by more than %s, not saved", args.tolerance)
+        raise SystemExit(1)
+
+    output = args.output or args.artifact.with_suffix(".npz")
+    compiled.save(output)
+    logger.info("Compiled %s (%s) to %s", args.artifact, compiled.estimator, output)
+
+
+if __name__ == "__main__":
+    main()
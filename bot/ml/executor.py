@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Generic, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+Row = TypeVar("Row")
+
+
+class InferenceExecutor(Generic[Row]):
+    """
+    Collects single-row prediction requests into micro-batches and scores them off the event loop.
+
+    A batch is closed when ``max_batch_size`` rows are queued or ``window`` seconds have passed
+    since its first row, then ``predict_batch`` is run once for the whole batch in ``pool``.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[list[Row]], Sequence[float]],
+        *,
+        window: float = 0.005,
+        max_batch_size: int = 64,
+        max_workers: int = 1,
+        pool: Executor | None = None,
+    ) -> None:
+        self.predict_batch = predict_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_workers = max_workers
+
+        self._pool = pool or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._queue: asyncio.Queue[tuple[Row, asyncio.Future[float]]] | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._collector: asyncio.Task[None] | None = None
+        self._running: set[asyncio.Task[None]] = set()
+
+        self.batches = 0
+        self.rows = 0
+
+    async def predict(self, row: Row) -> float:
+        """Queue one row and wait for its probability"""
+        self._ensure_started()
+
+        future: asyncio.Future[float] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((row, future))
+        return await future
+
+    def _ensure_started(self) -> None:
+        if self._collector is not None and not self._collector.done():
+            return
+
+        # A collector that died leaves its queue, the rows waiting there are collected by the new one
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_workers)
+        self._collector = asyncio.create_task(self._collect(), name="inference-collector")
+
+    @staticmethod
+    def _fail(batch: Sequence[tuple[Row, asyncio.Future[float]]], error: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                # Rows taken off the queue are nowhere else, their callers must not wait forever
+                self._fail(batch, RuntimeError("Inference executor is closed"))
+                raise
+
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list[tuple[Row, asyncio.Future[float]]]) -> None:
+        rows = [row for row, _ in batch]
+
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._pool, self.predict_batch, rows)
+        except Exception as e:
+            logger.error("Batch of %s rows failed: %s", len(rows), e)
+            self._fail(batch, e)
+        else:
+            self.batches += 1
+            self.rows += len(rows)
+            for (_, future), proba in zip(batch, result):
+                if not future.done():
+                    future.set_result(float(proba))
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        """Stop collecting, finish running batches and shut the pool down"""
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, return_exceptions=True)
+            self._collector = None
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+        while self._queue is not None and not self._queue.empty():
+            self._fail([self._queue.get_nowait()], RuntimeError("Inference executor is closed"))
+        self._queue = None
+        self._slots = None
+
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Sequence
+
+import numpy as np
+
+from bot.enums.survey import (
+    ActivityLevel,
+    Course,
+    Gender,
+    Quality,
+    RelationshipStatus,
+    ResidenceType,
+    SocialSupport,
+    YesNo,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+AGE_BUCKETS = {"18–20": 19, "21–23": 22, "24–26": 25, "27–29": 28, "30+": 30}
+GPA_OPTIONS = ("0", "1", "2", "3", "4", "5")
+SCALE_1_5 = (1, 2, 3, 4, 5)
+SCALE_0_5 = (0, 1, 2, 3, 4, 5)
+
+
+def age_mapping(age: str) -> int:
+    return AGE_BUCKETS.get(age, 25)
+
+
+def convert_gpa(gpa_str: str) -> float:
+    if gpa_str == "< 2.0":
+        return 1.0
+    if gpa_str == "2.0–2.5":
+        return 2.25
+    if gpa_str == "2.6–3.0":
+        return 2.8
+    if gpa_str == "3.1–3.5":
+        return 3.3
+    return 3.8
+
+
+def _values(enum: type[Enum]) -> tuple[str, ...]:
+    return tuple(i.value for i in enum)
+
+
+@dataclass(frozen=True)
+class Feature:
+    """
+    One model input column.
+
+    Categorical features are encoded as the index of the value in ``categories``,
+    numeric ones as float after ``convert``. Features without ``key`` are constants.
+    ``column`` is the ``survey_responses`` column the answer is stored in, already converted.
+    """
+
+    name: str
+    key: str | None = None
+    column: str | None = None
+    categories: tuple[str, ...] | None = None
+    options: tuple[Any, ...] | None = None
+    convert: Callable[[Any], float] | None = None
+    default: Any = None
+    dtype: str = "int64"
+
+    def encode(self, value: Any) -> float:
+        if value is None:
+            return np.nan
+
+        if self.categories is not None:
+            try:
+                return float(self.categories.index(value))
+            except ValueError:
+                msg = f"Unexpected value {value!r} for feature {self.name}"
+                raise ValueError(msg) from None
+
+        return float(self.convert(value) if self.convert else value)
+
+    def encode_stored(self, values: Sequence[Any]) -> np.ndarray:
+        """Encodes a column of stored values, numeric ones are stored after ``convert``"""
+        if self.categories is None:
+            return np.array([np.nan if i is None else i for i in values], dtype=np.float64)
+
+        index = {value: float(n) for n, value in enumerate(self.categories)}
+        try:
+            return np.array([np.nan if i is None else index[i] for i in values], dtype=np.float64)
+        except KeyError as e:
+            msg = f"Unexpected value {e.args[0]!r} for feature {self.name}"
+            raise ValueError(msg) from None
+
+    @property
+    def answers(self) -> tuple[Any, ...]:
+        """Valid survey answers for the feature"""
+        return self.options if self.options is not None else self.categories or ()
+
+
+FEATURES: tuple[Feature, ...] = (
+    Feature("Age", "Age", "age", options=tuple(AGE_BUCKETS), convert=age_mapping),
+    Feature("Gender", "Gender", "gender", categories=_values(Gender)),
+    Feature("Course", categories=_values(Course), default=Course.ENGINEERING.value),
+    Feature("CGPA", "CGPA", "gpa", options=GPA_OPTIONS, convert=convert_gpa, dtype="float64"),
+    Feature("Stress_Level", "Stress_Level", "stress_level", options=SCALE_1_5),
+    Feature("Anxiety_Score", "Anxiety_Score", "anxiety_score", options=SCALE_0_5),
+    Feature("Sleep_Quality", "Sleep_Quality", "sleep_quality", categories=_values(Quality)),
+    Feature("Physical_Activity", "Physical_Activity", "physical_activity", categories=_values(ActivityLevel)),
+    Feature("Diet_Quality", "Diet_Quality", "diet_quality", categories=_values(Quality)),
+    Feature("Social_Support", "Social_Support", "social_support", categories=_values(SocialSupport)),
+    Feature("Relationship_Status", "Relationship_Status", "relationship_status", categories=_values(RelationshipStatus)),
+    Feature("Substance_Use", "Substance_Use", "substance_use", categories=_values(YesNo)),
+    Feature("Counseling_Service_Use", "Counseling_Service_Use", "counseling_service_use", categories=_values(YesNo)),
+    Feature("Family_History", "Family_History", "family_history", categories=_values(YesNo)),
+    Feature("Chronic_Illness", "Chronic_Illness", "chronic_illness", categories=_values(YesNo)),
+    Feature("Financial_Stress", "Financial_Stress", "financial_stress", options=SCALE_1_5),
+    Feature("Extracurricular_Involvement", default=2),
+    Feature("Semester_Credit_Load", default=22),
+    Feature("Residence_Type", "Residence_Type", "residence_type", categories=_values(ResidenceType)),
+    # Placeholders, the model pipeline derives them itself
+    Feature("Counseling_Service_Use_Level", dtype="object"),
+    Feature("Diet_Quality_Level", dtype="object"),
+    Feature("Family_History_Bool", dtype="object"),
+    Feature("Gender_Bool", dtype="object"),
+    Feature("Substance_Use_Level", dtype="object"),
+    Feature("Social_Support_Level", dtype="object"),
+    Feature("Extracurricular_Involvement_Level", dtype="object"),
+    Feature("Physical_Activity_Level", dtype="object"),
+    Feature("Sleep_Quality_Level", dtype="object"),
+    Feature("Chronic_Illness_Bool", dtype="object"),
+)
+
+FEATURE_COLUMNS = tuple(i.name for i in FEATURES)
+ANSWER_OPTIONS: dict[str, tuple[Any, ...]] = {i.key: i.answers for i in FEATURES if i.key is not None}
+
+
+def sample_answers(n: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Random survey FSM data, every answer drawn uniformly from its options"""
+    rnd = random.Random(seed)
+    return [{key: rnd.choice(options) for key, options in ANSWER_OPTIONS.items()} for _ in range(n)]
+
+
+class FeatureEncoder:
+    """
+    Maps survey FSM data to a float matrix in the column order the model expects.
+
+    The column set is checked once, when the encoder is built for a model, every
+    ``encode`` call only copies a prefilled template row and writes the answers into it.
+    """
+
+    def __init__(self, columns: Sequence[str] = FEATURE_COLUMNS) -> None:
+        known = {i.name: i for i in FEATURES}
+        unknown = [i for i in columns if i not in known]
+        if unknown:
+            msg = f"Model expects unsupported features: {', '.join(unknown)}"
+            raise ValueError(msg)
+
+        self.columns = tuple(columns)
+        self.features = tuple(known[i] for i in self.columns)
+        self._template = np.array([i.encode(i.default) for i in self.features], dtype=np.float64)
+        self._inputs = [(n, i) for n, i in enumerate(self.features) if i.key is not None]
+        self._stored = [(n, i) for n, i in enumerate(self.features) if i.column is not None]
+
+    @classmethod
+    def for_model(cls, model: Any) -> FeatureEncoder:
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            return cls()
+        return cls([str(i) for i in names])
+
+    def encode(self, data: Mapping[str, Any]) -> np.ndarray:
+        """Encodes one survey to a ``(1, n_features)`` row"""
+        return self.encode_many([data])
+
+    def encode_many(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Encodes several surveys to a ``(n_rows, n_features)`` matrix"""
+        matrix = np.tile(self._template, (len(rows), 1))
+
+        for out, data in zip(matrix, rows):
+            for n, feature in self._inputs:
+                out[n] = feature.encode(data.get(feature.key))
+
+        return matrix
+
+    @property
+    def stored_columns(self) -> tuple[str, ...]:
+        """``survey_responses`` columns ``encode_stored`` reads"""
+        return tuple(i.column for _, i in self._stored)
+
+    def encode_stored(self, records: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """Encodes stored survey responses column by column, the same way ``encode_many`` encodes FSM data"""
+        matrix = np.tile(self._template, (len(records), 1))
+
+        for n, feature in self._stored:
+            matrix[:, n] = feature.encode_stored([i[feature.column] for i in records])
+
+        return matrix
+
+    def to_frame(self, matrix: np.ndarray) -> pd.DataFrame:
+        """Decodes an encoded matrix to the DataFrame the sklearn pipeline was fitted on"""
+        import pandas as pd
+
+        columns: dict[str, Any] = {}
+        for n, feature in enumerate(self.features):
+            column = matrix[:, n]
+
+            if feature.categories is not None:
+                missing = np.isnan(column)
+                values = np.asarray(feature.categories, dtype=object)[np.where(missing, 0, column).astype(np.intp)]
+                values[missing] = None
+                columns[feature.name] = values
+            elif feature.dtype == "object":
+                columns[feature.name] = np.full(len(column), None, dtype=object)
+            else:
+                columns[feature.name] = column.astype(feature.dtype)
+
+        return pd.DataFrame(columns, columns=list(self.columns))
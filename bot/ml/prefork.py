@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import functools
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import psutil
+
+from bot.ml.registry import LoadedModel, load_file
+
+logger = logging.getLogger(__name__)
+
+# Filled in the bot process right before the fork, workers inherit it copy-on-write
+_shared: dict[str, LoadedModel] = {}
+# Versions activated after the fork, every worker loads them itself
+_loaded: dict[str, LoadedModel] = {}
+# Versions a worker keeps loaded besides the inherited ones
+MAX_LOADED = 2
+
+
+class VersionUnavailableError(RuntimeError):
+    pass
+
+
+def _init_worker() -> None:
+    # Ctrl+C is handled by the bot process, it shuts the pool down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _model(version: str, path: str, mmap_mode: str | None) -> LoadedModel:
+    model = _shared.get(version) or _loaded.get(version)
+    if model is not None:
+        return model
+
+    model = load_file(Path(path), mmap_mode)
+    if model.version != version:
+        msg = f"{path} holds {model.version}, not {version}"
+        raise VersionUnavailableError(msg)
+
+    while len(_loaded) >= MAX_LOADED:
+        _loaded.pop(next(iter(_loaded)))
+    _loaded[version] = model
+    return model
+
+
+def _score(version: str, path: str, mmap_mode: str | None, matrix: np.ndarray) -> np.ndarray:
+    return _model(version, path, mmap_mode).score(matrix)
+
+
+@dataclass(frozen=True)
+class ProcessMemory:
+    name: str
+    pid: int
+    rss: int
+    uss: int
+    pss: int
+
+    @property
+    def shared(self) -> int:
+        return self.rss - self.uss
+
+
+def process_memory(name: str, process: psutil.Process) -> ProcessMemory:
+    info = process.memory_full_info()
+    return ProcessMemory(name, process.pid, info.rss, info.uss, getattr(info, "pss", info.uss))
+
+
+def memory_report(workers: Sequence[int] = ()) -> list[ProcessMemory]:
+    """Unique (USS) and shared memory of the bot process and every worker"""
+    report = [process_memory("bot", psutil.Process())]
+    for n, pid in enumerate(workers, 1):
+        try:
+            report.append(process_memory(f"worker {n}", psutil.Process(pid)))
+        except psutil.Error:
+            continue
+    return report
+
+
+class SharedModelPool:
+    """
+    Scores rows in worker processes forked once, before the event loop and its threads are started.
+
+    Model arrays loaded before the fork are never copied to workers, they read the pages of the bot process
+    until somebody writes to them. ``gc.freeze`` before the fork keeps the collector from touching (and so
+    copying) those pages. Versions activated later are loaded by every worker from their file on first use,
+    if the file holds another version by then, the bot process scores the rows itself.
+    """
+
+    def __init__(self, processes: int, mmap_mode: str | None = None) -> None:
+        self.processes = processes
+        self.mmap_mode = mmap_mode
+        self._pool: ProcessPoolExecutor | None = None
+        self._models: list[LoadedModel] = []
+
+    def start(self, models: Sequence[LoadedModel] = ()) -> None:
+        """Forks the workers, they inherit ``models``. Must be called while the process has a single thread."""
+        if self._pool is not None:
+            return
+
+        _shared.update((i.version, i) for i in models)
+
+        gc.collect()
+        gc.freeze()
+
+        self._pool = ProcessPoolExecutor(
+            self.processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+        )
+        # Fork every worker right away, not on the first request when memory is already dirtier
+        for future in [self._pool.submit(os.getpid) for _ in range(self.processes)]:
+            future.result()
+
+        self.share(models)
+        logger.info("Forked %s inference workers for %s", self.processes, ", ".join(_shared) or "no model")
+
+    def share(self, models: Sequence[LoadedModel]) -> None:
+        """Makes ``models`` score in the pool, it is never forked again"""
+        if self._pool is None:
+            return
+
+        for model in models:
+            if model.scorer is None:
+                model.scorer = functools.partial(self._submit, self._pool, model)
+                self._models.append(model)
+
+    def _submit(self, pool: ProcessPoolExecutor, model: LoadedModel, matrix: np.ndarray) -> np.ndarray:
+        try:
+            return pool.submit(_score, model.version, str(model.path), self.mmap_mode, matrix).result()
+        except VersionUnavailableError:
+            return model.score(matrix)
+
+    def pids(self) -> list[int]:
+        if self._pool is None:
+            return []
+        return list(getattr(self._pool, "_processes", None) or ())
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+        for model in self._models:
+            model.scorer = None
+        self._models.clear()
+        _shared.clear()
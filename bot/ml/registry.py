@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from bot.ml.compiled import CompiledModel
+from bot.ml.features import ANSWER_OPTIONS, FeatureEncoder
+from bot.ml.surrogate import Surrogate, surrogate_path
+
+logger = logging.getLogger(__name__)
+
+# Cut-off of the positive class for artifacts that do not define their own
+DEFAULT_THRESHOLD = 0.41
+
+
+def artifact_version(path: Path) -> str:
+    """Returns version of the model artifact, it changes whenever the file content changes"""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{path.stem}-{digest.hexdigest()[:12]}"
+
+
+@dataclass
+class ModelStats:
+    calls: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+    surrogate_hits: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, rows: int, seconds: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.rows += rows
+            self.seconds += seconds
+
+    def record_surrogate(self) -> None:
+        with self._lock:
+            self.surrogate_hits += 1
+
+    @property
+    def avg_latency_ms(self) -> float:
+        return round(self.seconds / self.calls * 1000, 2) if self.calls else 0.0
+
+
+@dataclass
+class LoadedModel:
+    version: str
+    path: Path
+    model: Any
+    threshold: float
+    encoder: FeatureEncoder
+    compiled: CompiledModel | None = None
+    surrogate: Surrogate | None = None
+    loaded_at: datetime = field(default_factory=datetime.now)
+    stats: ModelStats = field(default_factory=ModelStats)
+    scorer: Callable[[np.ndarray], np.ndarray] | None = field(default=None, repr=False)
+
+    def score(self, matrix: np.ndarray) -> np.ndarray:
+        if self.compiled is not None:
+            return self.compiled.predict_proba(matrix)
+        return self.model.predict_proba(self.encoder.to_frame(matrix))[:, 1]
+
+    def predict_proba(self, matrix: np.ndarray) -> np.ndarray:
+        """Returns probability of the positive class for every encoded row"""
+        start = time.perf_counter()
+        proba = self.scorer(matrix) if self.scorer is not None else self.score(matrix)
+        self.stats.record(len(matrix), time.perf_counter() - start)
+        return proba
+
+
+def compiled_path(path: Path) -> Path:
+    return path.with_suffix(".npz")
+
+
+def load_model(
+    path: Path,
+    mmap_mode: str | None = None,
+    use_compiled: bool = True,
+    use_surrogate: bool = False,
+) -> LoadedModel:
+    """
+    Loads a joblib artifact ``{"model": pipeline, "threshold": float}``.
+
+    If the artifact was compiled with ``python -m bot.ml.compiled`` the compiled arrays are used instead and
+    sklearn is never imported. With ``mmap_mode`` the numpy arrays of an uncompressed artifact stay
+    memory-mapped instead of being copied. With ``use_surrogate`` the surrogate fitted by
+    ``python -m bot.ml.surrogate`` is attached if it was fitted on the same artifact version.
+    """
+    model = _load_model(path, mmap_mode, use_compiled)
+
+    surrogate_file = surrogate_path(path)
+    if use_surrogate and surrogate_file.exists():
+        surrogate = Surrogate.load(surrogate_file)
+        if surrogate.source_version == model.version and surrogate.columns == model.encoder.columns:
+            model.surrogate = surrogate
+        else:
+            logger.warning("%s was fitted on another model version, refit it", surrogate_file)
+
+    return model
+
+
+def _compiled_model(path: Path, compiled: CompiledModel) -> LoadedModel:
+    return LoadedModel(
+        version=compiled.source_version,
+        path=path,
+        model=None,
+        threshold=compiled.threshold,
+        encoder=FeatureEncoder(compiled.columns),
+        compiled=compiled,
+    )
+
+
+def load_file(path: Path, mmap_mode: str | None = None) -> LoadedModel:
+    """Loads exactly ``path``, the ``LoadedModel.path`` of a loaded model: a compiled model or a joblib artifact"""
+    if path.suffix == ".npz":
+        return _compiled_model(path, CompiledModel.load(path))
+    return _load_model(path, mmap_mode, use_compiled=False)
+
+
+def _load_model(path: Path, mmap_mode: str | None, use_compiled: bool) -> LoadedModel:
+    compiled_file = compiled_path(path)
+    if use_compiled and compiled_file.exists():
+        compiled = CompiledModel.load(compiled_file)
+
+        if not path.exists() or compiled.source_version == artifact_version(path):
+            return _compiled_model(compiled_file, compiled)
+
+        logger.warning("%s was compiled from another artifact version, recompile it", compiled_file)
+
+    import joblib
+
+    artifact = joblib.load(path, mmap_mode=mmap_mode)
+    return LoadedModel(
+        version=artifact_version(path),
+        path=path,
+        model=artifact["model"],
+        threshold=float(artifact.get("threshold", DEFAULT_THRESHOLD)),
+        encoder=FeatureEncoder.for_model(artifact["model"]),
+    )
+
+
+def smoke_test(model: LoadedModel) -> None:
+    """Scores one survey with the first option of every answer, raises if the result is not a probability"""
+    sample = {key: options[0] for key, options in ANSWER_OPTIONS.items()}
+    proba = model.score(model.encoder.encode(sample))
+
+    if proba.shape != (1,) or not 0.0 <= float(proba[0]) <= 1.0:
+        msg = f"Smoke prediction of {model.version} returned {proba!r}"
+        raise ValueError(msg)
+
+
+class ModelRegistry:
+    """
+    Keeps loaded model versions and the active one.
+
+    New versions are loaded off the event loop, checked with a smoke prediction and swapped in atomically,
+    the previous ones stay in memory for an instant rollback.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        mmap_mode: str | None = None,
+        keep_versions: int = 2,
+        use_compiled: bool = True,
+        use_surrogate: bool = False,
+    ) -> None:
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self.keep_versions = keep_versions
+        self.use_compiled = use_compiled
+        self.use_surrogate = use_surrogate
+
+        self.current: LoadedModel | None = None
+        self.versions: list[LoadedModel] = []
+        self.error: str | None = None
+
+        self._task: asyncio.Task[None] | None = None
+        self._watcher: asyncio.Task[None] | None = None
+        self._lock = asyncio.Lock()
+        self._loaded = asyncio.Event()
+        self._stamp: tuple[int, ...] | None = None
+        self._listeners: list[Callable[[LoadedModel], None]] = []
+
+    @property
+    def is_ready(self) -> bool:
+        return self.current is not None
+
+    @property
+    def is_loading(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_listener(self, listener: Callable[[LoadedModel], None]) -> None:
+        """Registers a callback called with every newly activated model"""
+        self._listeners.append(listener)
+
+    def load_in_background(self) -> asyncio.Task[None]:
+        if self._task is None:
+            self._task = asyncio.create_task(self._initial_load(), name="model-loader")
+        return self._task
+
+    async def _initial_load(self) -> None:
+        try:
+            await self.reload()
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Failed to load ML model: {e}")
+        finally:
+            self._loaded.set()
+
+    def _file_stamp(self) -> tuple[int, ...] | None:
+        stamp: tuple[int, ...] = ()
+        for path in (self.path, compiled_path(self.path), surrogate_path(self.path)):
+            try:
+                stat = path.stat()
+            except OSError:
+                stamp += (0, 0)
+            else:
+                stamp += (stat.st_mtime_ns, stat.st_size)
+        return stamp if any(stamp) else None
+
+    def _load_checked(self) -> LoadedModel:
+        model = load_model(self.path, self.mmap_mode, self.use_compiled, self.use_surrogate)
+        smoke_test(model)
+        return model
+
+    async def reload(self) -> LoadedModel:
+        """Loads the artifact from ``path`` and activates it if its version differs from the active one"""
+        async with self._lock:
+            stamp = self._file_stamp()
+            logger.info("Loading ML model from %s", self.path)
+
+            try:
+                model = await asyncio.to_thread(self._load_checked)
+            finally:
+                self._stamp = stamp
+
+            if self.current is not None and model.version == self.current.version:
+                logger.info("ML model %s is already active", model.version)
+                return self.current
+
+            self._add(model)
+            logger.info("ML model %s is ready", model.version)
+            return model
+
+    def preload(self) -> LoadedModel:
+        """Loads the artifact synchronously, before the event loop and any worker process are started"""
+        self._stamp = self._file_stamp()
+        logger.info("Preloading ML model from %s", self.path)
+
+        model = self._load_checked()
+        self._add(model)
+        self._loaded.set()
+
+        logger.info("ML model %s is ready", model.version)
+        return model
+
+    def _add(self, model: LoadedModel) -> None:
+        self.versions = [i for i in self.versions if i.version != model.version]
+        self.versions.append(model)
+        self._trim(model)
+        self._activate(model)
+        self.error = None
+
+    def rollback(self) -> LoadedModel | None:
+        """Activates the version loaded before the active one, returns None if there is none"""
+        if self.current is None:
+            return None
+
+        index = self.versions.index(self.current)
+        if index == 0:
+            return None
+
+        model = self.versions[index - 1]
+        self._activate(model)
+        logger.info("ML model rolled back to %s", model.version)
+        return model
+
+    def _activate(self, model: LoadedModel) -> None:
+        self.current = model
+        for listener in self._listeners:
+            listener(model)
+
+    def _trim(self, keep: LoadedModel) -> None:
+        # Trimmed before activation, so listeners only ever see the versions that stay loaded
+        while len(self.versions) > max(self.keep_versions, 1):
+            oldest = self.versions[0] if self.versions[0] is not keep else self.versions[1]
+            self.versions.remove(oldest)
+
+    def watch(self, interval: float) -> asyncio.Task[None] | None:
+        """Polls the artifact every ``interval`` seconds and reloads it when the file changes"""
+        if interval <= 0 or self._watcher is not None:
+            return self._watcher
+
+        self._watcher = asyncio.create_task(self._watch(interval), name="model-watcher")
+        return self._watcher
+
+    async def _watch(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp or self._lock.locked():
+                continue
+
+            try:
+                await self.reload()
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"Failed to reload ML model: {e}")
+
+    async def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+    async def wait_ready(self, timeout: float) -> LoadedModel | None:
+        """Waits for the model up to ``timeout`` seconds, returns None if it is still not available"""
+        if self.current is not None or self._task is None:
+            return self.current
+
+        try:
+            await asyncio.wait_for(self._loaded.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        return self.current
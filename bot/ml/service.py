@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from bot.enums.survey import RiskBand
+from bot.ml.adaptive import is_decided, probability_range
+from bot.ml.cache import PredictionCache
+from bot.ml.executor import InferenceExecutor
+from bot.ml.features import FeatureEncoder
+from bot.ml.prefork import SharedModelPool
+from bot.ml.registry import LoadedModel, ModelRegistry
+from bot.ml.sidecar import SidecarClient, SidecarError
+from bot.ml.surrogate import surrogate_version
+from bot.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotReadyError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Prediction:
+    # None for a survey stopped early, only the bounds of its probability are known
+    probability: float | None
+    threshold: float
+    model_version: str
+    bounds: tuple[float, float] | None = None
+
+    @property
+    def risk_band(self) -> RiskBand:
+        probability = self.probability if self.probability is not None else self.bounds[0]
+        return RiskBand.from_probability(probability, self.threshold)
+
+
+model_registry = ModelRegistry(
+    settings.ml.path,
+    settings.ml.mmap_mode,
+    settings.ml.keep_versions,
+    settings.ml.use_compiled,
+    settings.ml.use_surrogate,
+)
+
+
+def _predict_batch(rows: list[tuple[LoadedModel, np.ndarray]]) -> Sequence[float]:
+    # A batch may straddle a model swap, each row is scored by the model that encoded it
+    result = np.empty(len(rows))
+    for model in {id(model): model for model, _ in rows}.values():
+        index = [n for n, (i, _) in enumerate(rows) if i is model]
+        result[index] = model.predict_proba(np.vstack([rows[n][1] for n in index]))
+    return result
+
+
+inference_executor: InferenceExecutor[tuple[LoadedModel, np.ndarray]] = InferenceExecutor(
+    _predict_batch,
+    window=settings.ml.batch_window_ms / 1000,
+    max_batch_size=settings.ml.batch_max_size,
+    max_workers=settings.ml.inference_workers,
+)
+
+prediction_cache = PredictionCache(
+    maxsize=settings.ml.cache_size,
+    redis=settings.redis.get_redis() if settings.redis.use and settings.ml.cache_redis else None,
+    ttl=settings.ml.cache_ttl,
+)
+model_registry.add_listener(lambda model: prediction_cache.set_version(model.version))
+
+shared_pool = SharedModelPool(settings.ml.processes, settings.ml.mmap_mode) if settings.ml.processes > 0 else None
+if shared_pool is not None:
+    model_registry.add_listener(lambda _: shared_pool.share(model_registry.versions))
+
+
+def preload_model() -> None:
+    """Loads the model before the event loop starts, so workers are forked from a single-threaded process"""
+    try:
+        model_registry.preload()
+    except Exception as e:
+        model_registry.error = str(e)
+        logger.error(f"Failed to preload ML model: {e}")
+
+
+sidecar = SidecarClient(settings.ml.sidecar_socket, settings.ml.sidecar_timeout) if settings.ml.sidecar_socket else None
+_sidecar_encoder = FeatureEncoder()
+
+
+def load_in_process() -> None:
+    """Starts loading the model in this process and watching the artifact for new versions"""
+    if not model_registry.is_ready:
+        model_registry.load_in_background()
+    model_registry.watch(settings.ml.reload_interval)
+
+
+async def score_features(model: LoadedModel, features: np.ndarray) -> tuple[float, str]:
+    """
+    Scores one encoded row with ``model``, through the prediction cache and the batching executor.
+    Returns the probability and the version that produced it, the surrogate one if the surrogate answered.
+    """
+    proba = await prediction_cache.get(features)
+    if proba is not None:
+        return proba, model.version
+
+    if model.surrogate is not None:
+        proba = float(model.surrogate.decide(features)[0])
+        if not math.isnan(proba):
+            model.stats.record_surrogate()
+            return proba, surrogate_version(model.version)
+
+    proba = await inference_executor.predict((model, features))
+    await prediction_cache.set(features, proba)
+    return proba, model.version
+
+
+async def predict_proba(data: Mapping[str, Any]) -> float:
+    """Returns probability of the positive class for survey FSM data"""
+    model = model_registry.current
+    if model is None:
+        raise ModelNotReadyError("ML model is not loaded yet")
+
+    proba, _ = await score_features(model, model.encoder.encode(data))
+    return proba
+
+
+async def predict(data: Mapping[str, Any], timeout: float) -> Prediction | None:
+    """
+    Scores survey FSM data with the sidecar if it is configured, otherwise or if it fails with the model of
+    this process. Returns None if no model becomes available in ``timeout`` seconds.
+    """
+    if sidecar is not None:
+        try:
+            result = await sidecar.predict(_sidecar_encoder.encode(data))
+        except SidecarError as e:
+            logger.warning(f"Inference sidecar failed, scoring in process: {e}")
+            load_in_process()
+        else:
+            return Prediction(float(result.probabilities[0]), result.threshold, result.model_version)
+
+    model = await model_registry.wait_ready(timeout)
+    if model is None:
+        return None
+
+    proba, version = await score_features(model, model.encoder.encode(data))
+    return Prediction(proba, model.threshold, version)
+
+
+async def predict_decided(data: Mapping[str, Any], timeout: float) -> Prediction | None:
+    """
+    Risk band of survey FSM data stopped early by ``survey_decided``, every answer to the skipped questions
+    gives the same one. Only the bounds of the probability are returned, the probability itself is unknown.
+    """
+    model = await model_registry.wait_ready(timeout)
+    if model is None:
+        return None
+
+    bounds = await asyncio.to_thread(probability_range, model, data, settings.ml.adaptive_max_combinations)
+    if bounds is None or len({RiskBand.from_probability(i, model.threshold) for i in bounds}) != 1:
+        msg = f"Survey is not decided by {model.version}"
+        raise ValueError(msg)
+
+    return Prediction(None, model.threshold, model.version, bounds)
+
+
+async def survey_decided(data: Mapping[str, Any]) -> bool:
+    """True if no answers to the remaining questions can change the risk band of survey FSM data"""
+    model = model_registry.current
+    if not settings.ml.adaptive_survey or model is None:
+        return False
+
+    return await asyncio.to_thread(is_decided, model, data, settings.ml.adaptive_max_combinations)
@@ -0,0 +1,330 @@
+"""
+Inference sidecar, a process that owns the model and scores surveys for bot processes over a Unix socket.
+
+Usage:
+    python -m bot.ml.sidecar [--socket /run/bot/inference.sock]
+
+Every message is a ``HEADER`` (op, request id, payload length, rows) followed by the payload. A predict
+request carries ``rows x len(FEATURE_COLUMNS)`` little-endian float64 features in ``FEATURE_COLUMNS`` order,
+the result carries a float64 probability per row, the float64 threshold and the UTF-8 model version.
+Rows of all connections are scored together by the micro-batching inference executor.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import logging
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from bot.ml.features import FEATURE_COLUMNS
+from bot.ml.registry import LoadedModel, ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<BIII")
+FLOAT = np.dtype("<f8")
+MAX_PAYLOAD = 1 << 24
+
+OP_PREDICT = 1
+OP_RESULT = 2
+OP_ERROR = 3
+
+
+class SidecarError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class SidecarResult:
+    probabilities: np.ndarray
+    threshold: float
+    model_version: str
+
+
+def pack(op: int, request_id: int, payload: bytes = b"", rows: int = 0) -> bytes:
+    return HEADER.pack(op, request_id, len(payload), rows) + payload
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[int, int, int, bytes]:
+    """Reads one message, returns its op, request id, rows and payload"""
+    op, request_id, length, rows = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_PAYLOAD:
+        msg = f"Message of {length} bytes is too large"
+        raise SidecarError(msg)
+    return op, request_id, rows, await reader.readexactly(length)
+
+
+def pack_result(probabilities: np.ndarray, threshold: float, model_version: str) -> bytes:
+    return (
+        np.asarray(probabilities, dtype=FLOAT).tobytes()
+        + np.asarray(threshold, dtype=FLOAT).tobytes()
+        + model_version.encode()
+    )
+
+
+def unpack_result(rows: int, payload: bytes) -> SidecarResult:
+    size = (rows + 1) * FLOAT.itemsize
+    values = np.frombuffer(payload[:size], dtype=FLOAT)
+    return SidecarResult(values[:rows], float(values[rows]), payload[size:].decode())
+
+
+class SidecarServer:
+    """Serves predictions of the active model of ``registry``, every row is scored with ``score``"""
+
+    def __init__(
+        self,
+        path: Path,
+        registry: ModelRegistry,
+        score: Callable[[LoadedModel, np.ndarray], Awaitable[tuple[float, str]]],
+    ) -> None:
+        self.path = path
+        self.registry = registry
+        self.score = score
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.Task[None]] = set()
+
+    async def start(self) -> None:
+        self.path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.path))
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        self.path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        running: set[asyncio.Task[None]] = set()
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+
+        try:
+            while True:
+                op, request_id, rows, payload = await read_message(reader)
+                task = asyncio.create_task(self._reply(writer, op, request_id, rows, payload))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except SidecarError as e:
+            logger.warning("Closing sidecar connection: %s", e)
+        finally:
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+            writer.close()
+            self._connections.discard(connection)
+
+    async def _reply(self, writer: asyncio.StreamWriter, op: int, request_id: int, rows: int, payload: bytes) -> None:
+        try:
+            message = pack(OP_RESULT, request_id, await self._predict(op, rows, payload), rows)
+        except Exception as e:
+            message = pack(OP_ERROR, request_id, str(e).encode())
+
+        if writer.is_closing():
+            return
+
+        writer.write(message)
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+
+    async def _predict(self, op: int, rows: int, payload: bytes) -> bytes:
+        if op != OP_PREDICT:
+            msg = f"Unknown op {op}"
+            raise SidecarError(msg)
+
+        model = self.registry.current
+        if model is None:
+            msg = "ML model is not loaded yet"
+            raise SidecarError(msg)
+
+        columns = len(FEATURE_COLUMNS)
+        if len(payload) != rows * columns * FLOAT.itemsize:
+            msg = f"Expected {rows} rows of {columns} features"
+            raise SidecarError(msg)
+
+        # Clients encode in FEATURE_COLUMNS order, the model may expect another one
+        order = [FEATURE_COLUMNS.index(i) for i in model.encoder.columns]
+        matrix = np.frombuffer(payload, dtype=FLOAT).reshape(rows, columns)[:, order]
+
+        results = await asyncio.gather(*(self.score(model, matrix[n : n + 1]) for n in range(rows)))
+        probabilities = [proba for proba, _ in results]
+        # One version per reply, a batch partly answered by the surrogate is reported as the surrogate one
+        versions = [version for _, version in results if version != model.version]
+        return pack_result(np.asarray(probabilities), model.threshold, versions[0] if versions else model.version)
+
+
+class SidecarClient:
+    """
+    Multiplexes predict requests over one connection to the sidecar.
+
+    Every failure is raised as ``SidecarError`` so callers can fall back to in-process scoring. After a failed
+    connection attempt the sidecar is considered down for ``retry_interval`` seconds.
+    """
+
+    def __init__(self, path: Path, timeout: float = 0.5, retry_interval: float = 5.0) -> None:
+        self.path = path
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._pending: dict[int, asyncio.Future[SidecarResult]] = {}
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+        self._retry_at = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def predict(self, matrix: np.ndarray) -> SidecarResult:
+        """Scores rows encoded in ``FEATURE_COLUMNS`` order"""
+        await self._connect()
+
+        request_id = next(self._ids) & 0xFFFFFFFF
+        future: asyncio.Future[SidecarResult] = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        message = pack(OP_PREDICT, request_id, np.ascontiguousarray(matrix, dtype=FLOAT).tobytes(), len(matrix))
+
+        try:
+            return await asyncio.wait_for(self._send(message, future), self.timeout)
+        except asyncio.TimeoutError:
+            msg = f"Sidecar did not answer in {self.timeout}s"
+            raise SidecarError(msg) from None
+        except (ConnectionError, OSError) as e:
+            self._disconnect(e)
+            msg = f"Sidecar connection failed: {e}"
+            raise SidecarError(msg) from e
+        finally:
+            self._pending.pop(request_id, None)
+            # The error set by _disconnect after _send gave up is already raised as another one
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    async def _send(self, message: bytes, future: asyncio.Future[SidecarResult]) -> SidecarResult:
+        # The reader may have dropped the connection since _connect returned
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            msg = "Sidecar connection lost before the request was sent"
+            raise SidecarError(msg)
+
+        writer.write(message)
+        await writer.drain()
+        return await future
+
+    async def _connect(self) -> None:
+        if self.connected:
+            return
+
+        async with self._lock:
+            if self.connected:
+                return
+
+            loop = asyncio.get_running_loop()
+            if loop.time() < self._retry_at:
+                msg = "Sidecar is unavailable"
+                raise SidecarError(msg)
+
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(str(self.path)), self.timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                self._retry_at = loop.time() + self.retry_interval
+                msg = f"Cannot connect to sidecar at {self.path}: {e!r}"
+                raise SidecarError(msg) from e
+
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read(reader), name="sidecar-reader")
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                op, request_id, rows, payload = await read_message(reader)
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+
+                if op == OP_ERROR:
+                    future.set_exception(SidecarError(payload.decode()))
+                else:
+                    future.set_result(unpack_result(rows, payload))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, SidecarError) as e:
+            self._disconnect(e)
+
+    def _disconnect(self, error: BaseException) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(SidecarError(f"Sidecar connection lost: {error!r}"))
+        self._pending.clear()
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+async def _serve(path: Path) -> None:
+    from bot.ml.service import inference_executor, load_in_process, model_registry, score_features, shared_pool
+
+    load_in_process()
+    server = SidecarServer(path, model_registry, score_features)
+    await server.start()
+    logger.info("Inference sidecar is listening on %s", path)
+
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+        await model_registry.close()
+        await inference_executor.close()
+        if shared_pool is not None:
+            shared_pool.close()
+
+
+def main() -> None:
+    from bot.ml.service import model_registry, preload_model, shared_pool
+    from bot.settings import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", type=Path, default=settings.ml.sidecar_socket)
+    args = parser.parse_args()
+
+    if args.socket is None:
+        parser.error("--socket or MODEL_SIDECAR_SOCKET is required")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if shared_pool is not None:
+        preload_model()
+        shared_pool.start(model_registry.versions)
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args.socket))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Distils the full model into a linear surrogate that answers surveys far from the decision threshold.
+
+Usage:
+    python -m bot.ml.surrogate model/depression_model3.pkl [--samples 50000] [--from-db] [--quantile 0.999]
+
+The surrogate is a ridge regression of the full model's logit on one-hot answers. Its error on held-out
+surveys gives a margin: when the surrogate logit is further than the margin from the threshold, both
+models are on the same side of it and the surrogate probability is returned, otherwise the full model is run.
+The fitted surrogate is written next to the artifact and loaded by the model registry with it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from bot.ml.features import FeatureEncoder, sample_answers
+
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-9
+
+
+def surrogate_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.surrogate.npz")
+
+
+def surrogate_version(version: str) -> str:
+    """Version stored with probabilities answered by the surrogate of model ``version``"""
+    return f"{version}+surrogate"
+
+
+def _logit(p: np.ndarray) -> np.ndarray:
+    p = np.clip(p, EPSILON, 1 - EPSILON)
+    return np.log(p / (1 - p))
+
+
+@dataclass
+class Surrogate:
+    """
+    Linear model over the matrix built by ``FeatureEncoder(columns)``.
+
+    ``categorical`` holds the encoder column and the number of categories of every one-hot block,
+    ``numeric`` the encoder column, mean and scale of every standardized column.
+    """
+
+    columns: tuple[str, ...]
+    threshold: float
+    source_version: str
+    margin: float
+    categorical: np.ndarray
+    numeric: np.ndarray
+    coef: np.ndarray
+    intercept: float
+    _threshold_logit: float = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._threshold_logit = float(_logit(np.array(self.threshold)))
+
+    @classmethod
+    def layout(cls, encoder: FeatureEncoder, matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """One-hot blocks of categorical columns and scales of the numeric columns that vary in ``matrix``"""
+        categorical, numeric = [], []
+
+        for n, feature in enumerate(encoder.features):
+            if feature.categories is not None:
+                categorical.append((n, len(feature.categories)))
+            elif feature.dtype != "object":
+                column = matrix[:, n]
+                std = float(np.nanstd(column))
+                if std > 0:
+                    numeric.append((n, float(np.nanmean(column)), std))
+
+        return (
+            np.array(categorical, dtype=np.float64).reshape(-1, 2),
+            np.array(numeric, dtype=np.float64).reshape(-1, 3),
+        )
+
+    @staticmethod
+    def design(matrix: np.ndarray, categorical: np.ndarray, numeric: np.ndarray) -> np.ndarray:
+        blocks = [
+            (matrix[:, int(n), None] == np.arange(int(size))).astype(np.float64) for n, size in categorical
+        ]
+        if len(numeric):
+            index = numeric[:, 0].astype(np.intp)
+            blocks.append(np.nan_to_num((matrix[:, index] - numeric[:, 1]) / numeric[:, 2]))
+        return np.hstack(blocks)
+
+    def logit(self, matrix: np.ndarray) -> np.ndarray:
+        return self.design(matrix, self.categorical, self.numeric) @ self.coef + self.intercept
+
+    def decide(self, matrix: np.ndarray) -> np.ndarray:
+        """Probabilities of the rows the surrogate is sure about, NaN for the ones the full model must score"""
+        z = self.logit(matrix)
+        return np.where(np.abs(z - self._threshold_logit) > self.margin, 1.0 / (1.0 + np.exp(-z)), np.nan)
+
+    def save(self, path: Path) -> None:
+        np.savez(
+            path,
+            columns=np.array(self.columns),
+            threshold=np.array(self.threshold),
+            source_version=np.array(self.source_version),
+            margin=np.array(self.margin),
+            categorical=self.categorical,
+            numeric=self.numeric,
+            coef=self.coef,
+            intercept=np.array(self.intercept),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> Surrogate:
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                columns=tuple(str(i) for i in data["columns"]),
+                threshold=float(data["threshold"]),
+                source_version=str(data["source_version"]),
+                margin=float(data["margin"]),
+                categorical=data["categorical"],
+                numeric=data["numeric"],
+                coef=data["coef"],
+                intercept=float(data["intercept"]),
+            )
+
+
+def fit_surrogate(
+    encoder: FeatureEncoder,
+    matrix: np.ndarray,
+    proba: np.ndarray,
+    threshold: float,
+    source_version: str,
+    quantile: float = 0.999,
+    alpha: float = 1.0,
+    holdout: float = 0.2,
+    seed: int = 0,
+) -> Surrogate:
+    """Fits the surrogate on encoded rows and full model probabilities, the margin is taken on a held-out part"""
+    categorical, numeric = Surrogate.layout(encoder, matrix)
+    x = Surrogate.design(matrix, categorical, numeric)
+    z = _logit(proba)
+
+    order = np.random.default_rng(seed).permutation(len(x))
+    split = max(int(len(x) * (1 - holdout)), 1)
+    train, test = order[:split], order[split:]
+
+    mean_x, mean_z = x[train].mean(axis=0), z[train].mean()
+    xc = x[train] - mean_x
+    coef = np.linalg.solve(xc.T @ xc + alpha * np.eye(x.shape[1]), xc.T @ (z[train] - mean_z))
+    intercept = float(mean_z - mean_x @ coef)
+
+    errors = np.abs(x[test] @ coef + intercept - z[test]) if len(test) else np.array([np.inf])
+    return Surrogate(
+        columns=encoder.columns,
+        threshold=threshold,
+        source_version=source_version,
+        margin=float(np.quantile(errors, quantile)),
+        categorical=categorical,
+        numeric=numeric,
+        coef=coef,
+        intercept=intercept,
+    )
+
+
+def evaluate(
+    surrogate: Surrogate,
+    score: Callable[[np.ndarray], np.ndarray],
+    matrix: np.ndarray,
+    repeats: int = 200,
+) -> dict[str, float]:
+    """Agreement with the full model, share of rows answered by the surrogate and the single-row speedup"""
+    decided = surrogate.decide(matrix)
+    sure = ~np.isnan(decided)
+    full = score(matrix)
+    agree = (decided[sure] >= surrogate.threshold) == (full[sure] >= surrogate.threshold)
+
+    rows = [matrix[n : n + 1] for n in range(min(repeats, len(matrix)))]
+    timings = {}
+    for name, fn in (("full", score), ("surrogate", surrogate.decide)):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        timings[name] = (time.perf_counter() - start) / len(rows)
+
+    coverage = float(sure.mean())
+    average = timings["surrogate"] + (1 - coverage) * timings["full"]
+    return {
+        "agreement": float(agree.mean()) if agree.size else math.nan,
+        "coverage": coverage,
+        "full_ms": timings["full"] * 1000,
+        "surrogate_ms": timings["surrogate"] * 1000,
+        "speedup": timings["full"] / average,
+    }
+
+
+async def _stored_matrix(encoder: FeatureEncoder, chunk_size: int = 5000) -> np.ndarray:
+    """Encoded stored responses with every question answered, surveys stopped early have no full model score"""
+    from bot.database import engine, get_repo
+    from bot.ml.adaptive import answered_rows
+
+    parts, after_id = [], 0
+    try:
+        async with get_repo() as repo:
+            while chunk := await repo.survey_responses.get_chunk_after(after_id, chunk_size, *encoder.stored_columns):
+                matrix = encoder.encode_stored([i._mapping for i in chunk])
+                parts.append(matrix[answered_rows(encoder, matrix)])
+                after_id = chunk[-1].id
+    finally:
+        await engine.dispose()
+
+    return np.vstack(parts) if parts else np.empty((0, len(encoder.columns)))
+
+
+def main() -> None:
+    from bot.ml.registry import load_model
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("artifact", type=Path)
+    parser.add_argument("-o", "--output", type=Path, default=None)
+    parser.add_argument("--samples", type=int, default=50000, help="random surveys to distil on")
+    parser.add_argument("--from-db", action="store_true", help="add stored survey responses to the random ones")
+    parser.add_argument("--quantile", type=float, default=0.999, help="quantile of held-out errors used as margin")
+    parser.add_argument("--alpha", type=float, default=1.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    model = load_model(args.artifact, use_compiled=False)
+    matrix = model.encoder.encode_many(sample_answers(args.samples, seed=1))
+    if args.from_db:
+        stored = asyncio.run(_stored_matrix(model.encoder))
+        logger.info("Loaded %s complete stored survey responses", len(stored))
+        matrix = np.vstack([matrix, stored])
+
+    surrogate = fit_surrogate(
+        model.encoder,
+        matrix,
+        model.score(matrix),
+        model.threshold,
+        model.version,
+        quantile=args.quantile,
+        alpha=args.alpha,
+    )
+
+    report = evaluate(surrogate, model.score, model.encoder.encode_many(sample_answers(5000, seed=2)))
+    logger.info(
+        "Margin %.3f logit, agreement %.4f, answered by surrogate %.1f%%, full %.3f ms, surrogate %.3f ms, speedup x%.1f",
+        surrogate.margin,
+        report["agreement"],
+        report["coverage"] * 100,
+        report["full_ms"],
+        report["surrogate_ms"],
+        report["speedup"],
+    )
+
+    output = args.output or surrogate_path(args.artifact)
+    surrogate.save(output)
+    logger.info("Saved surrogate of %s to %s", model.version, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Re-scores stored survey responses with a model artifact and saves the probabilities to survey_response_scores.
+
+Usage:
+    python -m bot.score [--model model/depression_model3.pkl] [--chunk-size 5000] [--processes 4] [--restart] [--apply]
+
+Responses are read in keyset pages by id and every page is saved in one statement, so an interrupted run
+continues after the last saved response of the same model version. With ``--apply`` the new probabilities
+also replace the ones stored on the responses themselves. Responses of surveys stopped early have no
+probability, they are skipped and keep their stored risk band.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from bot.database import engine, get_repo
+from bot.enums.survey import RiskBand
+from bot.ml.adaptive import answered_rows
+from bot.ml.prefork import SharedModelPool
+from bot.ml.registry import LoadedModel, load_model, smoke_test
+from bot.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def _score(model: LoadedModel, matrix: np.ndarray, parts: int) -> np.ndarray:
+    chunks = np.array_split(matrix, max(min(parts, len(matrix)), 1))
+    return np.concatenate(await asyncio.gather(*(asyncio.to_thread(model.predict_proba, i) for i in chunks)))
+
+
+async def rescore(
+    model: LoadedModel,
+    chunk_size: int = 5000,
+    parts: int = 1,
+    restart: bool = False,
+    apply: bool = False,
+) -> int:
+    """Scores every stored response with ``model``, returns the number of scored responses"""
+    columns = model.encoder.stored_columns
+    scored = 0
+
+    async with get_repo() as reader, get_repo() as writer:
+        after_id = 0 if restart else await writer.survey_response_scores.get_last_scored_id(model.version)
+        if after_id:
+            logger.info("Resuming %s after response %s", model.version, after_id)
+
+        start = time.perf_counter()
+        chunk = await reader.survey_responses.get_chunk_after(after_id, chunk_size, *columns)
+
+        while chunk:
+            after_id = chunk[-1].id
+            # The next page is read while this one is scored and saved
+            next_chunk = asyncio.create_task(reader.survey_responses.get_chunk_after(after_id, chunk_size, *columns))
+
+            try:
+                matrix = model.encoder.encode_stored([i._mapping for i in chunk])
+                answered = answered_rows(model.encoder, matrix)
+                rows = [row for row, keep in zip(chunk, answered) if keep]
+                probabilities = await _score(model, matrix[answered], parts) if rows else []
+                await writer.survey_response_scores.save_scores(model.version, [i.id for i in rows], probabilities)
+                if apply:
+                    await writer.survey_responses.update_predictions(
+                        [
+                            {
+                                "id": row.id,
+                                "probability": float(proba),
+                                "risk_band": RiskBand.from_probability(proba, model.threshold).value,
+                                "model_version": model.version,
+                            }
+                            for row, proba in zip(rows, probabilities)
+                        ]
+                    )
+            except BaseException:
+                next_chunk.cancel()
+                raise
+
+            scored += len(rows)
+            logger.info(
+                "%s responses scored, last id %s, %.0f rows/sec",
+                scored,
+                after_id,
+                scored / (time.perf_counter() - start),
+            )
+            chunk = await next_chunk
+
+    return scored
+
+
+async def _run(model: LoadedModel, args: argparse.Namespace) -> int:
+    try:
+        return await rescore(model, args.chunk_size, args.processes, args.restart, args.apply)
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=settings.ml.path)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--restart", action="store_true", help="score from the first response again")
+    parser.add_argument("--apply", action="store_true", help="store the new probabilities on the responses")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    model = load_model(args.model, settings.ml.mmap_mode, settings.ml.use_compiled)
+    smoke_test(model)
+    logger.info("Scoring survey responses with %s", model.version)
+
+    # Workers are forked before the event loop starts, sharing the loaded model
+    pool = SharedModelPool(args.processes) if args.processes > 1 else None
+    if pool is not None:
+        pool.start([model])
+
+    try:
+        start = time.perf_counter()
+        scored = asyncio.run(_run(model, args))
+    finally:
+        if pool is not None:
+            pool.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info("Scored %s responses in %.1fs (%.0f rows/sec)", scored, elapsed, scored / elapsed if elapsed else 0)
+
+
+if __name__ == "__main__":
+    main()
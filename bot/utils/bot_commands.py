@@ -10,7 +10,9 @@ async def set_commands(bot: Bot):
     ]
 
     admin_commands = [
-        BotCommand(command="botinfo", description="ℹ️ Bot Information")
+        BotCommand(command="botinfo", description="ℹ️ Bot Information"),
+        BotCommand(command="reload_model", description="🔄 Reload ML model"),
+        BotCommand(command="rollback_model", description="↩️ Rollback ML model"),
     ]
 
     await bot.set_my_commands(commands, BotCommandScopeDefault())
@@ -1,6 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
 from aiogram.filters.callback_data import CallbackData
 
+CURSOR_FORMAT = "%Y%m%d%H%M%S%f"
+
 
 class MyCallback(CallbackData, prefix="my"):
     test: int
     test1: str
+
+
+class SurveyPage(CallbackData, prefix="surveys"):
+    """Page of /my_surveys, the keyset cursor is the (created_at, id) of the row next to the page"""
+
+    created_at: str = ""
+    id: int = 0
+    backward: bool = False
+
+    @classmethod
+    def after(cls, row: tuple[datetime, int] | None, backward: bool = False) -> SurveyPage:
+        if row is None:
+            return cls()
+        return cls(created_at=row[0].strftime(CURSOR_FORMAT), id=row[1], backward=backward)
+
+    @property
+    def cursor(self) -> tuple[datetime, int] | None:
+        if not self.created_at:
+            return None
+        return datetime.strptime(self.created_at, CURSOR_FORMAT), self.id
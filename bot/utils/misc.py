@@ -10,7 +10,14 @@ from typing import Any
 import aiogram
 import psutil
 
-from bot.database import get_repo
+from bot.database import engine, get_repo
+from bot.database.engine import replica_monitor
+from bot.database.pool import pool_status
+from bot.database.query_cache import query_cache
+from bot.database.user_cache import user_cache
+from bot.messages import DB_POOL_INFO, DB_QUERY_CACHE_INFO, DB_REPLICA_INFO, MODEL_VERSION_INFO, PROCESS_MEMORY_INFO
+from bot.ml.prefork import memory_report
+from bot.ml.service import model_registry, prediction_cache, shared_pool
 
 time_st = time.perf_counter()
 
@@ -52,6 +59,19 @@ async def bot_info_dict() -> dict[str, Any]:
         "process_ram_percent" "process_cpu_percent": "n/a",
         "bot_working": formatted_uptime(),
         "users_in_db": 0,
+        "db_pool": "",
+        "db_query_cache": "",
+        "db_replica": "",
+        "user_cache_hits": 0,
+        "user_cache_redis_hits": 0,
+        "user_cache_misses": 0,
+        "user_cache_hit_ratio": 0.0,
+        "model_versions": "n/a",
+        "process_memory": "n/a",
+        "cache_hits": 0,
+        "cache_redis_hits": 0,
+        "cache_misses": 0,
+        "cache_hit_ratio": 0.0,
     }
 
     with contextlib.suppress(Exception):
@@ -101,6 +121,58 @@ async def bot_info_dict() -> dict[str, Any]:
     with contextlib.suppress(Exception):
         inf["process_cpu_percent"] = round(process.cpu_percent(), 1)
 
+    with contextlib.suppress(Exception):
+        inf["process_memory"] = "".join(
+            PROCESS_MEMORY_INFO.format(
+                name=i.name,
+                pid=i.pid,
+                unique=bytes_to_megabytes(i.uss),
+                shared=bytes_to_megabytes(i.shared),
+                pss=bytes_to_megabytes(i.pss),
+            )
+            for i in memory_report(shared_pool.pids() if shared_pool is not None else ())
+        )
+
+    if model_registry.versions:
+        inf["model_versions"] = "".join(
+            MODEL_VERSION_INFO.format(
+                marker="🟢" if model is model_registry.current else "⚪️",
+                version=model.version,
+                loaded_at=model.loaded_at.strftime("%d.%m.%Y %H:%M"),
+                calls=model.stats.calls,
+                rows=model.stats.rows,
+                avg_latency_ms=model.stats.avg_latency_ms,
+                surrogate_hits=model.stats.surrogate_hits,
+            )
+            for model in model_registry.versions
+        )
+
+    cache = prediction_cache.stats()
+    inf["cache_hits"] = cache["hits"]
+    inf["cache_redis_hits"] = cache["redis_hits"]
+    inf["cache_misses"] = cache["misses"]
+    inf["cache_hit_ratio"] = cache["hit_ratio"]
+
+    users = user_cache.stats()
+    inf["user_cache_hits"] = users["hits"]
+    inf["user_cache_redis_hits"] = users["redis_hits"]
+    inf["user_cache_misses"] = users["misses"]
+    inf["user_cache_hit_ratio"] = users["hit_ratio"]
+
+    if query_cache is not None:
+        queries = query_cache.stats()
+        inf["db_query_cache"] = DB_QUERY_CACHE_INFO.format(kb=round(queries["bytes"] / 1024, 1), **queries)
+
+    pool = pool_status(engine.pool)
+    if pool is not None:
+        inf["db_pool"] = DB_POOL_INFO.format(**pool)
+
+    if replica_monitor is not None:
+        inf["db_replica"] = DB_REPLICA_INFO.format(
+            state="in use" if replica_monitor.available else "not used",
+            lag="n/a" if replica_monitor.lag is None else round(replica_monitor.lag, 1),
+        )
+
     async with get_repo() as repo:
         inf["users_in_db"] = await repo.users.get_all(count=True)
 
@@ -0,0 +1,60 @@
+"""initial
+
+Revision ID: 36d8e52693ec
+Revises: 
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '36d8e52693ec'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('username', sa.String(length=32), nullable=False),
+        sa.Column('is_admin', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'survey_responses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=True),
+        sa.Column('gender', sa.String(), nullable=True),
+        sa.Column('course', sa.String(), nullable=True),
+        sa.Column('gpa', sa.Float(), nullable=True),
+        sa.Column('stress_level', sa.Integer(), nullable=True),
+        sa.Column('anxiety_score', sa.Integer(), nullable=True),
+        sa.Column('sleep_quality', sa.String(), nullable=True),
+        sa.Column('physical_activity', sa.String(), nullable=True),
+        sa.Column('diet_quality', sa.String(), nullable=True),
+        sa.Column('social_support', sa.String(), nullable=True),
+        sa.Column('relationship_status', sa.String(), nullable=True),
+        sa.Column('substance_use', sa.String(), nullable=True),
+        sa.Column('counseling_service_use', sa.String(), nullable=True),
+        sa.Column('family_history', sa.String(), nullable=True),
+        sa.Column('chronic_illness', sa.String(), nullable=True),
+        sa.Column('financial_stress', sa.Integer(), nullable=True),
+        sa.Column('extracurricular_involvement', sa.String(), nullable=True),
+        sa.Column('semester_credit_load', sa.Integer(), nullable=True),
+        sa.Column('residence_type', sa.String(), nullable=True),
+        sa.Column('bot_rating', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('survey_responses')
+    op.drop_table('users')
@@ -0,0 +1,36 @@
+"""survey response prediction
+
+Revision ID: 3a68c3c588ea
+Revises: 4ad14d4e32fc
+Create Date: 2026-10-18 10:21:54.802617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3a68c3c588ea'
+down_revision: Union[str, None] = '4ad14d4e32fc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('survey_responses', sa.Column('probability', sa.Float(), nullable=True))
+    op.add_column('survey_responses', sa.Column('risk_band', sa.String(length=16), nullable=True))
+    op.add_column('survey_responses', sa.Column('model_version', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_survey_responses_model_version_risk_band',
+        'survey_responses',
+        ['model_version', 'risk_band', 'probability'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_survey_responses_model_version_risk_band', table_name='survey_responses')
+    op.drop_column('survey_responses', 'model_version')
+    op.drop_column('survey_responses', 'risk_band')
+    op.drop_column('survey_responses', 'probability')
@@ -0,0 +1,35 @@
+"""survey response scores
+
+Revision ID: 4ad14d4e32fc
+Revises: 36d8e52693ec
+Create Date: 2026-10-18 09:40:07.551932
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '4ad14d4e32fc'
+down_revision: Union[str, None] = '36d8e52693ec'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'survey_response_scores',
+        sa.Column('response_id', sa.Integer(), nullable=False),
+        sa.Column('model_version', sa.String(length=64), nullable=False),
+        sa.Column('probability', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['response_id'], ['survey_responses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('response_id', 'model_version'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('survey_response_scores')
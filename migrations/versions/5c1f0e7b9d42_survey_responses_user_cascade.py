@@ -0,0 +1,36 @@
+"""survey responses user cascade
+
+Revision ID: 5c1f0e7b9d42
+Revises: 3a68c3c588ea
+Create Date: 2026-10-18 14:02:11.408315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5c1f0e7b9d42'
+down_revision: Union[str, None] = '3a68c3c588ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _foreign_key_name() -> str:
+    # The constraint was created unnamed, these are the names PostgreSQL and MySQL gave it
+    return 'survey_responses_ibfk_1' if op.get_bind().dialect.name == 'mysql' else 'survey_responses_user_id_fkey'
+
+
+def _recreate_foreign_key(ondelete: Union[str, None]) -> None:
+    name = _foreign_key_name()
+    op.drop_constraint(name, 'survey_responses', type_='foreignkey')
+    op.create_foreign_key(name, 'survey_responses', 'users', ['user_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _recreate_foreign_key('CASCADE')
+
+
+def downgrade() -> None:
+    _recreate_foreign_key(None)
@@ -0,0 +1,30 @@
+"""survey responses user created_at index
+
+Revision ID: 7e2b4d9a1c63
+Revises: 5c1f0e7b9d42
+Create Date: 2026-10-18 15:37:42.119804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7e2b4d9a1c63'
+down_revision: Union[str, None] = '5c1f0e7b9d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_survey_responses_user_id_created_at',
+        'survey_responses',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_survey_responses_user_id_created_at', table_name='survey_responses')
@@ -0,0 +1,112 @@
+"""survey responses enum codes
+
+Revision ID: 9b3e6f2a8d17
+Revises: 7e2b4d9a1c63
+Create Date: 2026-10-18 17:25:40.512973
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9b3e6f2a8d17'
+down_revision: Union[str, None] = '7e2b4d9a1c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+QUALITY = ('Poor', 'Average', 'Good')
+YES_NO = ('No', 'Yes')
+
+# Values of the enums in bot/enums/survey.py at this revision, a code is the position of the value
+COLUMNS: dict[str, tuple[str, ...]] = {
+    'gender': ('Male', 'Female'),
+    'course': ('Engineering', 'Business'),
+    'sleep_quality': QUALITY,
+    'physical_activity': ('Low', 'Medium', 'High'),
+    'diet_quality': QUALITY,
+    'social_support': ('Weak', 'Moderate', 'Strong'),
+    'relationship_status': ('Single', 'InaRelationship', 'Married'),
+    'substance_use': YES_NO,
+    'counseling_service_use': YES_NO,
+    'family_history': YES_NO,
+    'chronic_illness': YES_NO,
+    'extracurricular_involvement': ('Low', 'Moderate', 'High'),
+    'residence_type': ('Yes', 'No', 'WithFamily'),
+    'risk_band': ('Low', 'High'),
+}
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _case(column: str, pairs: Sequence[tuple[str, str]]) -> str:
+    whens = ' '.join(f'WHEN {old} THEN {new}' for old, new in pairs)
+    return f'CASE {column} {whens} END'
+
+
+def _check_values() -> None:
+    bind = op.get_bind()
+    unknown = {}
+    for column, values in COLUMNS.items():
+        rows = bind.execute(
+            sa.text(
+                f'SELECT DISTINCT {column} FROM survey_responses '
+                f'WHERE {column} IS NOT NULL AND {column} NOT IN ({", ".join(map(_quote, values))})'
+            )
+        ).scalars().all()
+        if rows:
+            unknown[column] = rows
+
+    if unknown:
+        msg = f'survey_responses has values without a code, map them first: {unknown}'
+        raise RuntimeError(msg)
+
+
+def _convert(codes: bool) -> None:
+    """Rewrites the table once, values to codes if ``codes``, otherwise back"""
+    postgres = op.get_bind().dialect.name != 'mysql'
+
+    def pairs(values: tuple[str, ...], literal) -> list[tuple[str, str]]:
+        mapping = [(_quote(v), literal(n)) for n, v in enumerate(values)]
+        return mapping if codes else [(new, old) for old, new in mapping]
+
+    def column_type(column: str) -> str:
+        if codes:
+            return 'SMALLINT'
+        return 'VARCHAR(16)' if column == 'risk_band' else 'VARCHAR' if postgres else 'VARCHAR(255)'
+
+    if postgres:
+        op.execute(
+            'ALTER TABLE survey_responses '
+            + ', '.join(
+                f'ALTER COLUMN {column} TYPE {column_type(column)} USING '
+                + _case(column, pairs(values, str))
+                for column, values in COLUMNS.items()
+            )
+        )
+        return
+
+    # MySQL casts the column itself, codes are written as text before it becomes SMALLINT
+    update = 'UPDATE survey_responses SET ' + ', '.join(
+        f'{column} = ' + _case(column, pairs(values, lambda n: _quote(str(n)))) for column, values in COLUMNS.items()
+    )
+    if codes:
+        op.execute(update)
+    op.execute(
+        'ALTER TABLE survey_responses '
+        + ', '.join(f'MODIFY {column} {column_type(column)} NULL' for column in COLUMNS)
+    )
+    if not codes:
+        op.execute(update)
+
+
+def upgrade() -> None:
+    _check_values()
+    _convert(codes=True)
+
+
+def downgrade() -> None:
+    _convert(codes=False)
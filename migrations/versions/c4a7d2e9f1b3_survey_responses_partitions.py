@@ -0,0 +1,112 @@
+"""survey responses partitions
+
+Revision ID: c4a7d2e9f1b3
+Revises: 9b3e6f2a8d17
+Create Date: 2026-10-18 19:02:57.804116
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c4a7d2e9f1b3'
+down_revision: Union[str, None] = '9b3e6f2a8d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead, later ones are created by python -m bot.database.partitions
+AHEAD = 3
+
+
+def _add_months(month: date, n: int) -> date:
+    year, index = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(year, index + 1, 1)
+
+
+def _scores_foreign_key() -> str:
+    return 'survey_response_scores_ibfk_1' if op.get_bind().dialect.name == 'mysql' else 'survey_response_scores_response_id_fkey'
+
+
+def _create_indexes_and_keys(primary_key: Sequence[str]) -> None:
+    op.create_primary_key('survey_responses_pkey', 'survey_responses', list(primary_key))
+    op.create_foreign_key(
+        'survey_responses_user_id_fkey', 'survey_responses', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_index(
+        'ix_survey_responses_model_version_risk_band',
+        'survey_responses',
+        ['model_version', 'risk_band', 'probability'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_survey_responses_user_id_created_at',
+        'survey_responses',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def _rebuild(partitioned: bool) -> None:
+    """Copies survey_responses to a new table, partitioned by month or not, keeping its id sequence"""
+    bind = op.get_bind()
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('survey_responses', 'id')")).scalar()
+
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+    op.execute('ALTER TABLE survey_responses RENAME TO survey_responses_old')
+    op.execute(
+        'CREATE TABLE survey_responses (LIKE survey_responses_old INCLUDING DEFAULTS)'
+        + (' PARTITION BY RANGE (created_at)' if partitioned else '')
+    )
+
+    if partitioned:
+        first = bind.execute(sa.text('SELECT min(created_at) FROM survey_responses_old')).scalar()
+        month = (first.date() if first else date.today()).replace(day=1)
+        last = _add_months(date.today().replace(day=1), AHEAD)
+        while month <= last:
+            end = _add_months(month, 1)
+            op.execute(
+                f'CREATE TABLE survey_responses_y{month.year:04d}m{month.month:02d} PARTITION OF survey_responses '
+                f"FOR VALUES FROM ('{month}') TO ('{end}')"
+            )
+            month = end
+        op.execute('CREATE TABLE survey_responses_default PARTITION OF survey_responses DEFAULT')
+
+    op.execute('INSERT INTO survey_responses SELECT * FROM survey_responses_old')
+    op.execute('DROP TABLE survey_responses_old')
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY survey_responses.id')
+
+    # Keys and indexes are built once the rows are copied, on every partition
+    _create_indexes_and_keys(['id', 'created_at'] if partitioned else ['id'])
+
+
+def upgrade() -> None:
+    # A foreign key can not reference the partitioned table, scores are deleted by the application
+    op.drop_constraint(_scores_foreign_key(), 'survey_response_scores', type_='foreignkey')
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _rebuild(partitioned=True)
+    elif dialect == 'mysql':
+        # Not partitioned, but keyed like the model, id stays first so it can keep AUTO_INCREMENT
+        op.execute('ALTER TABLE survey_responses DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)')
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        _rebuild(partitioned=False)
+    elif dialect == 'mysql':
+        op.execute('ALTER TABLE survey_responses DROP PRIMARY KEY, ADD PRIMARY KEY (id)')
+
+    op.execute('DELETE FROM survey_response_scores WHERE response_id NOT IN (SELECT id FROM survey_responses)')
+    op.create_foreign_key(
+        _scores_foreign_key(),
+        'survey_response_scores',
+        'survey_responses',
+        ['response_id'],
+        ['id'],
+        ondelete='CASCADE',
+    )
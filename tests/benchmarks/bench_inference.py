@@ -0,0 +1,142 @@
+"""
+Latency benchmark of feature encoding + predict_proba.
+
+Usage:
+    python -m tests.benchmarks.bench_inference [--model model/depression_model3.pkl] [--output bench.json]
+    python -m tests.benchmarks.bench_inference --baseline bench.json --tolerance 0.25
+
+Every scoring path is timed on the same seeded synthetic FSM answers for batch sizes 1..1024:
+``pandas`` encodes, rebuilds the DataFrame and calls the sklearn pipeline, ``compiled`` encodes and scores
+with the NumPy evaluator. Results are written as JSON. With ``--baseline`` the run fails if the p50 of any
+path and batch size is slower than the baseline by more than ``--tolerance``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from bot.ml.compiled import CompileError, compile_pipeline
+from bot.ml.features import FeatureEncoder
+from tests.utils.ml import build_model, random_answers
+
+BATCH_SIZES = tuple(2**i for i in range(11))
+PERCENTILES = (50, 95, 99)
+
+Score = Callable[[Sequence[dict[str, Any]]], np.ndarray]
+
+
+def _load(path: Path | None) -> tuple[dict[str, Any], str]:
+    if path is None:
+        return build_model(seed=0), "synthetic"
+
+    import joblib
+
+    from bot.ml.registry import artifact_version
+
+    return joblib.load(path), artifact_version(path)
+
+
+def scoring_paths(artifact: dict[str, Any]) -> dict[str, Score]:
+    pipeline = artifact["model"]
+    encoder = FeatureEncoder.for_model(pipeline)
+    paths = {"pandas": lambda rows: pipeline.predict_proba(encoder.to_frame(encoder.encode_many(rows)))[:, 1]}
+
+    try:
+        compiled = compile_pipeline(pipeline, float(artifact.get("threshold", 0.5)))
+    except CompileError as e:
+        sys.stderr.write(f"compiled path skipped: {e}\n")
+    else:
+        paths["compiled"] = lambda rows: compiled.predict_proba(encoder.encode_many(rows))
+
+    return paths
+
+
+def measure(score: Score, rows: Sequence[dict[str, Any]], repeats: int) -> dict[str, float]:
+    for _ in range(max(repeats // 10, 3)):
+        score(rows)
+
+    timings = np.empty(repeats)
+    gc.disable()
+    try:
+        for n in range(repeats):
+            start = time.perf_counter()
+            score(rows)
+            timings[n] = time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    result = {f"p{i}_ms": float(np.percentile(timings, i) * 1000) for i in PERCENTILES}
+    result["rows_per_sec"] = float(len(rows) / np.median(timings))
+    return result
+
+
+def run(artifact: dict[str, Any], model_version: str, repeats: int, seed: int) -> dict[str, Any]:
+    answers = random_answers(max(BATCH_SIZES), seed)
+    results: dict[str, dict[str, Any]] = {}
+
+    for name, score in scoring_paths(artifact).items():
+        results[name] = {}
+        for size in BATCH_SIZES:
+            # Fewer repeats for big batches, so every size takes roughly the same time
+            results[name][str(size)] = measure(score, answers[:size], max(repeats // size, 20))
+
+    return {
+        "model_version": model_version,
+        "seed": seed,
+        "repeats": repeats,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "results": results,
+    }
+
+
+def regressions(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    found = []
+    for name, sizes in report["results"].items():
+        for size, stats in sizes.items():
+            before = baseline["results"].get(name, {}).get(size)
+            if before and stats["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+                found.append(f"{name} batch {size}: p50 {before['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms")
+    return found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", type=Path, default=None, help="artifact to benchmark, a synthetic model by default")
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    artifact, model_version = _load(args.model)
+    report = run(artifact, model_version, args.repeats, args.seed)
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        sys.stdout.write(output + "\n")
+    else:
+        args.output.write_text(output)
+
+    if args.baseline is not None:
+        found = regressions(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for i in found:
+            sys.stderr.write(f"regression: {i}\n")
+        if found:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
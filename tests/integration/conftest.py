@@ -9,6 +9,7 @@ from aiogram import Dispatcher
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.database import Repositories
+from bot.database.engine import _create_engine, build_url, sessionmaker
 from bot.database.models import Base
 
 from bot.settings import settings
@@ -17,9 +18,12 @@ from tests.utils.mocked_bot import MockedBot
 
 if settings.db.test_name:
     settings.db.name = settings.db.test_name
+# Every test runs in its own event loop, asyncpg connections can not outlive it
+settings.db.pool_size = 0
 
-
-from bot.database.engine import engine, sessionmaker
+# bot.database built its engine on import, with the pool and database of the settings at that time
+engine = _create_engine(build_url())
+sessionmaker.configure(bind=engine)
 
 
 async def create_tables() -> None:
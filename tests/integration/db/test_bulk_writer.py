@@ -0,0 +1,20 @@
+from bot.database import Repositories
+from bot.database.bulk_writer import BulkWriter
+from bot.database.engine import sessionmaker
+from bot.database.models import SurveyResponse
+from tests.integration.db.data import TEST_USER
+from tests.utils.ml import random_answers, stored_response
+
+
+async def test_rows_are_inserted_in_one_flush(repo: Repositories):
+    if await repo.users.get(TEST_USER.id) is None:
+        await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+
+    writer = BulkWriter(sessionmaker, SurveyResponse, max_rows=100, interval=60)
+    futures = [writer.add({"user_id": TEST_USER.id, **stored_response(i)}) for i in random_answers(5)]
+    await writer.close()
+
+    ids = [i.result() for i in futures]
+    assert writer.flushes == 1
+    assert ids == sorted(ids)
+    assert all([await repo.survey_responses.get_by_id(i) for i in ids])
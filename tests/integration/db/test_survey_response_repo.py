@@ -0,0 +1,157 @@
+from bot.database import Repositories
+from bot.ml.features import FeatureEncoder
+from tests.integration.db.data import TEST_USER
+from tests.utils.ml import random_answers, stored_response
+
+
+async def test_chunks_and_scores(repo: Repositories):
+    if await repo.users.get(TEST_USER.id) is None:
+        await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+    last = await repo.survey_responses.get_chunk_after(0, 10**6)
+    after_id = last[-1].id if last else 0
+
+    for answers in random_answers(5):
+        await repo.survey_responses.create(user_id=TEST_USER.id, **stored_response(answers))
+    await repo.session.commit()
+
+    columns = FeatureEncoder().stored_columns
+    first = await repo.survey_responses.get_chunk_after(after_id, 3, *columns)
+    second = await repo.survey_responses.get_chunk_after(first[-1].id, 3, *columns)
+
+    assert len(first) == 3
+    assert len(second) == 2
+    assert first[-1].id < second[0].id
+
+    ids = [i.id for i in (*first, *second)]
+    await repo.survey_response_scores.save_scores("test", ids[:3], [0.1, 0.2, 0.3])
+    await repo.survey_response_scores.save_scores("test", ids, [0.5] * 5)
+
+    assert await repo.survey_response_scores.get_last_scored_id("test") == ids[-1]
+    assert await repo.survey_response_scores.get_last_scored_id("other") == 0
+
+
+async def test_update_predictions(repo: Repositories):
+    if await repo.users.get(TEST_USER.id) is None:
+        await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+
+    response = await repo.survey_responses.create(
+        user_id=TEST_USER.id, probability=0.2, risk_band="Low", model_version="old", **stored_response(random_answers(1)[0])
+    )
+    await repo.session.commit()
+
+    await repo.survey_responses.update_predictions(
+        [{"id": response.id, "probability": 0.9, "risk_band": "High", "model_version": "new"}]
+    )
+    await repo.session.refresh(response)
+
+    assert (response.probability, response.risk_band, response.model_version) == (0.9, "High", "new")
+
+
+async def test_history_is_loaded_on_request(repo: Repositories):
+    if await repo.users.get(TEST_USER.id) is None:
+        await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+
+    response = await repo.survey_responses.create(user_id=TEST_USER.id, **stored_response(random_answers(1)[0]))
+    await repo.session.commit()
+
+    listed, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 1)
+    assert listed[0].id == response.id
+    assert set(listed[0]._fields) == {"id", "created_at"}
+
+    repo.session.expunge_all()
+    user = await repo.users.get_with_history(TEST_USER.id)
+    assert response.id in [i.id for i in user.survey_responses]
+
+
+async def test_page_by_user(repo: Repositories):
+    if await repo.users.get(TEST_USER.id) is None:
+        await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+
+    for answers in random_answers(5):
+        await repo.survey_responses.create(user_id=TEST_USER.id, **stored_response(answers))
+    await repo.session.commit()
+
+    newest, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 4)
+    first, more = await repo.survey_responses.page_by_user(TEST_USER.id, 2)
+    assert [i.id for i in first] == [i.id for i in newest[:2]]
+    assert more
+
+    last = first[-1]
+    second, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 2, (last.created_at, last.id))
+    assert [i.id for i in second] == [i.id for i in newest[2:4]]
+
+    head = second[0]
+    back, more = await repo.survey_responses.page_by_user(TEST_USER.id, 2, (head.created_at, head.id), backward=True)
+    assert [i.id for i in back] == [i.id for i in first]
+    assert not more
+
+
+async def test_cached_history_is_invalidated(repo: Repositories):
+    if await repo.users.get(TEST_USER.id) is None:
+        await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+
+    before, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 1)
+    response = await repo.survey_responses.create(user_id=TEST_USER.id, **stored_response(random_answers(1)[0]))
+    await repo.commit()
+
+    listed, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 1)
+    assert listed[0].id == response.id
+
+    assert await repo.survey_responses.delete_response(response.id, TEST_USER.id)
+    assert await repo.survey_responses.get_by_id(response.id) is None
+    listed, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 1)
+    assert [i.id for i in listed] == [i.id for i in before]
+
+
+async def test_cached_history_after_write_is_read_from_primary(monkeypatch):
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    from bot.database.engine import _create_engine, build_url
+    from bot.database.query_cache import QueryCache, RecentWrites
+    from bot.database.replica import ReplicaMonitor, routing_session
+    from bot.database.repos.survey_response import SurveyResponseRepo
+    from tests.integration.conftest import engine
+
+    # The "replica" is the same database, reads that reach it are counted
+    monitor = ReplicaMonitor(_create_engine(build_url()), max_lag=5)
+    monitor.available = True
+    replica_reads = []
+    event.listen(monitor.engine.sync_engine, "before_cursor_execute", lambda *args: replica_reads.append(args[2]))
+
+    cache, writes = QueryCache(ttl=60), RecentWrites(5)
+    monkeypatch.setattr("bot.database.repos.base.query_cache", cache)
+    monkeypatch.setattr("bot.database.repos.base.recent_writes", writes)
+    monkeypatch.setattr("bot.database.replica.recent_writes", writes)
+    monkeypatch.setattr(SurveyResponseRepo.__init__, "__defaults__", (cache,))
+    factory = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=routing_session(engine, monitor))
+
+    async def newest():
+        async with factory() as session:
+            repo = Repositories.get_repo(session)
+            rows, _ = await repo.survey_responses.page_by_user(TEST_USER.id, 1)
+            return [i.id for i in rows]
+
+    try:
+        async with factory() as session:
+            repo = Repositories.get_repo(session)
+            if await repo.users.get(TEST_USER.id) is None:
+                await repo.users.create(id=TEST_USER.id, username=TEST_USER.username)
+
+        await newest()
+        assert len(replica_reads) == 1
+
+        async with factory() as session:
+            repo = Repositories.get_repo(session)
+            response = await repo.survey_responses.create(
+                user_id=TEST_USER.id, **stored_response(random_answers(1)[0])
+            )
+            await repo.commit()
+
+        # Within max_lag of the write the page is read from the primary, and that result is cached
+        assert await newest() == [response.id]
+        assert await newest() == [response.id]
+        assert len(replica_reads) == 1
+        assert cache.hits == 1
+    finally:
+        await monitor.engine.dispose()
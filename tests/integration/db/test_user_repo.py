@@ -17,3 +17,42 @@ async def test_get_user_by_username(repo: Repositories):
     users = await repo.users.get_users_by_username(TEST_USER.username)
 
     assert TEST_USER.id in [i.id for i in users]
+
+
+async def test_upsert_user(repo: Repositories):
+    from aiogram.types import User as AiogramUser
+
+    aiogram_user = AiogramUser(id=TEST_USER.id + 1, is_bot=False, first_name="Upsert", username="UpsertUser")
+    created = await repo.users.upsert_from_aiogram_model(aiogram_user)
+    await repo.session.commit()
+    assert (created.id, created.username) == (aiogram_user.id, "upsertuser")
+
+    renamed = aiogram_user.model_copy(update={"username": None})
+    updated = await repo.users.upsert_from_aiogram_model(renamed)
+    await repo.session.commit()
+    assert updated.username == str(aiogram_user.id)
+    assert len(await repo.users.get_users_by_username(str(aiogram_user.id))) == 1
+
+
+async def test_unit_of_work_is_rolled_back_without_complete(repo: Repositories):
+    from bot.database import LazyRepositories
+
+    user_id = TEST_USER.id + 2
+    unit = LazyRepositories(unit_of_work=True)
+    await unit.users.create(id=user_id, username="uow")
+    await unit.close()
+    assert await repo.users.get(user_id) is None
+
+    unit = LazyRepositories(unit_of_work=True)
+    await unit.users.create(id=user_id, username="uow")
+    await unit.complete()
+    await unit.close()
+    assert await repo.users.get(user_id) is not None
+
+
+async def test_create_stores_the_same_username_as_upsert(repo: Repositories):
+    from aiogram.types import User as AiogramUser
+
+    aiogram_user = AiogramUser(id=TEST_USER.id + 3, is_bot=False, first_name="Create", username="CreateUser")
+    created = await repo.users.create_from_aiogram_model(aiogram_user)
+    assert created.username == "createuser"
@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import pytest
+
+from bot.database.bulk_writer import BulkWriteError, BulkWriter, log_failure
+from bot.database.models import SurveyResponse
+
+
+def _unavailable():
+    raise ConnectionRefusedError("database is down")
+
+
+def test_failed_flush_is_spooled(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    writer = BulkWriter(_unavailable, SurveyResponse, max_rows=2, interval=60, spool=spool)
+
+    async def use():
+        futures = [writer.add({"user_id": 1, "age": n}) for n in range(3)]
+        await writer.close()
+        return await asyncio.gather(*futures)
+
+    assert asyncio.run(use()) == [None, None, None]
+    rows = [json.loads(i) for i in spool.read_text().splitlines()]
+    assert [i["age"] for i in rows] == [0, 1, 2]
+    assert all("created_at" in i for i in rows)
+    assert writer.spooled == 3
+
+
+def test_spool_is_kept_until_inserted(tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    spool.write_text(json.dumps({"user_id": 1, "created_at": "2026-01-01T10:00:00"}) + "\n")
+
+    asyncio.run(BulkWriter(_unavailable, SurveyResponse, spool=spool).start())
+    assert spool.exists()
+
+
+def test_rows_are_lost_loudly_without_spool():
+    writer = BulkWriter(_unavailable, SurveyResponse)
+
+    async def use():
+        future = writer.add({"user_id": 1})
+        await writer.close()
+        return await future
+
+    with pytest.raises(BulkWriteError):
+        asyncio.run(use())
+
+
+def test_failure_of_unawaited_row_is_logged(caplog):
+    writer = BulkWriter(_unavailable, SurveyResponse)
+
+    async def use():
+        writer.add({"user_id": 1}).add_done_callback(log_failure)
+        await writer.close()
+        await asyncio.sleep(0)
+
+    asyncio.run(use())
+    assert "Buffered row was not written" in caplog.text
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+
+from bot.database.models import SurveyResponse
+from bot.database.models.types import EnumCode
+from bot.enums.survey import Quality, RiskBand
+
+
+def test_codes_are_enum_positions():
+    column = EnumCode(Quality)
+
+    assert [column.process_bind_param(i, None) for i in ("Poor", "Average", Quality.GOOD)] == [0, 1, 2]
+    assert [column.process_result_value(i, None) for i in (0, 2, None)] == ["Poor", "Good", None]
+    # Plain strings, not enum members, like the String columns they replaced
+    value = column.process_result_value(0, None)
+    assert isinstance(value, str)
+    assert not isinstance(value, Quality)
+
+
+def test_unknown_value_is_rejected():
+    with pytest.raises(ValueError, match="Quality"):
+        EnumCode(Quality).process_bind_param("Excellent", None)
+
+
+def test_queries_compare_codes():
+    stmt = (
+        select(SurveyResponse.risk_band, func.count())
+        .where(SurveyResponse.sleep_quality == "Poor", SurveyResponse.risk_band == RiskBand.HIGH)
+        .group_by(SurveyResponse.risk_band)
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    assert "survey_responses.sleep_quality = 0" in sql
+    assert "survey_responses.risk_band = 1" in sql
@@ -0,0 +1,47 @@
+import asyncio
+
+from bot.database import LazyRepositories
+from bot.database.repos import UsersRepo
+
+
+def test_session_is_created_on_first_use():
+    created = []
+
+    def factory():
+        from bot.database.engine import sessionmaker
+
+        created.append(sessionmaker())
+        return created[-1]
+
+    async def use():
+        repo = LazyRepositories(factory)
+        assert not repo.opened
+
+        assert isinstance(repo.users, UsersRepo)
+        assert repo.survey_responses.session is repo.session is created[0]
+        assert repo.opened
+
+        await repo.close()
+        assert not repo.opened
+
+    asyncio.run(use())
+    assert len(created) == 1
+
+
+def test_unused_repo_closes_without_session():
+    created = []
+
+    asyncio.run(LazyRepositories(lambda: created.append(None)).close())
+    assert not created
+
+
+def test_unit_of_work_is_marked_on_session():
+    from bot.database.repos.base import UNIT_OF_WORK
+
+    async def use():
+        repo = LazyRepositories(unit_of_work=True)
+        assert repo.session.info[UNIT_OF_WORK] is True
+        await repo.complete()
+        await repo.close()
+
+    asyncio.run(use())
@@ -0,0 +1,48 @@
+import csv
+import gzip
+from datetime import date, datetime
+
+from bot.database.partitions import (
+    Partition,
+    _archive_table,
+    _CsvWriter,
+    add_months,
+    months_to_archive,
+    partition_month,
+    partition_name,
+)
+
+
+def test_month_arithmetic():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 3, 1), -15) == date(2024, 12, 1)
+
+
+def test_partition_names():
+    assert partition_name(date(2026, 3, 1)) == "survey_responses_y2026m03"
+    assert partition_month("survey_responses_y2026m03") == date(2026, 3, 1)
+    assert partition_month("survey_responses_default") is None
+
+
+def test_retention_keeps_full_months():
+    months = [add_months(date(2026, 10, 1), -n) for n in range(5)]
+    partitions = [Partition(partition_name(i), i, True) for i in months]
+
+    assert months_to_archive(partitions, date(2026, 10, 18), 0) == []
+    archived = months_to_archive(partitions, date(2026, 10, 18), 2)
+    assert [i.month for i in archived] == [date(2026, 6, 1), date(2026, 7, 1)]
+
+
+def test_csv_archive_has_values(tmp_path):
+    table = _archive_table("survey_responses_y2026m01")
+    path = tmp_path / "archive.csv.gz"
+
+    writer = _CsvWriter(path, table)
+    writer.write([(1, 7, datetime(2026, 1, 5), *[None] * (len(table.columns) - 3))])
+    writer.close()
+
+    with gzip.open(path, "rt", newline="") as f:
+        header, row = list(csv.reader(f))
+    assert header[:3] == ["id", "user_id", "created_at"]
+    assert row[:3] == ["1", "7", "2026-01-05 00:00:00"]
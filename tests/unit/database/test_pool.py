@@ -0,0 +1,55 @@
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from bot.database.pool import InstrumentedPool, pool_status
+
+
+def _pool(**kwargs):
+    return InstrumentedPool(lambda: sqlite3.connect(":memory:", check_same_thread=False), **kwargs)
+
+
+def test_checkouts_are_counted():
+    pool = _pool(pool_size=2, max_overflow=0)
+
+    def use():
+        first, second = pool.connect(), pool.connect()
+        status = pool_status(pool)
+        first.close()
+        second.close()
+        return status
+
+    status = asyncio.run(greenlet_spawn(use))
+    assert status["in_use"] == 2
+    assert status["checkouts"] == 2
+    assert pool_status(pool)["in_use"] == 0
+    assert pool_status(pool)["idle"] == 2
+    assert pool_status(pool)["peak_in_use"] == 2
+
+
+def test_exhausted_pool_records_timeout():
+    pool = _pool(pool_size=1, max_overflow=0, timeout=0.05)
+
+    def use():
+        connection = pool.connect()
+        try:
+            pool.connect()
+        finally:
+            connection.close()
+
+    with pytest.raises(exc.TimeoutError):
+        asyncio.run(greenlet_spawn(use))
+
+    status = pool_status(pool)
+    assert status["timeouts"] == 1
+    assert status["checkouts"] == 1
+
+
+def test_stats_survive_recreate():
+    pool = _pool(pool_size=1)
+    asyncio.run(greenlet_spawn(lambda: pool.connect().close()))
+
+    assert pool.recreate().stats.checkouts == 1
@@ -0,0 +1,136 @@
+import asyncio
+
+from bot.database.engine import sessionmaker
+from bot.database.query_cache import QueryCache, RecentWrites
+from bot.database.repos.base import STALE_TAGS, invalidate_stale, mark_stale
+from bot.database.repos.survey_response import SurveyResponseRepo
+
+
+class Loader:
+    def __init__(self, value, during=None):
+        self.value = value
+        self.during = during
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.during is not None:
+            await self.during()
+        return self.value
+
+
+def test_invalidated_tag_is_a_miss():
+    async def use():
+        cache = QueryCache(ttl=60)
+        load = Loader([1, 2])
+
+        assert await cache.get_or_load("a", ["user:1"], load) == [1, 2]
+        assert await cache.get_or_load("a", ["user:1"], load) == [1, 2]
+        assert load.calls == 1
+
+        await cache.invalidate("user:2")
+        await cache.get_or_load("a", ["user:1"], load)
+        assert load.calls == 1
+
+        await cache.invalidate("user:1")
+        await cache.get_or_load("a", ["user:1"], load)
+        assert load.calls == 2
+        return cache.stats()
+
+    stats = asyncio.run(use())
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 2, 2)
+    assert stats["bytes"] > 0
+
+
+def test_result_loaded_during_invalidation_is_not_served():
+    async def use():
+        cache = QueryCache(ttl=60)
+        await cache.get_or_load("a", ["t"], Loader("old", during=lambda: cache.invalidate("t")))
+        return await cache.get_or_load("a", ["t"], Loader("new"))
+
+    assert asyncio.run(use()) == "new"
+
+
+def test_entries_larger_than_the_cache_are_not_kept():
+    async def use():
+        cache = QueryCache(max_bytes=64, ttl=60)
+        assert await cache.get_or_load("a", ["t"], Loader("x" * 100)) == "x" * 100
+        return cache.stats()
+
+    assert asyncio.run(use())["size"] == 0
+
+
+def test_session_with_uncommitted_writes_bypasses_cache():
+    async def use():
+        cache = QueryCache(ttl=60)
+        async with sessionmaker() as session:
+            repo = SurveyResponseRepo(session, cache)
+            load = Loader("rows")
+
+            await repo._cached("a", ["t"], load)
+            mark_stale(session, "t")
+            await repo._cached("a", ["t"], load)
+            assert load.calls == 2
+
+            await invalidate_stale(session)
+            assert STALE_TAGS not in session.info
+            await repo._cached("a", ["t"], load)
+            assert load.calls == 2
+
+    asyncio.run(use())
+
+
+class FakePipeline:
+    def __init__(self, data):
+        self.data = data
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def mget(self, keys):
+        self.commands.append(lambda: [self.data.get(i) for i in keys])
+
+    def get(self, key):
+        self.commands.append(lambda: self.data.get(key))
+
+    def set(self, key, value, ex=None):
+        self.commands.append(lambda: self.data.__setitem__(key, value))
+
+    async def execute(self):
+        return [command() for command in self.commands]
+
+
+class FakeRedis:
+    """The commands QueryCache uses, kept in a dict"""
+
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self.data)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+def test_tag_written_by_another_worker_is_recorded_as_recent():
+    async def use():
+        redis, writes = FakeRedis(), RecentWrites(60)
+        this, other = QueryCache(ttl=60, redis=redis, writes=writes), QueryCache(ttl=60, redis=redis)
+        load = Loader("rows")
+
+        await this.get_or_load("a", ["t"], load)
+        await this.get_or_load("a", ["t"], load)
+        assert not writes.within(["t"], 5)
+        assert this.redis_hits + this.hits == 1
+
+        await other.invalidate("t")
+        await this.get_or_load("a", ["t"], load)
+        assert writes.within(["t"], 5)
+        assert load.calls == 2
+
+    asyncio.run(use())
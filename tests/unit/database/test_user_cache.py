@@ -0,0 +1,41 @@
+import asyncio
+
+from bot.database.engine import sessionmaker
+from bot.database.user_cache import UserCache, UserSnapshot
+
+
+def test_snapshot_roundtrip():
+    snapshot = UserSnapshot(42, "1user", True)
+
+    assert UserSnapshot.decode(42, snapshot.encode().encode()) == snapshot
+    assert UserSnapshot.decode(7, UserSnapshot(7, "", False).encode()) == UserSnapshot(7, "", False)
+
+
+def test_local_tier():
+    async def use():
+        cache = UserCache(maxsize=10, ttl=60)
+        assert await cache.get(1) is None
+
+        await cache.set(UserSnapshot(1, "name", False))
+        assert await cache.get(1) == UserSnapshot(1, "name", False)
+
+        await cache.delete(1)
+        assert await cache.get(1) is None
+        return cache.stats()
+
+    stats = asyncio.run(use())
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_attached_user_is_clean():
+    async def use():
+        async with sessionmaker() as session:
+            user = UserSnapshot(1, "name", False).attach(session)
+
+            assert user in session
+            assert not session.new and not session.dirty
+
+            user.is_admin = True
+            assert user in session.dirty
+
+    asyncio.run(use())
@@ -0,0 +1,69 @@
+import itertools
+
+import joblib
+import numpy as np
+
+from bot.ml.adaptive import answered_rows, is_complete, is_decided, probability_range
+from bot.ml.features import ANSWER_OPTIONS
+from bot.ml.registry import load_model
+from tests.utils.ml import build_model, random_answers
+
+
+def _model(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    return load_model(path)
+
+
+def test_range_covers_every_completion(tmp_path):
+    model = _model(tmp_path)
+    remaining = ["Substance_Use", "Chronic_Illness", "Family_History", "Physical_Activity"]
+    answers = {k: v for k, v in random_answers(1)[0].items() if k not in remaining}
+
+    completions = [
+        {**answers, **dict(zip(remaining, values))}
+        for values in itertools.product(*(ANSWER_OPTIONS[i] for i in remaining))
+    ]
+    proba = model.score(model.encoder.encode_many(completions))
+
+    low, high = probability_range(model, answers)
+    assert np.isclose(low, proba.min())
+    assert np.isclose(high, proba.max())
+
+
+def test_complete_survey_has_a_single_probability(tmp_path):
+    model = _model(tmp_path)
+    answers = random_answers(1)[0]
+
+    low, high = probability_range(model, answers)
+    assert low == high == float(model.score(model.encoder.encode(answers))[0])
+    assert is_decided(model, answers)
+
+
+def test_too_many_combinations_are_undecided(tmp_path):
+    model = _model(tmp_path)
+
+    assert probability_range(model, {}, max_rows=4096) is None
+    assert not is_decided(model, {})
+
+
+def test_decided_survey_keeps_its_risk_band(tmp_path):
+    model = _model(tmp_path)
+    remaining = ["Substance_Use", "Chronic_Illness", "Family_History"]
+
+    for answers in random_answers(200, seed=3):
+        partial = {k: v for k, v in answers.items() if k not in remaining}
+        if is_decided(model, partial):
+            low, _ = probability_range(model, partial)
+            full = float(model.score(model.encoder.encode(answers))[0])
+            assert (full >= model.threshold) == (low >= model.threshold)
+
+
+def test_surveys_stopped_early_are_not_complete(tmp_path):
+    model = _model(tmp_path)
+    answers = random_answers(2)
+    answers[1] = {k: v for k, v in answers[1].items() if k not in ("Family_History", "Financial_Stress")}
+
+    assert is_complete(answers[0])
+    assert not is_complete(answers[1])
+    np.testing.assert_array_equal(answered_rows(model.encoder, model.encoder.encode_many(answers)), [True, False])
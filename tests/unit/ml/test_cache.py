@@ -0,0 +1,41 @@
+import numpy as np
+
+from bot.ml.cache import PredictionCache
+from tests.utils import MockedRedis
+
+
+async def test_local_hit_and_miss():
+    cache = PredictionCache(maxsize=8)
+    row = np.array([[1.0, 2.0, np.nan]])
+
+    assert await cache.get(row) is None
+    await cache.set(row, 0.25)
+
+    assert await cache.get(row.copy()) == 0.25
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+async def test_version_change_invalidates():
+    cache = PredictionCache()
+    cache.set_version("model-a")
+    row = np.array([[1.0, 2.0]])
+    await cache.set(row, 0.5)
+
+    cache.set_version("model-b")
+
+    assert await cache.get(row) is None
+
+
+async def test_redis_tier_is_shared():
+    redis = MockedRedis()
+    row = np.array([[3.0, 0.0]])
+
+    first = PredictionCache(redis=redis)
+    first.set_version("model-a")
+    await first.set(row, 0.75)
+
+    second = PredictionCache(redis=redis)
+    second.set_version("model-a")
+
+    assert await second.get(row) == 0.75
+    assert second.redis_hits == 1
@@ -0,0 +1,112 @@
+import subprocess
+import sys
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder, OrdinalEncoder
+from sklearn.tree import DecisionTreeClassifier
+
+from bot.ml.compiled import CompiledModel, CompileError, compile_pipeline, max_difference
+from bot.ml.features import FeatureEncoder
+from bot.ml.registry import load_model
+from tests.utils.ml import build_model, random_answers
+
+ESTIMATORS = [
+    LogisticRegression(max_iter=1000),
+    DecisionTreeClassifier(max_depth=6, random_state=0),
+    RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0),
+    ExtraTreesClassifier(n_estimators=20, max_depth=6, random_state=0),
+    GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0),
+]
+
+
+@pytest.mark.parametrize("estimator", ESTIMATORS, ids=lambda i: type(i).__name__)
+def test_compiled_model_reproduces_pipeline(estimator):
+    pipeline = build_model(estimator)["model"]
+
+    compiled = compile_pipeline(pipeline, threshold=0.41)
+
+    assert max_difference(compiled, pipeline, n_samples=1000) < 1e-9
+
+
+def test_imputers_ordinal_and_placeholders():
+    artifact = build_model()
+    frame = artifact["model"][0].transformers_
+    categorical, numeric = frame[0][2], frame[1][2]
+
+    encoder = FeatureEncoder()
+    x = encoder.to_frame(encoder.encode_many(random_answers(500, seed=3)))
+    y = (x["Stress_Level"] > 3).astype(int)
+
+    pipeline = Pipeline(
+        [
+            (
+                "prep",
+                ColumnTransformer(
+                    [
+                        ("ord", OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1), categorical[:4]),
+                        (
+                            "cat",
+                            make_pipeline(SimpleImputer(strategy="most_frequent"), OneHotEncoder(drop="first")),
+                            categorical[4:],
+                        ),
+                        ("num", make_pipeline(SimpleImputer(), MinMaxScaler()), numeric),
+                        (
+                            "flags",
+                            make_pipeline(SimpleImputer(strategy="constant", fill_value="n/a"), OneHotEncoder()),
+                            ["Gender_Bool"],
+                        ),
+                    ]
+                ),
+            ),
+            ("clf", LogisticRegression(max_iter=1000)),
+        ]
+    ).fit(x, y)
+
+    compiled = compile_pipeline(pipeline, threshold=0.5)
+
+    assert max_difference(compiled, pipeline, n_samples=500) < 1e-9
+
+
+def test_unsupported_pipeline_is_rejected():
+    pipeline = build_model()["model"]
+    with pytest.raises(CompileError):
+        compile_pipeline(pipeline[-1], threshold=0.5)
+
+
+def test_registry_prefers_compiled_artifact(tmp_path):
+    path = tmp_path / "model.pkl"
+    artifact = build_model(GradientBoostingClassifier(n_estimators=10, random_state=0))
+    joblib.dump(artifact, path)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "bot.ml.compiled", str(path), "--samples", "500"], capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+    model = load_model(path)
+    assert isinstance(model.compiled, CompiledModel)
+    assert model.model is None
+    assert model.version == load_model(path, use_compiled=False).version
+
+    matrix = model.encoder.encode_many(random_answers(50, seed=5))
+    expected = artifact["model"].predict_proba(model.encoder.to_frame(matrix))[:, 1]
+    assert np.allclose(model.predict_proba(matrix), expected, atol=1e-9)
+
+
+def test_stale_compiled_artifact_is_ignored(tmp_path):
+    path = tmp_path / "model.pkl"
+    artifact = build_model()
+    joblib.dump(artifact, path)
+    compile_pipeline(artifact["model"], threshold=0.41, source_version="model-old").save(tmp_path / "model.npz")
+
+    model = load_model(path)
+
+    assert model.compiled is None
+    assert model.model is not None
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from bot.ml.executor import InferenceExecutor
+
+
+async def test_concurrent_rows_are_batched():
+    batches = []
+
+    def predict_batch(rows):
+        batches.append(list(rows))
+        return [row / 10 for row in rows]
+
+    executor = InferenceExecutor(predict_batch, window=0.05, max_batch_size=64)
+    result = await asyncio.gather(*[executor.predict(i) for i in range(10)])
+    await executor.close()
+
+    assert result == [i / 10 for i in range(10)]
+    assert len(batches) == 1
+    assert executor.rows == 10
+
+
+async def test_batch_is_closed_on_max_size():
+    executor = InferenceExecutor(lambda rows: [0.5] * len(rows), window=1, max_batch_size=4)
+    await asyncio.gather(*[executor.predict(i) for i in range(8)])
+    await executor.close()
+
+    assert executor.batches == 2
+
+
+async def test_errors_are_propagated_to_callers():
+    def predict_batch(rows):
+        raise ValueError("broken model")
+
+    executor = InferenceExecutor(predict_batch, window=0.001)
+
+    with pytest.raises(ValueError):
+        await executor.predict(1)
+
+    await executor.close()
+
+
+async def test_close_fails_rows_being_collected():
+    executor = InferenceExecutor(lambda rows: [0.5] * len(rows), window=60)
+    collected = asyncio.create_task(executor.predict(1))
+    await asyncio.sleep(0.01)
+
+    queued = asyncio.create_task(executor.predict(2))
+    await executor.close()
+
+    for task in (collected, queued):
+        with pytest.raises(RuntimeError, match="closed"):
+            await task
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from bot.ml.features import FEATURE_COLUMNS, FeatureEncoder
+from tests.utils.ml import build_model, random_answers, stored_response
+
+
+def test_encode_follows_model_column_order():
+    columns = ["Stress_Level", "Gender", "Age", "Semester_Credit_Load"]
+    encoder = FeatureEncoder(columns)
+
+    row = encoder.encode({"Stress_Level": 4, "Gender": "Female", "Age": "21–23"})
+
+    assert row.shape == (1, 4)
+    assert row.tolist() == [[4.0, 1.0, 22.0, 22.0]]
+
+
+def test_unsupported_model_columns_are_rejected():
+    with pytest.raises(ValueError):
+        FeatureEncoder([*FEATURE_COLUMNS, "Unknown_Column"])
+
+
+def test_unexpected_answer_is_rejected():
+    answers = random_answers(1)[0]
+    answers["Gender"] = "Other"
+
+    with pytest.raises(ValueError):
+        FeatureEncoder().encode(answers)
+
+
+def test_to_frame_round_trips_answers():
+    answers = random_answers(16)
+    encoder = FeatureEncoder()
+
+    frame = encoder.to_frame(encoder.encode_many(answers))
+
+    assert list(frame.columns) == list(FEATURE_COLUMNS)
+    assert frame["Gender"].tolist() == [i["Gender"] for i in answers]
+    assert frame["Stress_Level"].tolist() == [i["Stress_Level"] for i in answers]
+    assert frame["Course"].unique().tolist() == ["Engineering"]
+    assert frame["Sleep_Quality_Level"].isna().all()
+
+
+def test_encoder_for_model_matches_pipeline():
+    model = build_model()["model"]
+    encoder = FeatureEncoder.for_model(model)
+    answers = random_answers(32, seed=1)
+
+    batch = model.predict_proba(encoder.to_frame(encoder.encode_many(answers)))[:, 1]
+    single = [model.predict_proba(encoder.to_frame(encoder.encode(i)))[0, 1] for i in answers]
+
+    assert np.allclose(batch, single)
+
+
+def test_stored_responses_encode_like_answers():
+    answers = random_answers(50, seed=3)
+    records = [stored_response(i) for i in answers]
+    records[0]["sleep_quality"] = None
+    answers[0]["Sleep_Quality"] = None
+    encoder = FeatureEncoder(list(reversed(FEATURE_COLUMNS)))
+
+    np.testing.assert_array_equal(encoder.encode_stored(records), encoder.encode_many(answers))
+    assert "gpa" in encoder.stored_columns
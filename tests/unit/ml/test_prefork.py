@@ -0,0 +1,69 @@
+import os
+
+import joblib
+import numpy as np
+
+from bot.ml.prefork import SharedModelPool, memory_report
+from bot.ml.registry import ModelRegistry
+from tests.utils.ml import build_model, random_answers
+
+
+def test_workers_score_with_the_preloaded_model(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+
+    registry = ModelRegistry(path, mmap_mode="r")
+    model = registry.preload()
+    assert registry.is_ready
+
+    pool = SharedModelPool(2)
+    registry.add_listener(lambda _: pool.share(registry.versions))
+    pool.start(registry.versions)
+
+    try:
+        matrix = model.encoder.encode_many(random_answers(8))
+        np.testing.assert_allclose(model.predict_proba(matrix), model.score(matrix))
+        assert model.stats.calls == 1
+
+        pids = pool.pids()
+        assert len(pids) == 2
+        assert os.getpid() not in pids
+
+        report = memory_report(pids)
+        assert [i.name for i in report] == ["bot", "worker 1", "worker 2"]
+        assert all(i.uss <= i.rss for i in report)
+    finally:
+        pool.close()
+
+    assert model.scorer is None
+
+
+async def test_workers_load_new_versions_themselves(tmp_path):
+    from sklearn.tree import DecisionTreeClassifier
+
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+
+    registry = ModelRegistry(path)
+    pool = SharedModelPool(1)
+    registry.add_listener(lambda _: pool.share(registry.versions))
+
+    try:
+        first = registry.preload()
+        pool.start(registry.versions)
+        before = pool.pids()
+
+        joblib.dump(build_model(DecisionTreeClassifier(max_depth=3)), path)
+        second = await registry.reload()
+        assert pool.pids() == before
+        assert second.scorer is not None
+
+        matrix = second.encoder.encode_many(random_answers(4))
+        np.testing.assert_allclose(second.predict_proba(matrix), second.score(matrix))
+        # The file holds the second version now, the bot process scores the first one itself
+        np.testing.assert_allclose(first.predict_proba(matrix), first.score(matrix))
+    finally:
+        pool.close()
+
+    assert first.scorer is None
+    assert second.scorer is None
@@ -0,0 +1,99 @@
+import asyncio
+
+import joblib
+import pytest
+
+from bot.ml.registry import ModelRegistry
+from tests.utils.ml import build_model, random_answers
+
+
+async def test_model_is_loaded_in_background(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+
+    registry = ModelRegistry(path, mmap_mode="r")
+    versions = []
+    registry.add_listener(lambda model: versions.append(model.version))
+
+    assert not registry.is_ready
+    registry.load_in_background()
+    model = await registry.wait_ready(timeout=30)
+
+    assert model is registry.current
+    assert versions == [model.version]
+    assert model.threshold == 0.41
+
+    proba = model.predict_proba(model.encoder.encode_many(random_answers(4)))
+    assert proba.shape == (4,)
+
+
+async def test_wait_ready_times_out(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    registry = ModelRegistry(path)
+
+    registry.load_in_background()
+    assert await registry.wait_ready(timeout=0) is None
+    await asyncio.wait_for(registry._task, 30)
+
+
+async def test_missing_artifact_is_not_ready(tmp_path):
+    registry = ModelRegistry(tmp_path / "missing.pkl")
+
+    registry.load_in_background()
+
+    assert await registry.wait_ready(timeout=5) is None
+    assert registry.error
+
+
+async def test_reload_swaps_and_rollback_restores(tmp_path):
+    from sklearn.tree import DecisionTreeClassifier
+
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    registry = ModelRegistry(path)
+    first = await registry.reload()
+
+    joblib.dump(build_model(DecisionTreeClassifier(max_depth=3)), path)
+    second = await registry.reload()
+
+    assert second.version != first.version
+    assert registry.current is second
+    assert registry.versions == [first, second]
+
+    assert registry.rollback() is first
+    assert registry.current is first
+    assert registry.rollback() is None
+
+
+async def test_broken_artifact_keeps_active_model(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    registry = ModelRegistry(path)
+    model = await registry.reload()
+
+    joblib.dump({"model": None, "threshold": 0.5}, path)
+
+    with pytest.raises(Exception):
+        await registry.reload()
+    assert registry.current is model
+
+
+async def test_watcher_picks_up_new_artifact(tmp_path):
+    from sklearn.tree import DecisionTreeClassifier
+
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    registry = ModelRegistry(path)
+    first = await registry.reload()
+
+    registry.watch(0.05)
+    joblib.dump(build_model(DecisionTreeClassifier(max_depth=2)), path)
+
+    for _ in range(200):
+        if registry.current is not first:
+            break
+        await asyncio.sleep(0.05)
+    await registry.close()
+
+    assert registry.current is not first
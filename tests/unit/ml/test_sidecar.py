@@ -0,0 +1,83 @@
+import asyncio
+
+import joblib
+import numpy as np
+import pytest
+
+from bot.ml.features import FeatureEncoder
+from bot.ml.registry import ModelRegistry
+from bot.ml.sidecar import SidecarClient, SidecarError, SidecarServer
+from tests.utils.ml import build_model, random_answers
+
+
+async def _score(model, row):
+    return float(model.predict_proba(row)[0]), model.version
+
+
+async def test_client_gets_probabilities_from_server(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    registry = ModelRegistry(path)
+    model = await registry.reload()
+
+    server = SidecarServer(tmp_path / "inference.sock", registry, _score)
+    await server.start()
+    client = SidecarClient(server.path, timeout=5)
+
+    try:
+        matrix = FeatureEncoder().encode_many(random_answers(16))
+        results = await asyncio.gather(*(client.predict(matrix[n : n + 1]) for n in range(len(matrix))))
+        batch = await client.predict(matrix)
+    finally:
+        await client.close()
+        await server.close()
+
+    expected = model.score(model.encoder.encode_many(random_answers(16)))
+    np.testing.assert_allclose([i.probabilities[0] for i in results], expected)
+    np.testing.assert_allclose(batch.probabilities, expected)
+    assert batch.threshold == model.threshold
+    assert batch.model_version == model.version
+
+
+async def test_server_errors_are_raised_by_client(tmp_path):
+    server = SidecarServer(tmp_path / "inference.sock", ModelRegistry(tmp_path / "missing.pkl"), _score)
+    await server.start()
+    client = SidecarClient(server.path, timeout=5)
+
+    try:
+        with pytest.raises(SidecarError, match="not loaded"):
+            await client.predict(FeatureEncoder().encode(random_answers(1)[0]))
+        assert client.connected
+    finally:
+        await client.close()
+        await server.close()
+
+
+async def test_unavailable_sidecar_fails_fast(tmp_path):
+    client = SidecarClient(tmp_path / "missing.sock", timeout=5, retry_interval=60)
+    row = FeatureEncoder().encode(random_answers(1)[0])
+
+    with pytest.raises(SidecarError, match="Cannot connect"):
+        await client.predict(row)
+    with pytest.raises(SidecarError, match="unavailable"):
+        await client.predict(row)
+
+
+async def test_request_on_dropped_connection_raises_sidecar_error(tmp_path):
+    server = SidecarServer(tmp_path / "inference.sock", ModelRegistry(tmp_path / "missing.pkl"), _score)
+    await server.start()
+    client = SidecarClient(server.path, timeout=5)
+    row = FeatureEncoder().encode(random_answers(1)[0])
+
+    async def connected():
+        # The connection is lost right after _connect found it alive
+        client._disconnect(ConnectionResetError("reset"))
+
+    try:
+        await client._connect()
+        client._connect = connected
+        with pytest.raises(SidecarError, match="lost"):
+            await client.predict(row)
+    finally:
+        await client.close()
+        await server.close()
@@ -0,0 +1,70 @@
+import joblib
+import numpy as np
+
+from bot.ml.registry import load_model
+from bot.ml.surrogate import Surrogate, evaluate, fit_surrogate, surrogate_path, surrogate_version
+from tests.utils.ml import build_model, random_answers
+
+
+def _fit(model, n=20000):
+    matrix = model.encoder.encode_many(random_answers(n, seed=1))
+    return fit_surrogate(model.encoder, matrix, model.score(matrix), model.threshold, model.version)
+
+
+def test_surrogate_agrees_with_full_model(tmp_path):
+    from sklearn.ensemble import GradientBoostingClassifier
+
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(GradientBoostingClassifier(n_estimators=50, max_depth=2)), path)
+    model = load_model(path)
+
+    surrogate = _fit(model)
+    report = evaluate(surrogate, model.score, model.encoder.encode_many(random_answers(5000, seed=2)))
+
+    assert surrogate.margin > 0
+    assert report["agreement"] > 0.99
+    assert 0.3 < report["coverage"] <= 1.0
+
+
+def test_undecided_rows_are_nan(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    model = load_model(path)
+
+    surrogate = _fit(model, n=2000)
+    surrogate.margin = np.inf
+
+    assert np.isnan(surrogate.decide(model.encoder.encode_many(random_answers(10)))).all()
+
+
+def test_registry_attaches_surrogate_of_same_version(tmp_path):
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    model = load_model(path)
+
+    surrogate = _fit(model, n=2000)
+    surrogate.save(surrogate_path(path))
+
+    loaded = load_model(path, use_surrogate=True)
+    assert isinstance(loaded.surrogate, Surrogate)
+    np.testing.assert_array_equal(loaded.surrogate.coef, surrogate.coef)
+    assert load_model(path).surrogate is None
+
+    joblib.dump(build_model(seed=1), path)
+    assert load_model(path, use_surrogate=True).surrogate is None
+
+
+async def test_surrogate_answers_carry_their_own_version(tmp_path):
+    from bot.ml.service import score_features
+
+    path = tmp_path / "model.pkl"
+    joblib.dump(build_model(), path)
+    model = load_model(path)
+    model.surrogate = _fit(model, n=2000)
+    model.surrogate.margin = -1.0
+
+    row = model.encoder.encode_many(random_answers(1, seed=3))
+    proba, version = await score_features(model, row)
+
+    assert version == surrogate_version(model.version) == f"{model.version}+surrogate"
+    assert proba == float(model.surrogate.decide(row)[0])
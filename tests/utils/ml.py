@@ -0,0 +1,79 @@
+"""Synthetic survey data and models for ML tests."""
+from typing import Any
+
+import numpy as np
+
+from bot.ml.features import FEATURES, FeatureEncoder, age_mapping, convert_gpa, sample_answers
+
+
+def random_answers(n: int, seed: int = 0) -> list[dict[str, Any]]:
+    """Survey FSM data dicts shaped like the ones in process_bot_rating."""
+    return sample_answers(n, seed)
+
+
+def stored_response(answers: dict[str, Any]) -> dict[str, Any]:
+    """Survey response columns the way process_bot_rating stores FSM data."""
+    return {
+        "age": age_mapping(answers["Age"]),
+        "gender": answers["Gender"],
+        "course": "Business",
+        "gpa": convert_gpa(answers["CGPA"]),
+        "stress_level": answers["Stress_Level"],
+        "anxiety_score": answers["Anxiety_Score"],
+        "sleep_quality": answers["Sleep_Quality"],
+        "physical_activity": answers["Physical_Activity"],
+        "diet_quality": answers["Diet_Quality"],
+        "social_support": answers["Social_Support"],
+        "relationship_status": answers["Relationship_Status"],
+        "substance_use": answers["Substance_Use"],
+        "counseling_service_use": answers["Counseling_Service_Use"],
+        "family_history": answers["Family_History"],
+        "chronic_illness": answers["Chronic_Illness"],
+        "financial_stress": answers["Financial_Stress"],
+        "extracurricular_involvement": "Moderate",
+        "semester_credit_load": 17,
+        "residence_type": answers["Residence_Type"],
+    }
+
+
+def build_model(estimator: Any = None, n: int = 2000, seed: int = 0) -> dict[str, Any]:
+    """Fit a pipeline with the same input columns as the production model."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    encoder = FeatureEncoder()
+    frame = encoder.to_frame(encoder.encode_many(random_answers(n, seed)))
+
+    categorical = [i.name for i in FEATURES if i.categories is not None]
+    numeric = [i.name for i in FEATURES if i.categories is None and i.dtype != "object"]
+
+    rng = np.random.default_rng(seed)
+    logit = (
+        0.8 * (frame["Stress_Level"] - 3)
+        + 0.6 * (frame["Anxiety_Score"] - 2.5)
+        + 0.9 * (frame["Sleep_Quality"] == "Poor")
+        - 0.7 * (frame["Social_Support"] == "Strong")
+        + 0.5 * (frame["Family_History"] == "Yes")
+        + rng.normal(0, 0.5, n)
+    )
+    target = (logit > 0).astype(int)
+
+    pipeline = Pipeline(
+        [
+            (
+                "prep",
+                ColumnTransformer(
+                    [
+                        ("cat", OneHotEncoder(handle_unknown="ignore"), categorical),
+                        ("num", StandardScaler(), numeric),
+                    ],
+                    remainder="drop",
+                ),
+            ),
+            ("clf", estimator if estimator is not None else LogisticRegression(max_iter=1000)),
+        ]
+    )
+    pipeline.fit(frame, target)
+    return {"model": pipeline, "threshold": 0.41}
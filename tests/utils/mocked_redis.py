@@ -13,7 +13,7 @@ class MockedRedis(Redis):
         """Get value from mocked storage."""
         return self.data.get(name)
 
-    async def set(self, name: str, value: Any, *_) -> bool | None:
+    async def set(self, name: str, value: Any, *_, **__) -> bool | None:
         """Set key-value pair in mocked storage."""
         self.data[name] = value
         return True